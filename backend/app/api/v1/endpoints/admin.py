@@ -0,0 +1,41 @@
+from fastapi import APIRouter, HTTPException, Header, Query, Depends
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import asyncio
+
+from app.core.config import settings
+from app.core.profiling import ProcessSampler, collapse, verify_admin_token
+
+router = APIRouter()
+_profile_lock = asyncio.Lock()
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Reject requests without the configured admin token"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not verify_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@router.post("/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin_token)])
+async def profile_process(
+    seconds: float = Query(10.0, gt=0, description="How long to sample"),
+    interval_ms: float = Query(None, gt=0, description="Sampling interval (default PROFILE_SAMPLE_INTERVAL_MS)")
+):
+    """Sample every thread for `seconds` and return collapsed stacks for a flamegraph"""
+    if seconds > settings.PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {settings.PROFILE_MAX_SECONDS}")
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    async with _profile_lock:
+        sampler = ProcessSampler(interval_ms / 1000 if interval_ms else None)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stacks = sampler.stop()
+
+    return PlainTextResponse(collapse(stacks), headers={
+        "X-Profile-Samples": str(sampler.samples),
+        "X-Profile-Seconds": f"{sampler.duration:.4f}"
+    })
@@ -1,19 +1,29 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import StreamingResponse
 from typing import Optional, List
+from dataclasses import asdict
 from datetime import datetime
+import json
 
 from app.models.farming import (
     FarmingStats, FarmerData, FarmingOpportunity, NetworkHealth,
     FarmingAlert, FarmingROIAnalysis, FarmingLeaderboard, 
-    ComprehensiveFarmingData, FarmingTrends
+    ComprehensiveFarmingData, FarmingTrends, FarmerBatchRequest, FarmingSessionRecord
 )
 from app.services.kale_farming import KaleFarmingService
-from app.services.tracker_service import TrackerService
+from app.services.contract_integration import ContractIntegratedFarmingService
+from app.services.event_indexer import get_event_indexer
+from app.services.session_writer import get_session_queue
+from app.services.harvest_scheduler import get_harvest_scheduler
+from app.services.alert_engine import ALERT_TYPES, PriceUnavailableError, get_alert_engine
+from app.services.tracker_service import get_tracker_service
 from app.core.config import settings
 
 router = APIRouter()
 farming_service = KaleFarmingService()
-tracker_service = TrackerService()
+contract_service = ContractIntegratedFarmingService()
+event_indexer = get_event_indexer()
+tracker_service = get_tracker_service()
 
 @router.get("/stats", response_model=FarmingStats)
 async def get_farming_stats():
@@ -41,6 +51,74 @@ async def get_farmer_data(address: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching farmer data: {str(e)}")
 
+@router.post("/farmers/batch")
+async def get_farmers_batch(request: FarmerBatchRequest):
+    """
+    Get data for many farmers in one round trip
+    
+    Streams newline-delimited JSON, one line per unique address, as each
+    lookup completes. Cached farmers are returned first.
+    """
+    if len(request.addresses) > settings.FARMER_BATCH_MAX_ADDRESSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.FARMER_BATCH_MAX_ADDRESSES} addresses per batch"
+        )
+    
+    unique_addresses = list(dict.fromkeys(request.addresses))
+    valid_addresses = [address for address in unique_addresses if len(address) >= 10]  # Basic validation for Stellar address
+    invalid_addresses = [address for address in unique_addresses if len(address) < 10]
+    
+    async def stream_results():
+        for address in invalid_addresses:
+            yield json.dumps({"address": address, "status": "invalid", "cached": False, "data": None}) + "\n"
+        
+        try:
+            async for address, data, cached in contract_service.get_real_farmers_batch(valid_addresses):
+                result = {"address": address, "status": "not_found", "cached": cached, "data": None}
+                if data:
+                    result["status"] = "ok"
+                    result["data"] = json.loads(FarmerData(**data).json())
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            yield json.dumps({"status": "error", "detail": f"Error fetching farmer data: {str(e)}"}) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@router.post("/sessions", status_code=202)
+async def record_farming_sessions(sessions: List[FarmingSessionRecord]):
+    """Queue farming sessions for batched on-chain recording"""
+    session_queue = get_session_queue()
+    if not session_queue.is_running:
+        raise HTTPException(status_code=503, detail="Session recording is not available")
+    
+    try:
+        session_ids = [
+            await contract_service.queue_farming_activity(
+                session.farmer_address, session.stake_amount, session.success, session.reward
+            )
+            for session in sessions
+        ]
+        return {"status": "queued", "session_ids": session_ids}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queueing farming sessions: {str(e)}")
+
+@router.get("/sessions/queue")
+async def get_session_queue_stats():
+    """Get write-behind session queue statistics"""
+    return get_session_queue().get_stats()
+
+@router.get("/reminders/stats")
+async def get_harvest_reminder_stats():
+    """Get harvest reminder scheduler statistics"""
+    return get_harvest_scheduler().get_stats()
+
+@router.get("/index/stats")
+async def get_event_index_stats():
+    """Get contract event indexer progress, including any gap left by an expired cursor"""
+    return event_indexer.get_stats()
+
 @router.get("/opportunity", response_model=FarmingOpportunity)
 async def analyze_farming_opportunity(
     stake_amount: float = Query(100, description="Amount of KALE to stake", ge=1)
@@ -137,11 +215,19 @@ async def get_farming_leaderboard(
 ):
     """Get farming leaderboard showing top farmers"""
     try:
-        farmers = await farming_service.get_farming_leaderboard(limit=limit)
+        # Served from the contract event index once it has data
+        if event_indexer.has_data:
+            farmers = event_indexer.get_leaderboard(limit=limit)
+            total_count = len(event_indexer.farmers)
+        else:
+            # The service returns its own dataclasses; the response model needs the API model
+            farmers = [FarmerData(**asdict(farmer))
+                       for farmer in await farming_service.get_farming_leaderboard(limit=limit)]
+            total_count = len(farmers)
         
         return FarmingLeaderboard(
             farmers=farmers,
-            total_count=len(farmers),
+            total_count=total_count,
             leaderboard_type=sort_by
         )
     except Exception as e:
@@ -226,8 +312,19 @@ async def create_farming_alert(
 ):
     """Create a new farming alert for specific conditions"""
     try:
-        # In a real implementation, this would save the alert to a database
-        # and trigger notifications when conditions are met
+        # Price alerts are persisted and evaluated on every tick by the alert engine
+        if alert_type in ALERT_TYPES:
+            if threshold_value is None or threshold_value <= 0:
+                raise HTTPException(status_code=400, detail="Price alerts need a positive threshold_value")
+            try:
+                alert = await get_alert_engine().create_alert_at_current_price(alert_type, threshold_value)
+            except PriceUnavailableError as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            return {
+                "message": "Alert created successfully",
+                "alert_id": alert.id,
+                "config": alert
+            }
         
         alert_config = {
             "alert_type": alert_type,
@@ -243,6 +340,8 @@ async def create_farming_alert(
             "config": alert_config
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating alert: {str(e)}")
 
@@ -5,6 +5,7 @@ from sqlalchemy import text
 from app.core.config import settings
 from app.db.database import AsyncSessionLocal
 from app.services.price_monitor import PriceService
+from app.services.loop_monitor import get_loop_monitor
 
 router = APIRouter()
 price_service = PriceService()
@@ -80,6 +81,11 @@ async def detailed_health_check():
     
     return health_status
 
+@router.get("/loop")
+async def event_loop_health():
+    """Event loop lag and the stacks captured during recent stalls"""
+    return get_loop_monitor().get_stats()
+
 @router.get("/readiness")
 async def readiness_check():
     """Kubernetes-style readiness probe"""
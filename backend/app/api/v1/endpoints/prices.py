@@ -4,13 +4,17 @@ from datetime import datetime, timedelta
 
 from app.models.price import (
     PriceData, PriceStatistics, TechnicalIndicators,
-    PriceHistoryRequest, PriceHistoryResponse
+    PriceHistoryRequest, PriceHistoryResponse, PriceCandle,
+    PriceAlert, PriceAlertCreate
 )
-from app.services.tracker_service import TrackerService
+from app.services.tracker_service import get_tracker_service
+from app.services.retention import get_retention_service
+from app.services.alert_engine import PriceUnavailableError, get_alert_engine
+from app.services.webhook_outbox import get_webhook_outbox
 from app.core.config import settings
 
 router = APIRouter()
-tracker_service = TrackerService()
+tracker_service = get_tracker_service()
 
 @router.get("/current", response_model=PriceData)
 async def get_current_price():
@@ -84,6 +88,16 @@ async def get_price_statistics(
     
     return statistics
 
+@router.get("/candles", response_model=List[PriceCandle])
+async def get_price_candles(
+    start_date: Optional[datetime] = Query(None, description="Earliest candle start"),
+    end_date: Optional[datetime] = Query(None, description="Latest candle start"),
+    limit: int = Query(500, description="Maximum number of candles to return", le=5000, ge=1)
+):
+    """Get OHLC candles for periods older than the raw price retention window"""
+    candles = await get_retention_service().get_candles(start_date, end_date, limit)
+    return [PriceCandle.model_validate(candle) for candle in candles]
+
 @router.get("/technical-indicators")
 async def get_technical_indicators():
     """Get basic technical analysis indicators for KALE token"""
@@ -144,4 +158,36 @@ async def force_price_update():
     if not price_data:
         raise HTTPException(status_code=503, detail="Failed to fetch price data")
     
-    return price_data
\ No newline at end of file
+    return price_data
+
+@router.post("/alerts", response_model=PriceAlert, status_code=201)
+async def create_price_alert(request: PriceAlertCreate):
+    """Create a one-shot price alert (change alerts are measured from the current price)"""
+    try:
+        return await get_alert_engine().create_alert_at_current_price(
+            request.alert_type, request.threshold, request.webhook_url
+        )
+    except PriceUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/alerts", response_model=List[PriceAlert])
+async def list_price_alerts(
+    limit: int = Query(100, description="Maximum number of alerts to return", le=1000, ge=1),
+    offset: int = Query(0, description="Number of alerts to skip", ge=0)
+):
+    """List active price alerts"""
+    return get_alert_engine().get_active_alerts(limit=limit, offset=offset)
+
+@router.get("/alerts/deliveries")
+async def get_alert_delivery_stats():
+    """Webhook outbox depth and delivery counters"""
+    return await get_webhook_outbox().get_stats()
+
+@router.delete("/alerts/{alert_id}")
+async def delete_price_alert(alert_id: int):
+    """Deactivate a price alert"""
+    if not await get_alert_engine().delete_alert(alert_id):
+        raise HTTPException(status_code=404, detail="Active alert not found")
+    return {"message": "Alert deleted", "alert_id": alert_id}
@@ -1,13 +1,15 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List, Dict
+from typing import List, Dict, Set, Optional
 import asyncio
 import json
 import logging
 from datetime import datetime
 
+from app.core.metrics import WEBSOCKET_CONNECTIONS, WEBSOCKET_BROADCAST_SECONDS
 from app.models.price import WebSocketMessage
-from app.services.tracker_service import TrackerService
+from app.services.tracker_service import get_tracker_service
 from app.services.kale_farming import KaleFarmingService
+from app.services.harvest_scheduler import get_harvest_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +20,12 @@ class ConnectionManager:
     
     def __init__(self):
         self.active_connections: List[WebSocket] = []
-        self.tracker_service = TrackerService()
+        self.tracker_service = get_tracker_service()
         self.farming_service = KaleFarmingService()
+        self.harvest_scheduler = get_harvest_scheduler()
+        # Farming alert subscriptions, indexed both ways
+        self.farmer_subscriptions: Dict[str, Set[WebSocket]] = {}
+        self.connection_farmers: Dict[WebSocket, Set[str]] = {}
         
     async def connect(self, websocket: WebSocket):
         """Accept new WebSocket connection"""
@@ -43,8 +49,51 @@ class ConnectionManager:
         """Remove WebSocket connection"""
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+        for farmer_address in list(self.connection_farmers.get(websocket, ())):
+            self.unsubscribe_farmer(websocket, farmer_address)
         logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
     
+    async def subscribe_farmer(self, websocket: WebSocket, farmer_address: str):
+        """Route a farmer's alerts to this connection, tracking their harvest deadline on first subscribe"""
+        first = farmer_address not in self.farmer_subscriptions
+        self.farmer_subscriptions.setdefault(farmer_address, set()).add(websocket)
+        self.connection_farmers.setdefault(websocket, set()).add(farmer_address)
+        if first:
+            await self.harvest_scheduler.track(farmer_address)
+    
+    def unsubscribe_farmer(self, websocket: WebSocket, farmer_address: str):
+        """Stop routing a farmer's alerts to this connection"""
+        farmers = self.connection_farmers.get(websocket)
+        if farmers is not None:
+            farmers.discard(farmer_address)
+            if not farmers:
+                del self.connection_farmers[websocket]
+        subscribers = self.farmer_subscriptions.get(farmer_address)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self.farmer_subscriptions[farmer_address]
+                self.harvest_scheduler.untrack(farmer_address)
+    
+    async def send_to_farmer(self, farmer_address: str, message: WebSocketMessage):
+        """Send a message to the connections subscribed to one farmer"""
+        subscribers = self.farmer_subscriptions.get(farmer_address)
+        if not subscribers:
+            return
+        
+        text = message.json()
+        disconnected = []
+        with WEBSOCKET_BROADCAST_SECONDS.labels(message.type).time():
+            for connection in list(subscribers):
+                try:
+                    await connection.send_text(text)
+                except Exception as e:
+                    logger.warning(f"Error sending to farmer subscriber: {e}")
+                    disconnected.append(connection)
+        
+        for connection in disconnected:
+            self.disconnect(connection)
+    
     async def broadcast_price_update(self, price_data: dict):
         """Broadcast price update to all connected clients"""
         if not self.active_connections:
@@ -56,12 +105,13 @@ class ConnectionManager:
         )
         
         disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message.json())
-            except Exception as e:
-                logger.warning(f"Error broadcasting to connection: {e}")
-                disconnected.append(connection)
+        with WEBSOCKET_BROADCAST_SECONDS.labels("price_update").time():
+            for connection in self.active_connections:
+                try:
+                    await connection.send_text(message.json())
+                except Exception as e:
+                    logger.warning(f"Error broadcasting to connection: {e}")
+                    disconnected.append(connection)
         
         # Clean up disconnected connections
         for connection in disconnected:
@@ -78,12 +128,13 @@ class ConnectionManager:
         )
         
         disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message.json())
-            except Exception as e:
-                logger.warning(f"Error broadcasting alert to connection: {e}")
-                disconnected.append(connection)
+        with WEBSOCKET_BROADCAST_SECONDS.labels("price_alert").time():
+            for connection in self.active_connections:
+                try:
+                    await connection.send_text(message.json())
+                except Exception as e:
+                    logger.warning(f"Error broadcasting alert to connection: {e}")
+                    disconnected.append(connection)
         
         # Clean up disconnected connections
         for connection in disconnected:
@@ -91,6 +142,7 @@ class ConnectionManager:
 
 # Global connection manager instance
 manager = ConnectionManager()
+WEBSOCKET_CONNECTIONS.set_function(lambda: len(manager.active_connections))
 
 @router.websocket("/price-stream")
 async def websocket_price_stream(websocket: WebSocket):
@@ -178,16 +230,31 @@ async def handle_client_message(websocket: WebSocket, message: dict):
     elif message_type == "subscribe_farming_alerts":
         # Subscribe to farming-specific alerts
         farmer_address = message.get("data", {}).get("farmer_address")
+        harvest_deadline = None
+        if farmer_address:
+            await manager.subscribe_farmer(websocket, farmer_address)
+            harvest_deadline = manager.harvest_scheduler.deadlines.get(farmer_address)
         response_message = WebSocketMessage(
             type="subscription_confirmed",
             data={
                 "subscription_type": "farming_alerts",
                 "farmer_address": farmer_address,
-                "alerts": ["harvest_reminder", "optimal_conditions", "network_congestion"]
+                "alerts": ["harvest_reminder", "optimal_conditions", "network_congestion"],
+                "harvest_deadline": harvest_deadline.isoformat() if harvest_deadline else None
             }
         )
         await websocket.send_text(response_message.json())
     
+    elif message_type == "unsubscribe_farming_alerts":
+        farmer_address = message.get("data", {}).get("farmer_address")
+        if farmer_address:
+            manager.unsubscribe_farmer(websocket, farmer_address)
+        response_message = WebSocketMessage(
+            type="unsubscription_confirmed",
+            data={"subscription_type": "farming_alerts", "farmer_address": farmer_address}
+        )
+        await websocket.send_text(response_message.json())
+    
     else:
         logger.warning(f"Unknown message type received: {message_type}")
 
@@ -212,12 +279,13 @@ async def notify_farming_opportunity(opportunity_data: dict):
     )
     
     disconnected = []
-    for connection in manager.active_connections:
-        try:
-            await connection.send_text(message.json())
-        except Exception as e:
-            logger.warning(f"Error broadcasting farming opportunity: {e}")
-            disconnected.append(connection)
+    with WEBSOCKET_BROADCAST_SECONDS.labels("farming_opportunity_update").time():
+        for connection in manager.active_connections:
+            try:
+                await connection.send_text(message.json())
+            except Exception as e:
+                logger.warning(f"Error broadcasting farming opportunity: {e}")
+                disconnected.append(connection)
     
     # Clean up disconnected connections
     for connection in disconnected:
@@ -234,25 +302,35 @@ async def notify_farming_alert(alert_data: dict):
     )
     
     disconnected = []
-    for connection in manager.active_connections:
-        try:
-            await connection.send_text(message.json())
-        except Exception as e:
-            logger.warning(f"Error broadcasting farming alert: {e}")
-            disconnected.append(connection)
+    with WEBSOCKET_BROADCAST_SECONDS.labels("farming_alert").time():
+        for connection in manager.active_connections:
+            try:
+                await connection.send_text(message.json())
+            except Exception as e:
+                logger.warning(f"Error broadcasting farming alert: {e}")
+                disconnected.append(connection)
     
     # Clean up disconnected connections
     for connection in disconnected:
         manager.disconnect(connection)
 
-async def notify_harvest_reminder(farmer_address: str, time_remaining: int):
+async def notify_harvest_reminder(farmer_address: str, time_remaining: float, deadline: Optional[datetime] = None):
     """Notify specific farmer about harvest deadline"""
     alert_data = {
         "farmer_address": farmer_address,
         "alert_type": "harvest_reminder",
-        "message": f"Harvest deadline in {time_remaining} hours! Don't lose your rewards.",
-        "time_remaining_hours": time_remaining,
+        "message": f"Harvest deadline in {time_remaining:.1f} hours! Don't lose your rewards.",
+        "time_remaining_hours": round(time_remaining, 2),
+        "deadline": deadline.isoformat() if deadline else None,
         "severity": "high" if time_remaining < 2 else "medium"
     }
     
-    await notify_farming_alert(alert_data)
\ No newline at end of file
+    # Only the farmer's own subscribers get their reminder
+    await manager.send_to_farmer(farmer_address, WebSocketMessage(type="farming_alert", data=alert_data))
+
+async def notify_harvest_reminders(reminders: List[dict]):
+    """Harvest scheduler listener: deliver each due reminder to its farmer"""
+    for reminder in reminders:
+        await notify_harvest_reminder(
+            reminder["farmer_address"], reminder["time_remaining_hours"], reminder["deadline"]
+        )
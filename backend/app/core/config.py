@@ -15,19 +15,119 @@ class Settings(BaseSettings):
     
     # Database settings
     DATABASE_URL: str = "sqlite+aiosqlite:///./kale_tracker.db"
+    DB_POOL_SIZE: int = 10  # server databases only
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # safe with WAL; FULL fsyncs every commit
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MB
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    
+    # Price storage (ticks are buffered and bulk-inserted)
+    PRICE_STORE_BATCH_SIZE: int = 500  # ticks per bulk insert
+    PRICE_STORE_FLUSH_INTERVAL: float = 2.0  # seconds between flushes
     
     # Stellar network settings
     STELLAR_HORIZON_URL: str = "https://horizon-testnet.stellar.org"
     KALE_ASSET_CODE: str = "KALE"
     KALE_ASSET_ISSUER: str = "GCHPTWXMT3HYF4RLZHWBNRF4MPXLTJ76ISHMSYIWCCDXWUYOQG5MR2AB"
     
+    # Soroban settings
+    SOROBAN_RPC_URL: str = "https://soroban-testnet.stellar.org"
+    KALE_ANALYTICS_CONTRACT_ID: str = "CCFARMINGANALYTICSCONTRACTADDRESSHERE123456789ABCDEF"  # Mock address
+    SOROBAN_RPC_TIMEOUT: float = 10.0  # seconds
+    SOROBAN_MAX_CONCURRENT_READS: int = 32  # contract reads in flight per batch
+    SOROBAN_LEDGER_ENTRIES_CHUNK: int = 200  # keys per getLedgerEntries request (RPC maximum)
+    SOROBAN_CACHE_MAX_ENTRIES: int = 50000  # contract reads cached per ledger
+    SOROBAN_LEDGER_POLL_INTERVAL: float = 1.0  # seconds between latest-ledger checks
+    SOROBAN_LEDGER_CLOSE_SECONDS: float = 5.0  # pseudo-ledger length when RPC is unavailable
+    FARMER_BATCH_MAX_ADDRESSES: int = 5000
+    
+    # Write-behind recording of farming sessions
+    SESSION_BATCH_SIZE: int = 50  # sessions per batch
+    SESSION_BATCH_LINGER: float = 0.5  # seconds to wait for a batch to fill
+    SESSION_MAX_RETRIES: int = 5
+    SESSION_RETRY_BACKOFF: float = 0.5  # seconds, doubled per attempt
+    SESSION_CHANNEL_ACCOUNTS: str = ""  # comma-separated source accounts; one lane when empty
+    SESSION_SPOOL_FILE: str = "farming_sessions.spool"
+    SESSION_SPOOL_FSYNC: bool = True
+    SESSION_SPOOL_COMPACT_RECORDS: int = 10000  # spool lines before it is compacted
+    
+    # Contract event indexer (runs only when a real contract ID is configured)
+    EVENT_INDEXER_ENABLED: bool = True
+    EVENT_INDEXER_POLL_INTERVAL: float = 5.0  # seconds
+    EVENT_INDEXER_PAGE_SIZE: int = 1000  # events per getEvents call
+    EVENT_INDEXER_START_LEDGERS: int = 17280  # ledgers to backfill on first run (~1 day)
+    
     # Price monitoring settings
     PRICE_UPDATE_INTERVAL: int = 10  # seconds
-    MAX_PRICE_HISTORY: int = 10000  # maximum records to keep
+    MAX_PRICE_HISTORY: int = 10000  # price points the tracker keeps in memory
+    TICK_BLOCK_SIZE: int = 1024  # ticks per compressed in-memory block
+    TICK_BLOCK_CACHE: int = 64  # decoded blocks kept for window scans
+    
+    # Retention (raw ticks are rolled up into candles, then deleted in time-range chunks)
+    RETENTION_ENABLED: bool = True
+    RETENTION_INTERVAL: float = 3600.0  # seconds between retention runs
+    RAW_PRICE_RETENTION_DAYS: int = 30
+    CANDLE_RETENTION_DAYS: int = 730
+    CANDLE_INTERVAL_SECONDS: int = 3600  # candle width, also the delete chunk size
+    RETENTION_MAX_CHUNKS_PER_RUN: int = 500
+    
+    # Cold tier: expired ticks archived as date-partitioned Parquet (needs pyarrow)
+    PRICE_ARCHIVE_ENABLED: bool = True
+    PRICE_ARCHIVE_DIR: str = "price_archive"
+    PRICE_ARCHIVE_COMPRESSION: str = "zstd"
+    
+    # Price alerts
+    ALERT_UPDATE_CHUNK: int = 500  # alert ids per bulk triggered_at update
+    WEBHOOK_TIMEOUT: float = 5.0  # seconds per delivery attempt
+    WEBHOOK_MAX_ATTEMPTS: int = 8
+    WEBHOOK_RETRY_BACKOFF: float = 1.0  # seconds, doubled per attempt with jitter
+    WEBHOOK_MAX_BACKOFF: float = 300.0
+    WEBHOOK_PER_HOST_CONCURRENCY: int = 4
+    WEBHOOK_MAX_CONNECTIONS: int = 100
+    WEBHOOK_BATCH_SIZE: int = 200  # due deliveries picked up per dispatch
+    WEBHOOK_POLL_INTERVAL: float = 1.0  # seconds between outbox polls when idle
+    
+    # Harvest reminders for farmers subscribed over the WebSocket
+    HARVEST_REMINDER_LEAD_HOURS: List[float] = [6.0, 2.0, 1.0]  # hours before the deadline
+    
+    # Replay settings (drive the pipeline from a recorded tick file instead of live sources)
+    REPLAY_FILE: str = ""
+    REPLAY_SPEEDUP: float = 1.0  # 1x - 1000x
+    REPLAY_LOOP: bool = False
+    
+    # Fallback price file (CSV with a price column, or NDJSON for .ndjson/.jsonl)
+    PRICE_FILE: str = "test_prices.csv"
+    PRICE_FILE_FOLLOW: bool = False  # pick up appended rows in the background
+    PRICE_FILE_POLL_INTERVAL: float = 1.0  # seconds between follow polls
+    
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED: bool = True
+    
+    # Admin endpoints and on-demand profiling (disabled while ADMIN_TOKEN is empty)
+    ADMIN_TOKEN: str = ""
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILE_MAX_SECONDS: float = 60.0
+    
+    # Tracing: "file" appends spans as JSON lines to TRACING_FILE, "otlp" sends them to a collector
+    TRACING_EXPORTER: str = ""
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SAMPLE_RATIO: float = 1.0
+    
+    # Event loop lag monitor
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.1  # seconds between lag probes
+    LOOP_LAG_THRESHOLD: float = 0.25  # seconds of stall before the blocking stack is captured
+    LOOP_BLOCK_REPORTS: int = 20  # recent stalls kept for /api/v1/health/loop
     
     # Logging settings
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "kale_tracker.log"
+    LOG_JSON: bool = False  # one JSON object per line instead of text
+    LOG_MAX_BYTES: int = 10_000_000  # rotate the log file at this size
+    LOG_BACKUP_COUNT: int = 5  # rotated files kept
     
     # GCP settings
     GCP_PROJECT_ID: str = ""
@@ -1,31 +1,73 @@
+import atexit
+import json
 import logging
+import queue
 import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Optional
 from app.core.config import settings
 
-def setup_logging():
-    """Configure application logging"""
-    
-    # Create logs directory if it doesn't exist
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-    
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def setup_logging(log_file: Optional[str] = None):
+    """
+    Configure application logging (only the first call takes effect)
+
+    The root logger gets a single QueueHandler, so logging from the event
+    loop is an in-memory put. A QueueListener thread writes the records to
+    stdout and a size-rotated file, as text or as JSON lines (LOG_JSON).
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    # Create the log directory if it doesn't exist
+    log_path = Path(log_file) if log_file else Path("logs") / settings.LOG_FILE
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+
+    formatter = JsonFormatter() if settings.LOG_JSON else logging.Formatter(TEXT_FORMAT)
+    handlers = [
+        # Console handler
+        logging.StreamHandler(sys.stdout),
+        # File handler, rotated by size
+        RotatingFileHandler(log_path, maxBytes=settings.LOG_MAX_BYTES, backupCount=settings.LOG_BACKUP_COUNT)
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # Drain what is still queued on exit
+
     # Configure root logger
-    logging.basicConfig(
-        level=getattr(logging, settings.LOG_LEVEL.upper()),
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            # Console handler
-            logging.StreamHandler(sys.stdout),
-            # File handler
-            logging.FileHandler(log_dir / settings.LOG_FILE)
-        ]
-    )
-    
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+    root.addHandler(QueueHandler(log_queue))
+
     # Configure specific loggers
     logging.getLogger("uvicorn").setLevel(logging.INFO)
     logging.getLogger("fastapi").setLevel(logging.INFO)
-    
+
     # Suppress noisy third-party loggers
     logging.getLogger("httpx").setLevel(logging.WARNING)
-    logging.getLogger("httpcore").setLevel(logging.WARNING)
\ No newline at end of file
+    logging.getLogger("httpcore").setLevel(logging.WARNING)
@@ -0,0 +1,104 @@
+import time
+from typing import Callable
+
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+# Buckets in seconds; fetches go to the network, the rest should stay well under one
+FETCH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+DRIFT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PRICE_FETCH_SECONDS = Histogram(
+    "kale_price_fetch_seconds", "Latency of one price source fetch",
+    ["source", "outcome"], buckets=FETCH_BUCKETS
+)
+MONITOR_TICK_SECONDS = Histogram(
+    "kale_monitor_tick_seconds", "Time to fetch, record and publish one monitor-loop tick",
+    buckets=FETCH_BUCKETS
+)
+MONITOR_TICK_DRIFT_SECONDS = Histogram(
+    "kale_monitor_tick_drift_seconds", "How late a monitor-loop tick started relative to PRICE_UPDATE_INTERVAL",
+    buckets=DRIFT_BUCKETS
+)
+MONITOR_TICKS = Counter(
+    "kale_monitor_ticks_total", "Monitor-loop ticks by outcome", ["outcome"]
+)
+DB_COMMIT_SECONDS = Histogram(
+    "kale_db_commit_seconds", "Session commit latency, including the flush", buckets=FAST_BUCKETS
+)
+WEBSOCKET_CONNECTIONS = Gauge(
+    "kale_websocket_connections", "Open WebSocket connections"
+)
+WEBSOCKET_BROADCAST_SECONDS = Histogram(
+    "kale_websocket_broadcast_seconds", "Time to send one message to every recipient",
+    ["message_type"], buckets=FAST_BUCKETS
+)
+QUEUE_DEPTH = Gauge(
+    "kale_queue_depth", "Items waiting in an internal queue", ["queue"]
+)
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "kale_event_loop_lag_seconds", "How late the event loop ran a timer it was asked to run",
+    buckets=FAST_BUCKETS
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "kale_event_loop_blocks_total", "Stalls longer than LOOP_LAG_THRESHOLD caught by the watchdog"
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "kale_http_request_seconds", "HTTP request latency per route",
+    ["method", "route", "status"], buckets=FAST_BUCKETS
+)
+
+def observe_fetch(source: str, started: float, succeeded: bool):
+    """Record one price source fetch that began at perf_counter() `started`"""
+    PRICE_FETCH_SECONDS.labels(source, "success" if succeeded else "failure").observe(time.perf_counter() - started)
+
+def track_queue(name: str, depth: Callable[[], float]):
+    """Export a queue's depth, read at scrape time"""
+    QUEUE_DEPTH.labels(name).set_function(depth)
+
+def render_metrics() -> bytes:
+    """Current metrics in the Prometheus text format"""
+    return generate_latest()
+
+def route_template(scope) -> str:
+    """The path template of the route that matched the request"""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Routes reached through include_router only know their own path; FastAPI
+    # keeps the prefixed template on the route context it matched
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    return getattr(context, "path_format", None) or route.path
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request
+
+    Requests are labelled with the matched route template (e.g.
+    /api/v1/farming/farmer/{address}) rather than the raw path, so the
+    series count stays bounded; unmatched paths share one "unmatched" label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], route_template(scope), f"{status // 100}xx"
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,187 @@
+import asyncio
+import asyncio.events
+import hmac
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Optional, List, Tuple
+
+from app.core.config import settings
+
+Stack = Tuple[str, ...]
+
+def verify_admin_token(token: Optional[str]) -> bool:
+    """Whether `token` is the configured admin token (always False when none is set)"""
+    if not settings.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode())
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    # Semicolons separate frames in the collapsed format
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}".replace(";", ",")
+
+def thread_stack(frame) -> Stack:
+    """Frame names from the outermost call down to `frame`"""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return tuple(reversed(names))
+
+def running_task_stack(frame) -> Stack:
+    """Stack of the callback the loop thread is running, without the loop's own frames"""
+    frames = []
+    while frame is not None:
+        if frame.f_code.co_filename == asyncio.events.__file__ and frame.f_code.co_name == "_run":
+            break
+        frames.append(frame)
+        frame = frame.f_back
+    return tuple(_frame_name(f) for f in reversed(frames))
+
+def suspended_task_stack(task: asyncio.Task) -> Stack:
+    """Await chain of a suspended task, from its coroutine down to what it waits on"""
+    names = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is not None:
+            names.append(_frame_name(frame))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    names.append("[awaiting]")
+    return tuple(names)
+
+def collapse(stacks: Counter) -> str:
+    """Collapsed-stack text ("frame;frame;frame count" per line) for flamegraph.pl or speedscope"""
+    return "\n".join(f"{';'.join(stack)} {count}" for stack, count in stacks.most_common()) + "\n"
+
+class StackSampler(ABC):
+    """Samples stacks from a background thread every `interval` seconds"""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or settings.PROFILE_SAMPLE_INTERVAL_MS / 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """Stop sampling and return the stack counts"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+                self.samples += 1
+            except Exception:
+                pass  # A frame changed under us; skip this sample
+
+    @abstractmethod
+    def sample(self):
+        """Add one sample of the stacks of interest to self.stacks"""
+
+class ProcessSampler(StackSampler):
+    """Samples every thread in the process, each stack rooted at its thread name"""
+
+    def sample(self):
+        me = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident != me:
+                self.stacks[(f"thread:{names.get(ident, ident)}",) + thread_stack(frame)] += 1
+
+class TaskSampler(StackSampler):
+    """
+    Samples one asyncio task in wall-clock time
+
+    While the task is running on the loop its live stack is recorded; while
+    it is suspended its await chain is, ending in an [awaiting] frame, so
+    time spent waiting on I/O shows up next to time spent computing.
+    """
+
+    def __init__(self, task: asyncio.Task, interval: Optional[float] = None):
+        super().__init__(interval)
+        self.task = task
+        self.loop = task.get_loop()
+        self.loop_thread_id = threading.get_ident()
+
+    def sample(self):
+        if self.task.done():
+            return
+        if asyncio.current_task(self.loop) is self.task:
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is not None:
+                self.stacks[running_task_stack(frame)] += 1
+        else:
+            self.stacks[suspended_task_stack(self.task)] += 1
+
+class ProfilingMiddleware:
+    """
+    Profiles single requests on demand
+
+    A request carrying an X-Profile header and the admin token in
+    X-Admin-Token runs normally under a TaskSampler, but the response is
+    replaced by the collapsed stacks of that request (the original status
+    is returned in X-Profiled-Status). Requests without X-Profile pass
+    straight through; nothing is sampled unless ADMIN_TOKEN is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMIN_TOKEN:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if b"x-profile" not in headers:
+            await self.app(scope, receive, send)
+            return
+        if not verify_admin_token(headers.get(b"x-admin-token", b"").decode("latin-1")):
+            await self._respond(send, 403, b"Invalid admin token\n", [])
+            return
+
+        status = 500
+
+        async def capture(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        sampler = TaskSampler(asyncio.current_task())
+        sampler.start()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            stacks = sampler.stop()
+
+        await self._respond(send, 200, collapse(stacks).encode(), [
+            (b"x-profiled-status", str(status).encode()),
+            (b"x-profile-samples", str(sampler.samples).encode()),
+            (b"x-profile-seconds", f"{sampler.duration:.4f}".encode())
+        ])
+
+    @staticmethod
+    async def _respond(send, status: int, body: bytes, headers: List[Tuple[bytes, bytes]]):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8"),
+                        (b"content-length", str(len(body)).encode()), *headers]
+        })
+        await send({"type": "http.response.body", "body": body})
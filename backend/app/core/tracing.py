@@ -0,0 +1,99 @@
+import logging
+
+from opentelemetry import trace
+
+from app.core.config import settings
+from app.core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# Spans are no-ops until setup_tracing() installs an SDK provider
+tracer = trace.get_tracer("kale.price_pipeline")
+
+_provider = None
+
+def setup_tracing():
+    """Install a tracer provider exporting to TRACING_EXPORTER ("file" or "otlp"; empty disables)"""
+    global _provider
+    exporter_name = settings.TRACING_EXPORTER.lower()
+    if not exporter_name or _provider is not None:
+        return
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning("opentelemetry-sdk not found. Tracing is disabled.")
+        return
+
+    if exporter_name == "file":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        exporter = ConsoleSpanExporter(
+            out=open(settings.TRACING_FILE, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+    elif exporter_name == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("opentelemetry-exporter-otlp-proto-http not found. Tracing is disabled.")
+            return
+        exporter = OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    else:
+        logger.warning(f"Unknown TRACING_EXPORTER {settings.TRACING_EXPORTER!r}. Tracing is disabled.")
+        return
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.PROJECT_NAME, "service.version": settings.VERSION}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO))
+    )
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    logger.info(f"Tracing enabled with the {exporter_name} exporter")
+
+def shutdown_tracing():
+    """Flush and close the exporter"""
+    if _provider is not None:
+        _provider.shutdown()
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a server span per HTTP request
+
+    Spans started while handling the request (database work, price store
+    reads, ...) become its children. The span is named after the matched
+    route template once routing has happened.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        with tracer.start_as_current_span(method, kind=trace.SpanKind.SERVER) as span:
+            if not span.is_recording():
+                await self.app(scope, receive, send)
+                return
+
+            span.set_attribute("http.request.method", method)
+            span.set_attribute("url.path", scope["path"])
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(trace.StatusCode.ERROR)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = route_template(scope)
+                span.set_attribute("http.route", route)
+                span.update_name(f"{method} {route}")
@@ -1,7 +1,11 @@
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session
 from app.core.config import settings
+from app.core.metrics import DB_COMMIT_SECONDS
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -9,13 +13,51 @@ class Base(DeclarativeBase):
     """Base class for all database models"""
     pass
 
+def _engine_options(database_url: str) -> dict:
+    """Connection pool options for the configured database backend"""
+    if make_url(database_url).get_backend_name() == "sqlite":
+        # Wait for the writer's lock instead of failing with "database is locked"
+        return {"connect_args": {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    
+    # Server databases (e.g. postgresql+asyncpg://)
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+        "pool_recycle": settings.DB_POOL_RECYCLE
+    }
+
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.LOG_LEVEL == "DEBUG",
-    future=True
+    future=True,
+    **_engine_options(settings.DATABASE_URL)
 )
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Tune every SQLite connection for one writer alongside concurrent readers"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+@event.listens_for(Session, "before_commit")
+def _commit_started(session):
+    session.info["commit_started"] = time.perf_counter()
+
+@event.listens_for(Session, "after_commit")
+def _commit_finished(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        DB_COMMIT_SECONDS.observe(time.perf_counter() - started)
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -31,15 +73,57 @@ async def get_db() -> AsyncSession:
         finally:
             await session.close()
 
+# Indexes from earlier schemas that no query uses
+_DROPPED_INDEXES = {
+    "price_records": [
+        "ix_price_records_id", "ix_price_records_price",
+        "ix_price_records_timestamp", "ix_price_records_source"
+    ]
+}
+
+def _migrate_indexes(connection) -> None:
+    """Drop retired indexes and create indexes added to existing tables"""
+    inspector = inspect(connection)
+    for table_name, index_names in _DROPPED_INDEXES.items():
+        if not inspector.has_table(table_name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table_name)}
+        for index_name in index_names:
+            if index_name in existing:
+                connection.execute(text(f"DROP INDEX {index_name}"))
+                logger.info(f"Dropped unused index {index_name}")
+    
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+def _migrate_columns(connection) -> None:
+    """Add nullable columns introduced after a table was first created"""
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                logger.info(f"Added column {table.name}.{column.name}")
+
 async def init_db() -> None:
     """Initialize database tables"""
     try:
         async with engine.begin() as conn:
             # Import models to register them with Base
-            from app.db.models import PriceRecord, PriceAlert, TechnicalIndicator
+            from app.db.models import (
+                PriceRecord, PriceCandle, PriceAlert, WebhookDelivery, TechnicalIndicator,
+                FarmerAggregate, IndexerCursor
+            )
             
             # Create all tables
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_migrate_columns)
+            await conn.run_sync(_migrate_indexes)
             
         logger.info("Database tables created successfully")
     except Exception as e:
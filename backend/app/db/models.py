@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, Float, String, DateTime, Boolean, Text, Index
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -6,22 +6,45 @@ class PriceRecord(Base):
     """SQLAlchemy model for price records"""
     __tablename__ = "price_records"
     
-    id = Column(Integer, primary_key=True, index=True)
-    price = Column(Float, nullable=False, index=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
-    source = Column(String(20), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    price = Column(Float, nullable=False)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    source = Column(String(20), nullable=False)
     volume = Column(Float, nullable=True)
     
+    # Only indexes the reads use: newest-first history and per-source history
+    __table_args__ = (
+        Index("ix_price_records_timestamp_id", timestamp.desc(), id),
+        Index("ix_price_records_source_timestamp", source, timestamp.desc(), id),
+    )
+    
     def __repr__(self):
         return f"<PriceRecord(price={self.price}, timestamp={self.timestamp}, source={self.source})>"
 
+class PriceCandle(Base):
+    """SQLAlchemy model for OHLC candles rolled up from expired price records"""
+    __tablename__ = "price_candles"
+    
+    interval_seconds = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(Float, nullable=True)
+    tick_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<PriceCandle(start={self.bucket_start}, interval={self.interval_seconds}, close={self.close})>"
+
 class PriceAlert(Base):
     """SQLAlchemy model for price alerts"""
     __tablename__ = "price_alerts"
     
     id = Column(Integer, primary_key=True, index=True)
     alert_type = Column(String(20), nullable=False)  # 'above', 'below', 'change'
-    threshold = Column(Float, nullable=False)
+    threshold = Column(Float, nullable=False)  # price, or percent for 'change'
+    reference_price = Column(Float, nullable=True)  # price a 'change' alert is measured from
     is_active = Column(Boolean, default=True, index=True)
     webhook_url = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -30,6 +53,26 @@ class PriceAlert(Base):
     def __repr__(self):
         return f"<PriceAlert(type={self.alert_type}, threshold={self.threshold}, active={self.is_active})>"
 
+class WebhookDelivery(Base):
+    """SQLAlchemy model for the webhook outbox (one row per URL per tick of fired alerts)"""
+    __tablename__ = "webhook_outbox"
+    
+    id = Column(Integer, primary_key=True)
+    url = Column(Text, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON body
+    status = Column(String(10), nullable=False, default="pending")  # 'pending', 'failed'
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_webhook_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+    
+    def __repr__(self):
+        return f"<WebhookDelivery(url={self.url}, status={self.status}, attempts={self.attempts})>"
+
 class TechnicalIndicator(Base):
     """SQLAlchemy model for technical indicators"""
     __tablename__ = "technical_indicators"
@@ -43,4 +86,31 @@ class TechnicalIndicator(Base):
     volatility = Column(Float, nullable=True)
     
     def __repr__(self):
-        return f"<TechnicalIndicator(timestamp={self.timestamp}, rsi={self.rsi})>"
\ No newline at end of file
+        return f"<TechnicalIndicator(timestamp={self.timestamp}, rsi={self.rsi})>"
+
+class FarmerAggregate(Base):
+    """SQLAlchemy model for per-farmer totals built from contract session events"""
+    __tablename__ = "farmer_aggregates"
+    
+    address = Column(String(56), primary_key=True)
+    total_rewards = Column(BigInteger, nullable=False, default=0)  # stroops
+    farms_completed = Column(Integer, nullable=False, default=0)
+    successful_farms = Column(Integer, nullable=False, default=0)
+    last_plant_time = Column(DateTime(timezone=True), nullable=True)
+    last_harvest_time = Column(DateTime(timezone=True), nullable=True)
+    last_event_id = Column(String(40), nullable=True)
+    
+    def __repr__(self):
+        return f"<FarmerAggregate(address={self.address}, total_rewards={self.total_rewards}, farms={self.farms_completed})>"
+
+class IndexerCursor(Base):
+    """SQLAlchemy model for the last contract event each indexer has applied"""
+    __tablename__ = "indexer_cursors"
+    
+    name = Column(String(50), primary_key=True)
+    cursor = Column(String(40), nullable=True)
+    ledger = Column(Integer, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<IndexerCursor(name={self.name}, cursor={self.cursor}, ledger={self.ledger})>"
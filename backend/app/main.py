@@ -1,16 +1,30 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.core.metrics import MetricsMiddleware, CONTENT_TYPE_LATEST, render_metrics, track_queue
+from app.core.profiling import ProfilingMiddleware
+from app.core.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
 from app.api.v1.api import api_router
-from app.services.tracker_service import TrackerService
+from app.api.v1.endpoints.websocket import notify_price_update, notify_price_alert, notify_harvest_reminders
+from app.services.tracker_service import get_tracker_service
+from app.services.event_indexer import get_event_indexer
+from app.services.session_writer import get_session_queue
+from app.services.price_store import get_price_store
+from app.services.retention import get_retention_service
+from app.services.alert_engine import get_alert_engine
+from app.services.webhook_outbox import get_webhook_outbox
+from app.services.harvest_scheduler import get_harvest_scheduler
+from app.services.loop_monitor import get_loop_monitor
+from app.db.database import init_db
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
+setup_tracing()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -18,8 +32,45 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting KALE Price Tracker API...")
     
-    # Create the tracker service instance
-    tracker_service = TrackerService()
+    # Watch the event loop for stalls before anything else can cause one
+    loop_monitor = get_loop_monitor()
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.start()
+    
+    # Price ticks are batched into the database by the shared price store
+    await init_db()
+    price_store = get_price_store()
+    await price_store.start()
+    
+    # Roll up and expire old price data on its own schedule
+    retention_service = get_retention_service()
+    if settings.RETENTION_ENABLED:
+        await retention_service.start()
+    
+    # Use the tracker service shared with the API endpoints
+    tracker_service = get_tracker_service()
+    
+    # Stream every new price to WebSocket clients
+    async def broadcast_price(price_data):
+        await notify_price_update(price_data.dict())
+    
+    tracker_service.add_price_listener(broadcast_price)
+    
+    # Evaluate price alerts on every tick and announce the ones that fire
+    alert_engine = get_alert_engine()
+    await alert_engine.load()
+    
+    async def broadcast_alerts(fired_alerts):
+        for alert in fired_alerts:
+            await notify_price_alert(alert)
+    
+    alert_engine.add_listener(broadcast_alerts)
+    
+    # Deliver alert webhooks through the durable outbox
+    webhook_outbox = get_webhook_outbox()
+    alert_engine.add_listener(webhook_outbox.enqueue_alerts)
+    await webhook_outbox.start()
+    tracker_service.add_price_listener(alert_engine.on_price)
     
     # Start background price monitoring using the real tracker
     await tracker_service.start_background_monitoring()
@@ -28,11 +79,45 @@ async def lifespan(app: FastAPI):
     # Store tracker service in app state for access in endpoints
     app.state.tracker_service = tracker_service
     
+    # Remind subscribed farmers ahead of their harvest deadlines
+    harvest_scheduler = get_harvest_scheduler()
+    harvest_scheduler.add_listener(notify_harvest_reminders)
+    await harvest_scheduler.start()
+    
+    # Follow contract session events into the local leaderboard index
+    event_indexer = get_event_indexer()
+    event_indexer.add_plant_listener(harvest_scheduler.on_planted)
+    if settings.EVENT_INDEXER_ENABLED and event_indexer.contract_client.is_live:
+        try:
+            await event_indexer.start()
+        except Exception as e:
+            logger.error(f"Contract event indexer not started: {e}")
+    
+    # Record farming sessions through the write-behind queue
+    session_queue = get_session_queue()
+    await session_queue.start()
+    
+    # Queue depths are read when /metrics is scraped
+    track_queue("price_store_buffer", lambda: price_store.pending)
+    track_queue("session_writer", lambda: session_queue.queue.qsize() + session_queue.in_flight)
+    track_queue("webhook_in_flight", lambda: webhook_outbox.in_flight_count)
+    track_queue("harvest_reminders", lambda: len(harvest_scheduler.tokens))
+    
     yield
     
     # Shutdown
     logger.info("Shutting down KALE Price Tracker API...")
+    await session_queue.stop()
+    await session_queue.contract_client.close()
+    await event_indexer.stop()
+    await event_indexer.contract_client.close()
+    await harvest_scheduler.stop()
     await tracker_service.stop_background_monitoring()
+    await webhook_outbox.stop()
+    await price_store.stop()
+    await retention_service.stop()
+    await loop_monitor.stop()
+    shutdown_tracing()
     logger.info("KALE Price Tracker service stopped")
 
 app = FastAPI(
@@ -52,6 +137,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request latency for /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# One trace per request, parenting the spans of the work it does
+if settings.TRACING_EXPORTER:
+    app.add_middleware(TracingMiddleware)
+
+# Profile a single request on demand (X-Profile plus X-Admin-Token headers)
+if settings.ADMIN_TOKEN:
+    app.add_middleware(ProfilingMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -65,6 +162,13 @@ async def root():
         "health": "/health"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for deployment monitoring"""
@@ -143,6 +143,17 @@ class FarmingROIAnalysis(BaseModel):
     breakeven_price: float = Field(..., description="KALE price needed to break even", gt=0)
     risk_adjusted_roi: float = Field(..., description="Risk-adjusted ROI percentage")
 
+class FarmerBatchRequest(BaseModel):
+    """Request body for looking up many farmers at once"""
+    addresses: List[str] = Field(..., description="Stellar addresses of the farmers (at most FARMER_BATCH_MAX_ADDRESSES)", min_length=1)
+
+class FarmingSessionRecord(BaseModel):
+    """A farming session to record on-chain"""
+    farmer_address: str = Field(..., description="Stellar address of the farmer", min_length=10)
+    stake_amount: float = Field(..., description="Amount of KALE staked", ge=0)
+    success: bool = Field(..., description="Whether the harvest succeeded")
+    reward: float = Field(0, description="KALE reward earned", ge=0)
+
 class FarmingLeaderboard(BaseModel):
     """Leaderboard data for top farmers"""
     farmers: List[FarmerData] = Field(..., description="List of top farmers")
@@ -14,6 +14,7 @@ class PriceData(BaseModel):
     price: float = Field(..., description="KALE token price in USD", gt=0)
     timestamp: datetime = Field(..., description="When the price was recorded")
     source: str = Field(..., description="Source of the price data")  # Keep as string for compatibility
+    volume: Optional[float] = Field(None, description="Trade volume behind the price, if known")
     
     class Config:
         from_attributes = True
@@ -29,15 +30,39 @@ class PriceStatistics(BaseModel):
     total_data_points: int = Field(..., description="Total number of price records")
     last_updated: datetime = Field(..., description="When statistics were last calculated")
 
+class PriceCandle(BaseModel):
+    """OHLC candle rolled up from expired price records"""
+    bucket_start: datetime = Field(..., description="Start of the candle interval")
+    interval_seconds: int = Field(..., description="Candle width in seconds")
+    open: float = Field(..., description="First price in the interval")
+    high: float = Field(..., description="Highest price in the interval")
+    low: float = Field(..., description="Lowest price in the interval")
+    close: float = Field(..., description="Last price in the interval")
+    volume: Optional[float] = Field(None, description="Summed volume, if known")
+    tick_count: int = Field(..., description="Number of price records rolled up")
+    
+    class Config:
+        from_attributes = True
+
 class PriceAlert(BaseModel):
     """Price alert configuration"""
     id: Optional[int] = None
     alert_type: str = Field(..., description="Type of alert (above/below/change)")
-    threshold: float = Field(..., description="Price threshold for the alert")
+    threshold: float = Field(..., description="Price threshold for the alert (percent for change alerts)")
+    reference_price: Optional[float] = Field(None, description="Price a change alert is measured from")
     is_active: bool = Field(True, description="Whether the alert is active")
     webhook_url: Optional[str] = Field(None, description="Webhook URL for notifications")
     created_at: Optional[datetime] = None
     triggered_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class PriceAlertCreate(BaseModel):
+    """Request model for creating a price alert"""
+    alert_type: str = Field(..., description="Type of alert (above/below/change)", pattern="^(above|below|change)$")
+    threshold: float = Field(..., description="Price threshold, or percent move for change alerts", gt=0)
+    webhook_url: Optional[str] = Field(None, description="Webhook URL for notifications")
 
 class TechnicalIndicators(BaseModel):
     """Technical analysis indicators"""
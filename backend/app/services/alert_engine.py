@@ -0,0 +1,276 @@
+import asyncio
+import bisect
+import logging
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Tuple, Set
+from urllib.parse import urlsplit
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import PriceAlert as PriceAlertRecord
+from app.models.price import PriceAlert
+from app.services.tracker_service import get_tracker_service
+
+logger = logging.getLogger(__name__)
+
+ALERT_TYPES = ("above", "below", "change")
+
+class PriceUnavailableError(Exception):
+    """No current price to measure a change alert from"""
+
+class ThresholdIndex:
+    """
+    Alert thresholds kept sorted with bisect
+
+    Parallel lists of thresholds and alert ids, so the alerts a price move
+    crosses are one contiguous slice found with two binary searches.
+    """
+
+    def __init__(self):
+        self.thresholds: List[float] = []
+        self.alert_ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.thresholds)
+
+    def add(self, threshold: float, alert_id: int):
+        index = bisect.bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(index, threshold)
+        self.alert_ids.insert(index, alert_id)
+
+    def remove(self, threshold: float, alert_id: int):
+        lo = bisect.bisect_left(self.thresholds, threshold)
+        hi = bisect.bisect_right(self.thresholds, threshold)
+        for index in range(lo, hi):
+            if self.alert_ids[index] == alert_id:
+                del self.thresholds[index]
+                del self.alert_ids[index]
+                return
+
+    def pop_range(self, lo: int, hi: int) -> List[int]:
+        """Remove and return the alert ids in [lo, hi)"""
+        fired = self.alert_ids[lo:hi]
+        del self.thresholds[lo:hi]
+        del self.alert_ids[lo:hi]
+        return fired
+
+class PriceAlertEngine:
+    """
+    Evaluates active price alerts against every new price
+
+    'above' alerts live in one ThresholdIndex and 'below' alerts in another.
+    A 'change' alert of N% from its reference price is an entry in each, at
+    reference * (1 +/- N/100). A tick fires exactly the alerts whose
+    threshold lies between the previous and the current price:
+    O(log n + fired) per tick. Fired alerts are one-shot; they are
+    deactivated with one bulk update.
+    """
+
+    def __init__(self):
+        self.above = ThresholdIndex()
+        self.below = ThresholdIndex()
+        self.alerts: Dict[int, PriceAlert] = {}
+        self.last_price: Optional[float] = None
+        self.listeners: List[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = []
+        self.is_loaded = False
+        self.stats = {"ticks": 0, "fired": 0}
+        self._notify_tasks: Set[asyncio.Task] = set()
+
+    def add_listener(self, listener: Callable[[List[Dict[str, Any]]], Awaitable[None]]):
+        """Register a coroutine called with the alerts fired by each tick"""
+        self.listeners.append(listener)
+
+    @staticmethod
+    def _thresholds(alert: PriceAlert) -> Tuple[Optional[float], Optional[float]]:
+        """(above, below) price thresholds of an alert"""
+        if alert.alert_type == "above":
+            return alert.threshold, None
+        if alert.alert_type == "below":
+            return None, alert.threshold
+        change = alert.threshold / 100
+        return alert.reference_price * (1 + change), alert.reference_price * (1 - change)
+
+    def _index(self, alert: PriceAlert):
+        above, below = self._thresholds(alert)
+        if above is not None:
+            self.above.add(above, alert.id)
+        if below is not None:
+            self.below.add(below, alert.id)
+        self.alerts[alert.id] = alert
+
+    def _unindex(self, alert_id: int, skip: Optional[ThresholdIndex] = None) -> Optional[PriceAlert]:
+        alert = self.alerts.pop(alert_id, None)
+        if alert is None:
+            return None
+        above, below = self._thresholds(alert)
+        if above is not None and skip is not self.above:
+            self.above.remove(above, alert_id)
+        if below is not None and skip is not self.below:
+            self.below.remove(below, alert_id)
+        return alert
+
+    async def load(self):
+        """Load every active alert into the threshold indexes"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(PriceAlertRecord).where(PriceAlertRecord.is_active.is_(True)))
+            for row in result.scalars():
+                alert = PriceAlert.model_validate(row)
+                if alert.alert_type == "change" and not alert.reference_price:
+                    continue
+                self._index(alert)
+        self.is_loaded = True
+        logger.info(f"Loaded {len(self.alerts)} active price alerts")
+
+    async def create_alert(self,
+                           alert_type: str,
+                           threshold: float,
+                           webhook_url: Optional[str] = None,
+                           reference_price: Optional[float] = None) -> PriceAlert:
+        """Persist a new alert and start evaluating it"""
+        if alert_type not in ALERT_TYPES:
+            raise ValueError(f"Unknown alert type {alert_type!r}")
+        if alert_type == "change" and not reference_price:
+            raise ValueError("A change alert needs a reference price")
+        if webhook_url and urlsplit(webhook_url).scheme not in ("http", "https"):
+            raise ValueError("webhook_url must be an http(s) URL")
+
+        async with AsyncSessionLocal() as session:
+            row = PriceAlertRecord(
+                alert_type=alert_type,
+                threshold=threshold,
+                reference_price=reference_price if alert_type == "change" else None,
+                webhook_url=webhook_url,
+                is_active=True,
+                created_at=datetime.utcnow()
+            )
+            session.add(row)
+            await session.commit()
+            alert = PriceAlert.model_validate(row)
+
+        self._index(alert)
+        return alert
+
+    async def create_alert_at_current_price(self,
+                                            alert_type: str,
+                                            threshold: float,
+                                            webhook_url: Optional[str] = None) -> PriceAlert:
+        """
+        Create an alert, measuring a change alert from the current price
+
+        Raises PriceUnavailableError if a change alert is requested while no
+        price can be fetched, and ValueError for an invalid alert.
+        """
+        reference_price = None
+        if alert_type == "change":
+            current = await get_tracker_service().get_current_price()
+            if not current:
+                raise PriceUnavailableError("No current price to measure the change from")
+            reference_price = current.price
+        return await self.create_alert(alert_type, threshold, webhook_url, reference_price)
+
+    async def delete_alert(self, alert_id: int) -> bool:
+        """Deactivate an alert, returning whether it was active"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(PriceAlertRecord)
+                .where(PriceAlertRecord.id == alert_id, PriceAlertRecord.is_active.is_(True))
+                .values(is_active=False)
+            )
+            await session.commit()
+        self._unindex(alert_id)
+        return result.rowcount > 0
+
+    def get_active_alerts(self, limit: int = 100, offset: int = 0) -> List[PriceAlert]:
+        """Active alerts, oldest first"""
+        return [self.alerts[alert_id] for alert_id in sorted(self.alerts)[offset:offset + limit]]
+
+    def evaluate(self, price: float) -> List[PriceAlert]:
+        """Fire the alerts crossed since the previous price and drop them from the indexes"""
+        previous, self.last_price = self.last_price, price
+        self.stats["ticks"] += 1
+        if previous is None or price == previous:
+            return []
+
+        if price > previous:
+            # Thresholds t with previous < t <= price
+            index = self.above
+            lo = bisect.bisect_right(index.thresholds, previous)
+            hi = bisect.bisect_right(index.thresholds, price)
+        else:
+            # Thresholds t with price <= t < previous
+            index = self.below
+            lo = bisect.bisect_left(index.thresholds, price)
+            hi = bisect.bisect_left(index.thresholds, previous)
+        if lo >= hi:
+            return []
+
+        fired = []
+        for alert_id in index.pop_range(lo, hi):
+            alert = self._unindex(alert_id, skip=index)
+            if alert is not None:
+                fired.append(alert)
+        self.stats["fired"] += len(fired)
+        return fired
+
+    async def on_price(self, price_data):
+        """Price listener: evaluate the tick, persist and announce what fired"""
+        fired = self.evaluate(price_data.price)
+        if not fired:
+            return
+
+        triggered_at = datetime.utcnow()
+        try:
+            ids = [alert.id for alert in fired]
+            async with AsyncSessionLocal() as session:
+                for start in range(0, len(ids), settings.ALERT_UPDATE_CHUNK):
+                    await session.execute(
+                        update(PriceAlertRecord)
+                        .where(PriceAlertRecord.id.in_(ids[start:start + settings.ALERT_UPDATE_CHUNK]))
+                        .values(is_active=False, triggered_at=triggered_at)
+                    )
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error marking {len(fired)} fired price alerts: {e}")
+
+        logger.info(f"{len(fired)} price alert(s) fired at ${price_data.price:.6f}")
+        events = [
+            {
+                **alert.model_dump(mode="json"),
+                "is_active": False,
+                "triggered_at": triggered_at.isoformat(),
+                "price": price_data.price
+            }
+            for alert in fired
+        ]
+        # Notify off the price loop so a burst of fired alerts cannot stall it
+        task = asyncio.create_task(self._notify(events))
+        self._notify_tasks.add(task)
+        task.add_done_callback(self._notify_tasks.discard)
+
+    async def _notify(self, events: List[Dict[str, Any]]):
+        for listener in self.listeners:
+            try:
+                await listener(events)
+            except Exception as e:
+                logger.error(f"Error notifying alert listener: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index sizes and counters"""
+        return {
+            **self.stats,
+            "active_alerts": len(self.alerts),
+            "above_thresholds": len(self.above),
+            "below_thresholds": len(self.below),
+            "last_price": self.last_price
+        }
+
+_alert_engine: Optional[PriceAlertEngine] = None
+
+def get_alert_engine() -> PriceAlertEngine:
+    """Shared alert engine used by the API endpoints and the app lifespan"""
+    global _alert_engine
+    if _alert_engine is None:
+        _alert_engine = PriceAlertEngine()
+    return _alert_engine
@@ -0,0 +1,350 @@
+import asyncio
+import bisect
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple, Callable
+
+from sqlalchemy import select
+from stellar_sdk import scval, xdr
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, init_db
+from app.db.models import FarmerAggregate, IndexerCursor
+from app.models.farming import FarmerData
+from app.services.contract_integration import SorobanContractClient, SorobanRPCError
+
+logger = logging.getLogger(__name__)
+
+SESSION_TOPICS = ["farming", "session"]
+CURSOR_NAME = "farming_sessions"
+
+# getEvents rejects a cursor older than the RPC's event retention window (or
+# one it cannot parse) as an invalid request
+INVALID_CURSOR_CODES = (-32600, -32602)
+INVALID_CURSOR_MARKERS = ("cursor", "out of range", "ledger range", "oldest ledger")
+
+def is_invalid_cursor_error(error: SorobanRPCError) -> bool:
+    """Whether a getEvents error means the cursor can no longer be paged from"""
+    message = str(error).lower()
+    return error.code in INVALID_CURSOR_CODES and any(marker in message for marker in INVALID_CURSOR_MARKERS)
+
+@dataclass
+class FarmerTotals:
+    """In-memory copy of a farmer aggregate row"""
+    address: str
+    total_rewards: int = 0  # stroops
+    farms_completed: int = 0
+    successful_farms: int = 0
+    last_plant_time: Optional[datetime] = None
+    last_harvest_time: Optional[datetime] = None
+    last_event_id: Optional[str] = None
+
+@dataclass
+class SessionEvent:
+    """A decoded ("farming", "session") contract event"""
+    event_id: str
+    ledger: int
+    closed_at: datetime
+    farmer: str
+    success: bool
+    reward: int  # stroops
+
+class LeaderboardIndex:
+    """
+    Farmers ordered by total rewards
+
+    Keeps a sorted list of (-total_rewards, address) keys maintained with
+    bisect, so reading the top N is a slice and an update is one removal and
+    one insertion.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[int, str]] = []
+        self._rewards: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, address: str, total_rewards: int):
+        """Insert a farmer or move it to its new position"""
+        previous = self._rewards.get(address)
+        if previous == total_rewards:
+            return
+        if previous is not None:
+            index = bisect.bisect_left(self._keys, (-previous, address))
+            del self._keys[index]
+        bisect.insort(self._keys, (-total_rewards, address))
+        self._rewards[address] = total_rewards
+
+    def top(self, limit: int) -> List[str]:
+        """Addresses of the `limit` farmers with the highest total rewards"""
+        return [address for _, address in self._keys[:limit]]
+
+    def rank(self, address: str) -> Optional[int]:
+        """1-based leaderboard position of a farmer"""
+        rewards = self._rewards.get(address)
+        if rewards is None:
+            return None
+        return bisect.bisect_left(self._keys, (-rewards, address)) + 1
+
+def decode_session_event(event: Dict[str, Any]) -> Optional[SessionEvent]:
+    """Decode a getEvents entry into a session event (None if it is not one)"""
+    try:
+        topics = [scval.from_symbol(xdr.SCVal.from_xdr(topic)) for topic in event["topic"]]
+        if topics != SESSION_TOPICS:
+            return None
+
+        farmer, success, reward = scval.from_vec(xdr.SCVal.from_xdr(event["value"]))
+        closed_at = datetime.strptime(event["ledgerClosedAt"], "%Y-%m-%dT%H:%M:%SZ")
+        return SessionEvent(
+            event_id=event["id"],
+            ledger=int(event["ledger"]),
+            closed_at=closed_at,
+            farmer=scval.from_address(farmer).address,
+            success=scval.from_bool(success),
+            reward=scval.from_int128(reward)
+        )
+    except Exception as e:
+        logger.warning(f"Skipping undecodable contract event {event.get('id')}: {e}")
+        return None
+
+class ContractEventIndexer:
+    """Follows the contract's farming session events into a local farmer index"""
+
+    def __init__(self, contract_client: Optional[SorobanContractClient] = None):
+        self.contract_client = contract_client or SorobanContractClient()
+        self.farmers: Dict[str, FarmerTotals] = {}
+        self.leaderboard = LeaderboardIndex()
+        self.cursor: Optional[str] = None
+        self.last_ledger: Optional[int] = None
+        self.events_applied = 0
+        self.cursor_resets = 0
+        self.last_gap: Optional[Dict[str, Any]] = None
+        self.background_task: Optional[asyncio.Task] = None
+        self.is_running = False
+        self.is_loaded = False
+        self.plant_listeners: List[Callable[[str, datetime], None]] = []
+
+    def add_plant_listener(self, listener: Callable[[str, datetime], None]):
+        """Register a callback for each farmer whose last plant time an applied page moved"""
+        self.plant_listeners.append(listener)
+
+    async def load(self):
+        """Load persisted aggregates and the event cursor"""
+        await init_db()
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(select(FarmerAggregate))).scalars().all()
+            for row in rows:
+                totals = FarmerTotals(
+                    address=row.address,
+                    total_rewards=row.total_rewards,
+                    farms_completed=row.farms_completed,
+                    successful_farms=row.successful_farms,
+                    last_plant_time=row.last_plant_time,
+                    last_harvest_time=row.last_harvest_time,
+                    last_event_id=row.last_event_id
+                )
+                self.farmers[row.address] = totals
+                self.leaderboard.update(row.address, totals.total_rewards)
+
+            cursor = await session.get(IndexerCursor, CURSOR_NAME)
+            if cursor:
+                self.cursor = cursor.cursor
+                self.last_ledger = cursor.ledger
+
+        self.is_loaded = True
+        logger.info(f"Loaded {len(self.farmers)} indexed farmers (cursor {self.cursor})")
+
+    async def start(self):
+        """Load the index and start following contract events"""
+        if self.is_running:
+            logger.warning("Event indexer is already running")
+            return
+
+        if not self.is_loaded:
+            await self.load()
+
+        self.is_running = True
+        self.background_task = asyncio.create_task(self._indexing_loop())
+        logger.info("Contract event indexer started")
+
+    async def stop(self):
+        """Stop following contract events"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        if self.background_task:
+            self.background_task.cancel()
+            try:
+                await self.background_task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Contract event indexer stopped")
+
+    async def _indexing_loop(self):
+        """Page events until caught up, then poll for new ledgers"""
+        while self.is_running:
+            try:
+                applied = await self.poll_once()
+                if applied < settings.EVENT_INDEXER_PAGE_SIZE:
+                    await asyncio.sleep(settings.EVENT_INDEXER_POLL_INTERVAL)
+            except Exception as e:
+                logger.error(f"Error indexing contract events: {e}")
+                await asyncio.sleep(settings.EVENT_INDEXER_POLL_INTERVAL)
+
+    async def poll_once(self) -> int:
+        """Fetch and apply one page of session events, returning how many were read"""
+        start_ledger = None
+        if not self.cursor:
+            latest = await self.contract_client.get_latest_ledger()
+            start_ledger = max(1, latest - settings.EVENT_INDEXER_START_LEDGERS)
+
+        try:
+            result = await self.contract_client.get_events(
+                SESSION_TOPICS,
+                start_ledger=start_ledger,
+                cursor=self.cursor,
+                limit=settings.EVENT_INDEXER_PAGE_SIZE
+            )
+        except SorobanRPCError as e:
+            if not self.cursor or not is_invalid_cursor_error(e):
+                raise
+            start_ledger = await self._reset_cursor(e)
+            result = await self.contract_client.get_events(
+                SESSION_TOPICS,
+                start_ledger=start_ledger,
+                limit=settings.EVENT_INDEXER_PAGE_SIZE
+            )
+        raw_events = result.get("events", [])
+        events = [event for event in map(decode_session_event, raw_events) if event]
+        next_cursor = result.get("cursor") or (raw_events[-1]["id"] if raw_events else self.cursor)
+
+        if raw_events or next_cursor != self.cursor:
+            await self._apply(events, next_cursor, result.get("latestLedger"))
+        return len(raw_events)
+
+    async def _reset_cursor(self, error: SorobanRPCError) -> int:
+        """
+        Drop a cursor the RPC no longer accepts and return the ledger to restart from
+
+        This happens when the indexer was down for longer than the RPC keeps
+        events. Sessions in the skipped ledgers are never applied, so the gap
+        is logged and kept in the stats.
+        """
+        latest = await self.contract_client.get_latest_ledger()
+        start_ledger = max(1, latest - settings.EVENT_INDEXER_START_LEDGERS)
+        self.last_gap = {
+            "from_ledger": self.last_ledger,
+            "to_ledger": start_ledger,
+            "detected_at": datetime.utcnow().isoformat(),
+            "error": str(error)
+        }
+        self.cursor_resets += 1
+        logger.warning(f"Event cursor {self.cursor} was rejected ({error}); restarting from ledger {start_ledger}, "
+                       f"events between ledgers {self.last_ledger} and {start_ledger} are not indexed")
+        self.cursor = None
+        return start_ledger
+
+    async def _apply(self, events: List[SessionEvent], cursor: Optional[str], latest_ledger: Optional[int]):
+        """Apply a page of events and advance the cursor in one transaction"""
+        updated: Dict[str, FarmerTotals] = {}
+        for event in events:
+            current = updated.get(event.farmer) or self.farmers.get(event.farmer)
+            totals = FarmerTotals(**vars(current)) if current else FarmerTotals(address=event.farmer)
+            if totals.last_event_id and totals.last_event_id >= event.event_id:
+                continue  # Already applied before a restart
+
+            totals.farms_completed += 1
+            totals.last_plant_time = event.closed_at
+            if event.success:
+                totals.successful_farms += 1
+                totals.total_rewards += event.reward
+                totals.last_harvest_time = event.closed_at
+            totals.last_event_id = event.event_id
+            updated[event.farmer] = totals
+
+        async with AsyncSessionLocal() as session:
+            if updated:
+                result = await session.execute(
+                    select(FarmerAggregate).where(FarmerAggregate.address.in_(list(updated)))
+                )
+                rows = {row.address: row for row in result.scalars()}
+                for address, totals in updated.items():
+                    row = rows.get(address)
+                    if row is None:
+                        row = FarmerAggregate(address=address)
+                        session.add(row)
+                    row.total_rewards = totals.total_rewards
+                    row.farms_completed = totals.farms_completed
+                    row.successful_farms = totals.successful_farms
+                    row.last_plant_time = totals.last_plant_time
+                    row.last_harvest_time = totals.last_harvest_time
+                    row.last_event_id = totals.last_event_id
+
+            ledger = events[-1].ledger if events else latest_ledger
+            await session.merge(IndexerCursor(name=CURSOR_NAME, cursor=cursor, ledger=ledger))
+            await session.commit()
+
+        # Only publish once the page is durable
+        for address, totals in updated.items():
+            self.farmers[address] = totals
+            self.leaderboard.update(address, totals.total_rewards)
+        self.cursor = cursor
+        self.last_ledger = ledger
+        self.events_applied += len(events)
+        for address, totals in updated.items():
+            for listener in self.plant_listeners:
+                try:
+                    listener(address, totals.last_plant_time)
+                except Exception as e:
+                    logger.error(f"Error notifying plant listener for {address}: {e}")
+
+    def _to_farmer_data(self, totals: FarmerTotals) -> FarmerData:
+        is_active = bool(totals.last_plant_time) and \
+            (datetime.utcnow() - totals.last_plant_time) < timedelta(hours=48)
+        return FarmerData(
+            address=totals.address,
+            stake_amount=0.0,  # Stakes are not part of the session event
+            last_plant_time=totals.last_plant_time,
+            last_harvest_time=totals.last_harvest_time,
+            total_rewards=totals.total_rewards / 10_000_000,
+            farms_completed=totals.farms_completed,
+            success_rate=totals.successful_farms / totals.farms_completed if totals.farms_completed else 0.0,
+            is_active=is_active
+        )
+
+    def get_leaderboard(self, limit: int = 50) -> List[FarmerData]:
+        """Top farmers by total rewards from the local index"""
+        return [self._to_farmer_data(self.farmers[address]) for address in self.leaderboard.top(limit)]
+
+    def get_farmer(self, address: str) -> Optional[FarmerData]:
+        """Indexed totals for one farmer"""
+        totals = self.farmers.get(address)
+        return self._to_farmer_data(totals) if totals else None
+
+    @property
+    def has_data(self) -> bool:
+        return len(self.leaderboard) > 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Indexer progress"""
+        return {
+            "running": self.is_running,
+            "indexed_farmers": len(self.farmers),
+            "events_applied": self.events_applied,
+            "cursor": self.cursor,
+            "last_ledger": self.last_ledger,
+            "cursor_resets": self.cursor_resets,
+            "last_gap": self.last_gap
+        }
+
+_event_indexer: Optional[ContractEventIndexer] = None
+
+def get_event_indexer() -> ContractEventIndexer:
+    """Shared event indexer used by the API endpoints and the app lifespan"""
+    global _event_indexer
+    if _event_indexer is None:
+        _event_indexer = ContractEventIndexer()
+    return _event_indexer
@@ -0,0 +1,187 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Tuple
+
+from app.core.config import settings
+from app.services.kale_farming import KaleFarmingService
+
+logger = logging.getLogger(__name__)
+
+MAX_SLEEP = 60.0  # seconds; re-reads the clock at least this often
+
+class HarvestReminderScheduler:
+    """
+    Fires harvest reminders ahead of each tracked farmer's harvest deadline
+
+    A farmer's deadline is their last plant time plus the farming service's
+    harvest_ttl_hours. Each tracked farmer has exactly one pending entry in a
+    min-heap keyed by when its next reminder is due (one per lead time in
+    HARVEST_REMINDER_LEAD_HOURS, pushed as the previous one fires), so the
+    scheduler sleeps until the earliest reminder instead of scanning farmers.
+    Rescheduling or untracking leaves the old entry in the heap; it is
+    recognised as stale when popped and the heap is compacted once stale
+    entries outnumber live ones.
+    """
+
+    def __init__(self, farming_service: Optional[KaleFarmingService] = None,
+                 lead_hours: Optional[List[float]] = None):
+        self.farming_service = farming_service or KaleFarmingService()
+        self.ttl = timedelta(hours=self.farming_service.harvest_ttl_hours)
+        self.leads = [timedelta(hours=hours) for hours in
+                      sorted(lead_hours or settings.HARVEST_REMINDER_LEAD_HOURS, reverse=True)]
+        # address -> current deadline (None once its last reminder fired)
+        self.deadlines: Dict[str, Optional[datetime]] = {}
+        # address -> token of its live heap entry
+        self.tokens: Dict[str, int] = {}
+        # (fire_at, token, address, deadline, lead index)
+        self.heap: List[Tuple[datetime, int, str, datetime, int]] = []
+        self._next_token = 0
+        self.listeners: List[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = []
+        self.background_task: Optional[asyncio.Task] = None
+        self.is_running = False
+        self._wakeup = asyncio.Event()
+        self.stats = {"reminders_sent": 0, "stale_entries_skipped": 0, "compactions": 0}
+
+    def add_listener(self, listener: Callable[[List[Dict[str, Any]]], Awaitable[None]]):
+        """Register a coroutine called with each batch of due reminders"""
+        self.listeners.append(listener)
+
+    async def start(self):
+        """Start firing reminders"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self.background_task = asyncio.create_task(self._run())
+        logger.info("Harvest reminder scheduler started")
+
+    async def stop(self):
+        """Stop firing reminders"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        if self.background_task:
+            self.background_task.cancel()
+            try:
+                await self.background_task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Harvest reminder scheduler stopped")
+
+    async def track(self, address: str, planted_at: Optional[datetime] = None):
+        """Start reminding a farmer, looking up their last plant time if not given"""
+        if planted_at is None:
+            farmer = await self.farming_service.get_farmer_data(address)
+            planted_at = farmer.last_plant_time if farmer else None
+        self.deadlines[address] = None
+        if planted_at is not None:
+            self._schedule(address, planted_at + self.ttl)
+
+    def untrack(self, address: str):
+        """Stop reminding a farmer; their heap entry goes stale"""
+        self.deadlines.pop(address, None)
+        self.tokens.pop(address, None)
+
+    def on_planted(self, address: str, planted_at: datetime):
+        """A tracked farmer planted again: move their deadline"""
+        if address in self.deadlines:
+            self._schedule(address, planted_at + self.ttl)
+
+    def _schedule(self, address: str, deadline: datetime, now: Optional[datetime] = None):
+        now = now or datetime.utcnow()
+        for index, lead in enumerate(self.leads):
+            fire_at = deadline - lead
+            if fire_at > now or (index == len(self.leads) - 1 and deadline > now):
+                break
+        else:
+            self.deadlines[address] = None  # Deadline already passed
+            self.tokens.pop(address, None)
+            return
+
+        fire_at = max(fire_at, now)
+        self.deadlines[address] = deadline
+        wake = not self.heap or fire_at < self.heap[0][0]
+        self._push(fire_at, address, deadline, index)
+        if len(self.heap) > 2 * len(self.tokens) + 1024:
+            self._compact()
+        if wake:
+            self._wakeup.set()
+
+    def _push(self, fire_at: datetime, address: str, deadline: datetime, index: int):
+        token = self._next_token
+        self._next_token += 1
+        self.tokens[address] = token
+        heapq.heappush(self.heap, (fire_at, token, address, deadline, index))
+
+    def _compact(self):
+        """Drop stale entries and re-heapify"""
+        self.heap = [entry for entry in self.heap if self.tokens.get(entry[2]) == entry[1]]
+        heapq.heapify(self.heap)
+        self.stats["compactions"] += 1
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Remove the reminders due by `now`, queueing each farmer's next one"""
+        now = now or datetime.utcnow()
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            _, token, address, deadline, index = heapq.heappop(self.heap)
+            if self.tokens.get(address) != token:
+                self.stats["stale_entries_skipped"] += 1
+                continue
+
+            due.append({
+                "farmer_address": address,
+                "deadline": deadline,
+                "time_remaining_hours": max((deadline - now).total_seconds(), 0.0) / 3600
+            })
+            if index + 1 < len(self.leads):
+                self._push(deadline - self.leads[index + 1], address, deadline, index + 1)
+            else:
+                self.deadlines[address] = None
+                del self.tokens[address]
+        return due
+
+    async def _run(self):
+        while self.is_running:
+            try:
+                due = self.pop_due()
+                if due:
+                    self.stats["reminders_sent"] += len(due)
+                    for listener in self.listeners:
+                        try:
+                            await listener(due)
+                        except Exception as e:
+                            logger.error(f"Error notifying harvest reminder listener: {e}")
+            except Exception as e:
+                logger.error(f"Error firing harvest reminders: {e}")
+
+            self._wakeup.clear()
+            timeout = MAX_SLEEP
+            if self.heap:
+                timeout = min(timeout, max((self.heap[0][0] - datetime.utcnow()).total_seconds(), 0.0))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tracked farmers, heap size and counters"""
+        return {
+            **self.stats,
+            "running": self.is_running,
+            "tracked_farmers": len(self.deadlines),
+            "pending_deadlines": len(self.tokens),
+            "heap_entries": len(self.heap),
+            "next_reminder_at": self.heap[0][0].isoformat() if self.heap else None,
+            "lead_hours": [lead.total_seconds() / 3600 for lead in self.leads]
+        }
+
+_harvest_scheduler: Optional[HarvestReminderScheduler] = None
+
+def get_harvest_scheduler() -> HarvestReminderScheduler:
+    """Shared harvest reminder scheduler used by the WebSocket endpoint and the app lifespan"""
+    global _harvest_scheduler
+    if _harvest_scheduler is None:
+        _harvest_scheduler = HarvestReminderScheduler()
+    return _harvest_scheduler
@@ -8,6 +8,8 @@ from stellar_sdk import Server, Keypair, TransactionBuilder, Network
 from stellar_sdk.exceptions import NotFoundError, SdkError
 from dataclasses import dataclass
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -49,7 +51,7 @@ class KaleFarmingService:
     """Service for interacting with KALE farming contracts and analyzing farming opportunities"""
     
     def __init__(self):
-        self.server = Server(horizon_url="https://horizon-testnet.stellar.org")
+        self.server = Server(horizon_url=settings.STELLAR_HORIZON_URL)
         self.network_passphrase = Network.TESTNET_NETWORK_PASSPHRASE
         
         # KALE contract addresses (these would be the actual deployed contracts)
@@ -164,13 +166,15 @@ class KaleFarmingService:
         try:
             # In real implementation, query contract for all farmers and sort
             # Mock leaderboard data
-            leaderboard = []
+            semaphore = asyncio.Semaphore(settings.SOROBAN_MAX_CONCURRENT_READS)
+            
+            async def fetch(address: str) -> Optional[FarmerData]:
+                async with semaphore:
+                    return await self.get_farmer_data(address)
             
-            for i in range(limit):
-                address = f"G{'A' * 55}{i:02d}"  # Mock Stellar address
-                farmer = await self.get_farmer_data(address)
-                if farmer:
-                    leaderboard.append(farmer)
+            addresses = [f"G{'A' * 55}{i:02d}" for i in range(limit)]  # Mock Stellar addresses
+            farmers = await asyncio.gather(*(fetch(address) for address in addresses))
+            leaderboard = [farmer for farmer in farmers if farmer]
             
             # Sort by total rewards
             leaderboard.sort(key=lambda f: f.total_rewards, reverse=True)
@@ -288,7 +292,7 @@ class KaleFarmingService:
         last_plant = self._get_last_plant_time(address)
         if not last_plant:
             return False
-        return (datetime.utcnow() - last_plant).hours < 48
+        return (datetime.utcnow() - last_plant) < timedelta(hours=48)
 
     def _calculate_optimal_stake(self, stats: FarmingStats) -> float:
         """Calculate optimal stake amount based on current conditions"""
@@ -1,7 +1,6 @@
 import time
 import logging
-import matplotlib.pyplot as plt
-import pandas as pd
+import importlib.util
 from stellar_sdk import Server, Network, Asset
 from stellar_sdk.exceptions import NotFoundError, SdkError
 from datetime import datetime, timedelta
@@ -11,6 +10,13 @@ import os
 from dataclasses import dataclass
 import asyncio
 
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.core.metrics import observe_fetch
+from app.core.tracing import tracer
+from app.services.price_file import PriceFileSource
+from app.services.replay import SystemClock
+
 
 @dataclass
 class PriceData:
@@ -27,7 +33,10 @@ class KalePriceTracker:
                  log_file: str = 'kale_price_log.txt',
                  csv_file: str = 'test_prices.csv',
                  update_interval: int = 10,
-                 plot_threshold: int = 5):
+                 plot_threshold: int = 5,
+                 history_file: str = 'price_history.json',
+                 clock=None,
+                 replay_source=None):
         """
         Initialize the KALE Price Tracker
         
@@ -36,62 +45,52 @@ class KalePriceTracker:
             csv_file: Path to CSV backup file
             update_interval: Seconds between price updates
             plot_threshold: Number of data points before showing plot
+            history_file: Path to the JSON price history file
+            clock: Clock providing now()/utcnow() (defaults to the system clock)
+            replay_source: Recorded tick source used in place of live sources
         """
         self.log_file = log_file
         self.csv_file = csv_file
+        self.csv_source = PriceFileSource(csv_file)
         self.update_interval = update_interval
         self.plot_threshold = plot_threshold
+        self.history_file = history_file
+        self.replay_source = replay_source
+        if clock is None:
+            clock = replay_source.clock if replay_source else SystemClock()
+        self.clock = clock
         
         # Price data storage
         self.price_history: List[PriceData] = []
         
         # Stellar SDK setup
-        self.server = Server(horizon_url="https://horizon-testnet.stellar.org")
+        self.server = Server(horizon_url=settings.STELLAR_HORIZON_URL)
         self.network_passphrase = Network.TESTNET_NETWORK_PASSPHRASE
-        self.kale_asset = Asset("KALE", "GCHPTWXMT3HYF4RLZHWBNRF4MPXLTJ76ISHMSYIWCCDXWUYOQG5MR2AB")
+        self.kale_asset = Asset(settings.KALE_ASSET_CODE, settings.KALE_ASSET_ISSUER)
         
         # Hardcoded test data as fallback
         self.test_prices = [0.095, 0.096, 0.094, 0.093, 0.092, 0.097, 0.098, 0.091]
         self.test_index = 0
 
-        # --- START: Added Code ---
-        # Check for matplotlib availability
-        try:
-            import matplotlib.pyplot as plt
-            self.has_matplotlib = True
-        except ImportError:
-            self.has_matplotlib = False
+        # Check for matplotlib availability (pyplot is only imported when plotting)
+        self.has_matplotlib = importlib.util.find_spec("matplotlib") is not None
+        if not self.has_matplotlib:
             logging.warning("matplotlib not found. Falling back to text-based charts.")
-        # --- END: Added Code ---
         
         # Setup logging
         self._setup_logging()
         
-        # Load existing price history if available
-        self._load_price_history()
+        # Load existing price history if available (replays start empty)
+        if self.replay_source is None:
+            self._load_price_history()
     
     def _setup_logging(self) -> None:
-        """Configure logging with proper formatting"""
-        logging.basicConfig(
-            filename=self.log_file,
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            filemode='a'
-        )
-        
-        # Also log to console
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        console_handler.setFormatter(formatter)
-        
-        logger = logging.getLogger()
-        if not logger.handlers:
-            logger.addHandler(console_handler)
+        """Configure logging with proper formatting (keeps the app's setup when already configured)"""
+        setup_logging(log_file=self.log_file)
     
     def _load_price_history(self) -> None:
         """Load existing price history from JSON file if available"""
-        history_file = 'price_history.json'
+        history_file = self.history_file
         try:
             if os.path.exists(history_file):
                 with open(history_file, 'r') as f:
@@ -109,7 +108,7 @@ class KalePriceTracker:
     
     def _save_price_history(self) -> None:
         """Save price history to JSON file"""
-        history_file = 'price_history.json'
+        history_file = self.history_file
         try:
             data = []
             for price_data in self.price_history:
@@ -133,7 +132,7 @@ class KalePriceTracker:
         """
         try:
             # Get recent trades for KALE
-            trades = self.server.trades().for_asset(self.kale_asset).limit(10).call()
+            trades = self.server.trades().for_asset_pair(self.kale_asset, Asset.native()).order(desc=True).limit(10).call()
             
             if not trades['_embedded']['records']:
                 logging.warning("No trades found for KALE asset")
@@ -162,7 +161,9 @@ class KalePriceTracker:
     
     def get_csv_price(self) -> Optional[float]:
         """
-        Get price from CSV file as backup
+        Get price from the CSV (or NDJSON) file as backup
+        
+        Only the last record is read, and only when the file has changed.
         
         Returns:
             Price as float or None if not available
@@ -171,17 +172,16 @@ class KalePriceTracker:
             if not os.path.exists(self.csv_file):
                 return None
                 
-            df = pd.read_csv(self.csv_file)
+            price = self.csv_source.latest()
             
-            if df.empty or 'price' not in df.columns:
+            if price is None:
                 logging.warning("CSV file is empty or missing 'price' column")
                 return None
             
-            price = float(df['price'].iloc[-1])
             logging.info(f"Successfully fetched KALE price from CSV: {price} USD")
             return price
             
-        except (pd.errors.EmptyDataError, pd.errors.ParserError) as e:
+        except ValueError as e:
             logging.error(f"CSV parsing error: {str(e)}")
             return None
         except Exception as e:
@@ -208,22 +208,47 @@ class KalePriceTracker:
         Returns:
             PriceData object or None if all sources fail
         """
-        timestamp = datetime.now()
+        if self.replay_source is not None:
+            return self._fetch_replay_price()
+        
+        # UTC like every other writer of price_records and the retention cutoffs
+        timestamp = self.clock.utcnow()
         
         # Try Stellar network first
-        price = self.get_stellar_price()
+        with tracer.start_as_current_span("fetch.stellar") as span:
+            started = time.perf_counter()
+            price = self.get_stellar_price()
+            observe_fetch('stellar', started, price is not None)
+            span.set_attribute("fetch.success", price is not None)
         if price is not None:
             return PriceData(price, timestamp, 'stellar')
         
         # Fallback to CSV
-        price = self.get_csv_price()
+        with tracer.start_as_current_span("fetch.csv") as span:
+            started = time.perf_counter()
+            price = self.get_csv_price()
+            observe_fetch('csv', started, price is not None)
+            span.set_attribute("fetch.success", price is not None)
         if price is not None:
             return PriceData(price, timestamp, 'csv')
         
         # Final fallback to hardcoded data
-        price = self.get_hardcoded_price()
+        with tracer.start_as_current_span("fetch.hardcoded"):
+            price = self.get_hardcoded_price()
         return PriceData(price, timestamp, 'hardcoded')
     
+    def _fetch_replay_price(self) -> Optional[PriceData]:
+        """
+        Take the next tick from the replay source
+        
+        Returns:
+            PriceData object or None once the recording is exhausted
+        """
+        tick = self.replay_source.next_tick()
+        if tick is None:
+            return None
+        return PriceData(tick.price, tick.timestamp, tick.source)
+    
     def plot_price_history(self) -> None:
         """Create and display price history plot"""
         if not self.has_matplotlib:
@@ -235,6 +260,8 @@ class KalePriceTracker:
             return
         
         try:
+            import matplotlib.pyplot as plt
+            
             # Extract data for plotting
             times = [data.timestamp for data in self.price_history]
             prices = [data.price for data in self.price_history]
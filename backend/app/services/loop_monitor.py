@@ -0,0 +1,157 @@
+import asyncio
+import asyncio.events
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from app.core.config import settings
+from app.core.metrics import EVENT_LOOP_LAG_SECONDS, EVENT_LOOP_BLOCKS
+
+logger = logging.getLogger(__name__)
+
+def _callback_stack(frame) -> str:
+    """Format a loop thread stack from the callback the loop is running, dropping the loop's own frames"""
+    frames = traceback.extract_stack(frame)
+    for index in range(len(frames) - 1, -1, -1):
+        if frames[index].filename == asyncio.events.__file__ and frames[index].name == "_run":
+            frames = frames[index + 1:] or frames
+            break
+    return "".join(traceback.format_list(frames))
+
+class LoopLagMonitor:
+    """
+    Measures event-loop scheduling lag and catches the code that blocks it
+
+    A probe task sleeps LOOP_MONITOR_INTERVAL at a time; how late each wakeup
+    arrives is the loop's scheduling lag, exported as a histogram. The probe
+    also leaves a heartbeat that a watchdog thread checks. While the loop is
+    stuck the probe cannot run, so once the heartbeat is more than
+    LOOP_LAG_THRESHOLD overdue the watchdog samples the loop thread's stack
+    from outside: that stack is the blocking call, caught in the act. One
+    report is kept per stall.
+    """
+
+    def __init__(self, interval: Optional[float] = None, threshold: Optional[float] = None):
+        self.interval = interval or settings.LOOP_MONITOR_INTERVAL
+        self.threshold = threshold or settings.LOOP_LAG_THRESHOLD
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread_id: Optional[int] = None
+        self.heartbeat = 0.0
+        self.probe_task: Optional[asyncio.Task] = None
+        self.watchdog_thread: Optional[threading.Thread] = None
+        self.is_running = False
+        self._stop_watchdog = threading.Event()
+        self._open_report: Optional[Dict[str, Any]] = None
+        self.reports = deque(maxlen=settings.LOOP_BLOCK_REPORTS)
+        self.stats = {"samples": 0, "last_lag": 0.0, "max_lag": 0.0, "blocks": 0}
+
+    async def start(self):
+        """Start probing the running loop and watching it from a thread"""
+        if self.is_running:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self.is_running = True
+        self._stop_watchdog.clear()
+        self.probe_task = asyncio.create_task(self._probe())
+        self.watchdog_thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self.watchdog_thread.start()
+        logger.info("Event loop monitor started")
+
+    async def stop(self):
+        """Stop probing and join the watchdog"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        self._stop_watchdog.set()
+        if self.probe_task:
+            self.probe_task.cancel()
+            try:
+                await self.probe_task
+            except asyncio.CancelledError:
+                pass
+        if self.watchdog_thread:
+            await asyncio.to_thread(self.watchdog_thread.join, self.interval * 2)
+        logger.info("Event loop monitor stopped")
+
+    async def _probe(self):
+        while self.is_running:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.heartbeat = now
+            lag = max(now - expected, 0.0)
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+            self.stats["samples"] += 1
+            self.stats["last_lag"] = lag
+            self.stats["max_lag"] = max(self.stats["max_lag"], lag)
+
+            report = self._open_report
+            if report is not None:
+                # The stall is over; record how long it really lasted
+                report["blocked_seconds"] = round(lag, 4)
+                self._open_report = None
+
+    def _watch(self):
+        """Watchdog thread: sample the loop thread's stack when the heartbeat is overdue"""
+        reported = False
+        while not self._stop_watchdog.wait(self.interval):
+            overdue = time.monotonic() - self.heartbeat - self.interval
+            if overdue < self.threshold:
+                reported = False
+                continue
+            if not reported:
+                reported = True
+                try:
+                    self._report(overdue)
+                except Exception as e:
+                    logger.error(f"Error capturing blocked event loop stack: {e}")
+
+    def _report(self, overdue: float):
+        frame = sys._current_frames().get(self.loop_thread_id)
+        stack = _callback_stack(frame) if frame else ""
+        task = None
+        try:
+            current = asyncio.current_task(self.loop)
+            if current is not None:
+                coro = current.get_coro()
+                task = f"{current.get_name()} ({getattr(coro, '__qualname__', coro)})"
+        except Exception:
+            pass
+
+        report = {
+            "detected_at": datetime.utcnow().isoformat(),
+            "blocked_seconds": round(overdue, 4),  # So far; updated when the loop resumes
+            "task": task,
+            "stack": stack
+        }
+        self.reports.append(report)
+        self._open_report = report
+        self.stats["blocks"] += 1
+        EVENT_LOOP_BLOCKS.inc()
+        logger.warning(f"Event loop blocked for over {overdue:.3f}s in task {task}:\n{stack}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Lag figures and the most recent blocking reports, newest first"""
+        return {
+            **self.stats,
+            "running": self.is_running,
+            "interval_seconds": self.interval,
+            "threshold_seconds": self.threshold,
+            "recent_blocks": list(reversed(self.reports))
+        }
+
+_loop_monitor: Optional[LoopLagMonitor] = None
+
+def get_loop_monitor() -> LoopLagMonitor:
+    """Shared event loop monitor used by the health endpoints and the app lifespan"""
+    global _loop_monitor
+    if _loop_monitor is None:
+        _loop_monitor = LoopLagMonitor()
+    return _loop_monitor
@@ -0,0 +1,153 @@
+import importlib.util
+import logging
+import os
+from datetime import datetime, date, time, timedelta
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+
+from app.core.config import settings
+from app.models.price import PriceData
+
+# pyarrow is imported on first use so it does not weigh on API startup
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+logger = logging.getLogger(__name__)
+
+class PriceArchive:
+    """
+    Cold tier: expired price ticks in date-partitioned Parquet files
+
+    Each retention interval is written to
+    <PRICE_ARCHIVE_DIR>/date=YYYY-MM-DD/part-HHMMSS.parquet. Reads walk the
+    partitions newest first and stop once enough ticks are found, so only the
+    days a query touches are opened. Needs pyarrow; without it the archive is
+    disabled and expired ticks survive only as candles.
+    """
+
+    def __init__(self, root: Optional[str] = None, enabled: Optional[bool] = None):
+        self.root = root or settings.PRICE_ARCHIVE_DIR
+        enabled = settings.PRICE_ARCHIVE_ENABLED if enabled is None else enabled
+        if enabled and not HAS_PYARROW:
+            logger.warning("pyarrow not found. Expired price ticks will not be archived to Parquet.")
+        self.enabled = enabled and HAS_PYARROW
+        self.files_written = 0
+
+    def _partition_dir(self, day: date) -> str:
+        return os.path.join(self.root, f"date={day.isoformat()}")
+
+    def _partition_days(self) -> List[date]:
+        """Archived days, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        days = []
+        for name in os.listdir(self.root):
+            if name.startswith("date="):
+                try:
+                    days.append(date.fromisoformat(name[5:]))
+                except ValueError:
+                    continue
+        return sorted(days)
+
+    def write_bucket(self, bucket_start: datetime, rows: Sequence[Any]):
+        """Write one interval of ticks (objects with timestamp/price/source/volume)"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        directory = self._partition_dir(bucket_start.date())
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{bucket_start:%H%M%S}.parquet")
+
+        records = {(row.timestamp, row.price, row.source): row.volume for row in rows}
+        if os.path.exists(path):
+            # Late ticks or a retried interval: merge with what is already archived
+            for row in pq.read_table(path).to_pylist():
+                records.setdefault((row["timestamp"], row["price"], row["source"]), row["volume"])
+
+        ordered = sorted(records.items(), key=lambda item: item[0][0])
+        table = pa.table({
+            "timestamp": pa.array([key[0] for key, _ in ordered], type=pa.timestamp("us")),
+            "price": pa.array([key[1] for key, _ in ordered], type=pa.float64()),
+            "source": pa.array([key[2] for key, _ in ordered], type=pa.string()),
+            "volume": pa.array([volume for _, volume in ordered], type=pa.float64()),
+        })
+
+        temp_path = f"{path}.tmp"
+        pq.write_table(table, temp_path, compression=settings.PRICE_ARCHIVE_COMPRESSION)
+        os.replace(temp_path, path)
+        self.files_written += 1
+
+    def read_range(self,
+                   start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None,
+                   limit: int = 100,
+                   before: Optional[datetime] = None,
+                   source: Optional[str] = None) -> List[PriceData]:
+        """The newest `limit` archived ticks in the range (and before `before`), oldest first"""
+        if not self.enabled:
+            return []
+        import pyarrow.parquet as pq
+
+        upper = min(filter(None, [end_date, before]), default=None)
+        filters = [("timestamp", ">=", start_date), ("timestamp", "<=", end_date),
+                   ("timestamp", "<", before), ("source", "==", source)]
+        filters = [f for f in filters if f[2] is not None] or None
+        found: List[PriceData] = []
+        for day in reversed(self._partition_days()):
+            if upper and day > upper.date():
+                continue
+            if start_date and day < start_date.date():
+                break
+
+            # Part files hold consecutive buckets: each one ends where the next one starts
+            parts = self._day_parts(day)
+            for index in range(len(parts) - 1, -1, -1):
+                part_start, path = parts[index]
+                part_end = parts[index + 1][0] if index + 1 < len(parts) else datetime.combine(day + timedelta(days=1), time())
+                if (upper and part_start > upper) or (before and part_start >= before):
+                    continue
+                if start_date and part_end <= start_date:
+                    break
+
+                # Rows are stored in timestamp order; only the newest ones still needed are converted
+                table = pq.read_table(path, filters=filters)
+                remaining = limit - len(found)
+                rows = table.slice(max(table.num_rows - remaining, 0)).to_pylist()
+                for row in reversed(rows):
+                    found.append(PriceData(price=row["price"], timestamp=row["timestamp"],
+                                           source=row["source"], volume=row["volume"]))
+                if len(found) >= limit:
+                    return list(reversed(found))
+        return list(reversed(found))
+
+    def _day_parts(self, day: date) -> List[Tuple[datetime, str]]:
+        """(bucket start, path) of a day's part files, oldest first"""
+        directory = self._partition_dir(day)
+        parts = []
+        for name in os.listdir(directory):
+            if name.startswith("part-") and name.endswith(".parquet"):
+                try:
+                    start = datetime.combine(day, datetime.strptime(name[5:11], "%H%M%S").time())
+                except ValueError:
+                    continue
+                parts.append((start, os.path.join(directory, name)))
+        return sorted(parts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Archive location and the days it covers"""
+        days = self._partition_days() if self.enabled else []
+        return {
+            "enabled": self.enabled,
+            "path": self.root,
+            "partitions": len(days),
+            "oldest_day": days[0].isoformat() if days else None,
+            "newest_day": days[-1].isoformat() if days else None,
+            "files_written": self.files_written
+        }
+
+_price_archive: Optional[PriceArchive] = None
+
+def get_price_archive() -> PriceArchive:
+    """Shared Parquet archive used by the retention job and history queries"""
+    global _price_archive
+    if _price_archive is None:
+        _price_archive = PriceArchive()
+    return _price_archive
@@ -1,33 +1,42 @@
 from stellar_sdk import Server, Network, Asset
 from stellar_sdk.exceptions import NotFoundError, SdkError
-import pandas as pd
 import os
 import logging
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 import asyncio
+import time
 import httpx
 
 from app.core.config import settings
+from app.core.metrics import observe_fetch
+from app.core.tracing import tracer
 from app.models.price import PriceData, PriceSource
+from app.services.price_file import PriceFileSource
+from app.services.replay import SystemClock
 
 logger = logging.getLogger(__name__)
 
 class PriceFetcher:
     """Service class for fetching KALE prices from multiple sources"""
     
-    def __init__(self):
+    def __init__(self, clock=None, replay_source=None):
+        self.replay_source = replay_source
+        if clock is None:
+            clock = replay_source.clock if replay_source else SystemClock()
+        self.clock = clock
         self.server = Server(horizon_url=settings.STELLAR_HORIZON_URL)
         self.kale_asset = Asset(settings.KALE_ASSET_CODE, settings.KALE_ASSET_ISSUER)
         self.test_prices = [0.095, 0.096, 0.094, 0.093, 0.092, 0.097, 0.098, 0.091]
         self.test_index = 0
+        self.file_sources: Dict[str, PriceFileSource] = {}
         
     async def fetch_stellar_price(self) -> Optional[PriceData]:
         """Fetch KALE price from Stellar network"""
         try:
             # Run the synchronous Stellar SDK call in a thread pool
             trades = await asyncio.to_thread(
-                lambda: self.server.trades().for_asset(self.kale_asset).limit(10).call()
+                lambda: self.server.trades().for_asset_pair(self.kale_asset, Asset.native()).order(desc=True).limit(10).call()
             )
             
             if not trades['_embedded']['records']:
@@ -49,7 +58,7 @@ class PriceFetcher:
             
             return PriceData(
                 price=price,
-                timestamp=datetime.utcnow(),
+                timestamp=self.clock.utcnow(),
                 source=PriceSource.STELLAR,
                 volume=volume
             )
@@ -64,26 +73,29 @@ class PriceFetcher:
             logger.error(f"Unexpected error fetching Stellar price: {e}")
             return None
     
-    async def fetch_csv_price(self, csv_file: str = "test_prices.csv") -> Optional[PriceData]:
-        """Fetch price from CSV file as backup"""
+    async def fetch_csv_price(self, csv_file: Optional[str] = None) -> Optional[PriceData]:
+        """Fetch price from the CSV (or NDJSON) file as backup (PRICE_FILE by default)"""
+        csv_file = csv_file or settings.PRICE_FILE
         try:
             if not os.path.exists(csv_file):
                 logger.warning(f"CSV file {csv_file} not found")
                 return None
             
-            # Run pandas operations in thread pool
-            df = await asyncio.to_thread(pd.read_csv, csv_file)
+            source = self.file_sources.get(csv_file)
+            if source is None:
+                source = self.file_sources[csv_file] = PriceFileSource(csv_file)
+            # Only the last record is read, and only after the file changed
+            price = await asyncio.to_thread(source.latest)
             
-            if df.empty or 'price' not in df.columns:
+            if price is None:
                 logger.warning("CSV file is empty or missing 'price' column")
                 return None
             
-            price = float(df['price'].iloc[-1])
             logger.info(f"Successfully fetched KALE price from CSV: ${price:.6f}")
             
             return PriceData(
                 price=price,
-                timestamp=datetime.utcnow(),
+                timestamp=self.clock.utcnow(),
                 source=PriceSource.CSV
             )
             
@@ -100,24 +112,49 @@ class PriceFetcher:
         
         return PriceData(
             price=price,
-            timestamp=datetime.utcnow(),
+            timestamp=self.clock.utcnow(),
             source=PriceSource.HARDCODED
         )
     
-    async def fetch_current_price(self) -> PriceData:
+    def fetch_replay_price(self) -> Optional[PriceData]:
+        """Get the next recorded tick when running in replay mode"""
+        tick = self.replay_source.next_tick()
+        if tick is None:
+            return None
+        
+        return PriceData(
+            price=tick.price,
+            timestamp=tick.timestamp,
+            source=tick.source,
+            volume=tick.volume
+        )
+    
+    async def fetch_current_price(self) -> Optional[PriceData]:
         """Fetch current KALE price using multiple sources with fallback"""
+        if self.replay_source is not None:
+            return self.fetch_replay_price()
+        
         # Try Stellar network first
-        price_data = await self.fetch_stellar_price()
+        with tracer.start_as_current_span("fetch.stellar") as span:
+            started = time.perf_counter()
+            price_data = await self.fetch_stellar_price()
+            observe_fetch("stellar", started, price_data is not None)
+            span.set_attribute("fetch.success", price_data is not None)
         if price_data:
             return price_data
         
         # Fallback to CSV
-        price_data = await self.fetch_csv_price()
+        with tracer.start_as_current_span("fetch.csv") as span:
+            started = time.perf_counter()
+            price_data = await self.fetch_csv_price()
+            observe_fetch("csv", started, price_data is not None)
+            span.set_attribute("fetch.success", price_data is not None)
         if price_data:
             return price_data
         
         # Final fallback to hardcoded data
-        return self.fetch_hardcoded_price()
+        with tracer.start_as_current_span("fetch.hardcoded"):
+            return self.fetch_hardcoded_price()
 
 class TechnicalAnalyzer:
     """Service class for technical analysis calculations"""
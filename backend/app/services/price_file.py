@@ -0,0 +1,210 @@
+import asyncio
+import csv
+import json
+import logging
+import os
+from typing import Optional, List, Callable, Awaitable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bytes read per step while scanning backwards for the last line
+BLOCK_SIZE = 4096
+# A follow poll that finds more than this appended reads the tail instead
+MAX_FOLLOW_BYTES = 1 << 20
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+def _last_line(f, start: int) -> Optional[bytes]:
+    """Last non-blank line of a binary file, not looking before offset `start`"""
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    data = b""
+    while position > start:
+        step = min(BLOCK_SIZE, position - start)
+        position -= step
+        f.seek(position)
+        data = f.read(step) + data
+        stripped = data.rstrip(b"\r\n \t")
+        if b"\n" in stripped:
+            return stripped.rsplit(b"\n", 1)[1].rstrip(b"\r")
+    stripped = data.strip()
+    return stripped or None
+
+def _read_header(f) -> List[str]:
+    return next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+
+def _csv_value(line: bytes, fields: List[str], column: str) -> float:
+    row = next(csv.reader([line.decode("utf-8")]), [])
+    index = fields.index(column)
+    if index >= len(row):
+        raise ValueError(f"Last row has no '{column}' value")
+    return float(row[index])
+
+def _ndjson_value(line: bytes, column: str) -> float:
+    record = json.loads(line)
+    if not isinstance(record, dict) or column not in record:
+        raise ValueError(f"Last record has no '{column}' value")
+    return float(record[column])
+
+class PriceFileSource:
+    """
+    Fallback price source reading the newest record of a CSV or NDJSON file
+
+    The last price is cached with the file's inode, size and mtime and only
+    re-read (from the end of the file) when one of them changes, so a
+    fallback costs one stat regardless of file size. With follow() running,
+    appended rows are picked up in the background as they arrive, latest()
+    becomes a memory read, and listeners are called with every new price.
+    """
+
+    def __init__(self, path: str, column: str = "price", ndjson: Optional[bool] = None):
+        self.path = path
+        self.column = column
+        self.ndjson = path.lower().endswith(NDJSON_EXTENSIONS) if ndjson is None else ndjson
+        self.price: Optional[float] = None
+        self.fields: List[str] = []
+        self.listeners: List[Callable[[float], Awaitable[None]]] = []
+        self.follow_task: Optional[asyncio.Task] = None
+        self._signature: Optional[tuple] = None
+        self._offset = 0
+        self._partial = b""
+        self.stats = {"reads": 0, "cache_hits": 0, "rows_followed": 0, "errors": 0}
+
+    def add_listener(self, listener: Callable[[float], Awaitable[None]]):
+        """Register a coroutine called with each price appended while following"""
+        self.listeners.append(listener)
+
+    @property
+    def following(self) -> bool:
+        return self.follow_task is not None and not self.follow_task.done()
+
+    def latest(self) -> Optional[float]:
+        """
+        Price of the last record (None if the file is missing or has none)
+
+        Raises ValueError if that record cannot be parsed.
+        """
+        if self.following:
+            self.stats["cache_hits"] += 1
+            return self.price
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._signature = None
+            self.price = None
+            return None
+
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if signature == self._signature:
+            self.stats["cache_hits"] += 1
+            return self.price
+        self._read_tail(signature)
+        return self.price
+
+    def _read_tail(self, signature: tuple):
+        """Re-read the last record and remember where the file ended"""
+        self.stats["reads"] += 1
+        # Forget the old signature first so a parse error is retried on the next call
+        self._signature = None
+        self.price = None
+        with open(self.path, "rb") as f:
+            if self.ndjson:
+                line = _last_line(f, 0)
+            else:
+                self.fields = _read_header(f)
+                line = _last_line(f, f.tell()) if self.column in self.fields else None
+            self._offset = f.seek(0, os.SEEK_END)
+            # A last line without its newline may still be being written; follow() completes it
+            self._partial = b""
+            if line is not None and f.seek(-1, os.SEEK_END) >= 0 and f.read(1) != b"\n":
+                self._partial = line
+        if line is not None:
+            self.price = self._parse(line)
+        self._signature = signature
+
+    def _parse(self, line: bytes) -> float:
+        if self.ndjson:
+            return _ndjson_value(line, self.column)
+        return _csv_value(line, self.fields, self.column)
+
+    def _poll(self) -> List[float]:
+        """Read what was appended since the last poll; returns the new prices"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._signature = None
+            return []
+
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if signature == self._signature:
+            return []
+        grown = (self._signature is not None and self._offset > 0
+                 and stat.st_ino == self._signature[0] and stat.st_size > self._offset)
+        if not grown or stat.st_size - self._offset > MAX_FOLLOW_BYTES:
+            # First poll, empty, truncated or replaced file, or a burst too large to replay: jump to the tail
+            self._read_tail(signature)
+            return [self.price] if self.price is not None else []
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = self._partial + f.read(stat.st_size - self._offset)
+        self._offset = stat.st_size
+        self._signature = signature
+        *lines, self._partial = data.split(b"\n")
+
+        prices = []
+        for line in lines:
+            line = line.strip()
+            if not line or (not self.ndjson and self.column not in self.fields):
+                continue
+            try:
+                prices.append(self._parse(line))
+            except ValueError as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Skipping unparsable row in {self.path}: {e}")
+        if prices:
+            self.price = prices[-1]
+            self.stats["rows_followed"] += len(prices)
+        return prices
+
+    async def follow(self, interval: Optional[float] = None):
+        """Poll the file for appended rows until cancelled"""
+        interval = interval or settings.PRICE_FILE_POLL_INTERVAL
+        logger.info(f"Following price file {self.path}")
+        while True:
+            try:
+                prices = await asyncio.to_thread(self._poll)
+                for price in prices:
+                    for listener in self.listeners:
+                        await listener(price)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Error following price file {self.path}: {e}")
+            await asyncio.sleep(interval)
+
+    def start_following(self, interval: Optional[float] = None):
+        if not self.following:
+            self.follow_task = asyncio.create_task(self.follow(interval))
+
+    async def stop_following(self):
+        if self.follow_task:
+            self.follow_task.cancel()
+            try:
+                await self.follow_task
+            except asyncio.CancelledError:
+                pass
+            self.follow_task = None
+
+    def get_stats(self) -> dict:
+        return {
+            "path": self.path,
+            "format": "ndjson" if self.ndjson else "csv",
+            "following": self.following,
+            "last_price": self.price,
+            "offset": self._offset,
+            **self.stats
+        }
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, List
+
+from sqlalchemy import select, insert, func, desc
+
+from app.core.config import settings
+from app.core.tracing import tracer
+from app.db.database import AsyncSessionLocal
+from app.db.models import PriceRecord
+from app.models.price import PriceData
+
+logger = logging.getLogger(__name__)
+
+def history_statement(start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None,
+                      source: Optional[str] = None,
+                      limit: int = 100):
+    """Newest-first range query served by ix_price_records_timestamp_id (or the source index)"""
+    stmt = select(PriceRecord).order_by(desc(PriceRecord.timestamp), PriceRecord.id)
+    if source:
+        stmt = stmt.where(PriceRecord.source == source)
+    if start_date:
+        stmt = stmt.where(PriceRecord.timestamp >= start_date)
+    if end_date:
+        stmt = stmt.where(PriceRecord.timestamp <= end_date)
+    return stmt.limit(limit)
+
+def since_statement(start_date: datetime):
+    """Oldest-first query for every tick from `start_date` on"""
+    return select(PriceRecord).where(PriceRecord.timestamp >= start_date).order_by(PriceRecord.timestamp)
+
+class PriceStore:
+    """
+    Price tick storage shared by the tracker and the price monitor
+
+    Ticks are buffered in memory and written with one bulk insert per flush
+    (every PRICE_STORE_FLUSH_INTERVAL seconds or PRICE_STORE_BATCH_SIZE ticks),
+    so ingest holds the write lock briefly and readers are not blocked. Reads
+    include buffered ticks that have not been flushed yet.
+    """
+
+    def __init__(self,
+                 batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None):
+        self.batch_size = batch_size or settings.PRICE_STORE_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.PRICE_STORE_FLUSH_INTERVAL
+        self._buffer: List[PriceData] = []
+        self._flushing: List[PriceData] = []  # Being written; still visible to reads
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.is_running = False
+        self.ticks_written = 0
+        # Odd while a flush may be committing; readers retry if it changes under them
+        self._flush_generation = 0
+
+    @property
+    def pending(self) -> int:
+        """Ticks buffered for the next flush"""
+        return len(self._buffer)
+
+    async def start(self):
+        """Start the periodic flush loop"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        logger.info("Price store started")
+
+    async def stop(self):
+        """Stop the flush loop and write any buffered ticks"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        logger.info("Price store stopped")
+
+    async def add(self, price_data: PriceData):
+        """Buffer a tick, flushing once a full batch is waiting"""
+        self._buffer.append(price_data)
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def add_many(self, prices: List[PriceData]):
+        """Buffer many ticks and flush them"""
+        self._buffer.extend(prices)
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write buffered ticks in bulk, returning how many were written"""
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+
+            batch = self._buffer
+            self._buffer = []
+            self._flushing = batch
+            rows = [
+                {"price": p.price, "timestamp": p.timestamp, "source": p.source, "volume": p.volume}
+                for p in batch
+            ]
+            self._flush_generation += 1
+            try:
+                with tracer.start_as_current_span("price_store.flush") as span:
+                    span.set_attribute("price_store.ticks", len(rows))
+                    async with AsyncSessionLocal() as session:
+                        for start in range(0, len(rows), self.batch_size):
+                            await session.execute(insert(PriceRecord), rows[start:start + self.batch_size])
+                        await session.commit()
+            except Exception as e:
+                logger.error(f"Error writing {len(rows)} price records: {e}")
+                # Keep the ticks for the next flush, ahead of anything buffered since
+                self._buffer = batch + self._buffer
+                return 0
+            finally:
+                self._flushing = []
+                self._flush_generation += 1
+
+            self.ticks_written += len(rows)
+            return len(rows)
+
+    async def _flush_loop(self):
+        while self.is_running:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error in price store flush loop: {e}")
+
+    def _pending(self,
+                 start_date: Optional[datetime] = None,
+                 end_date: Optional[datetime] = None,
+                 source: Optional[str] = None) -> List[PriceData]:
+        return [
+            p for p in self._flushing + self._buffer
+            if (not start_date or p.timestamp >= start_date) and (not end_date or p.timestamp <= end_date)
+            and (not source or p.source == source)
+        ]
+
+    async def get_latest(self) -> Optional[PriceData]:
+        """Most recent tick"""
+        if self._buffer or self._flushing:
+            return (self._flushing + self._buffer)[-1]
+        history = await self.get_history(limit=1)
+        return history[-1] if history else None
+
+    async def get_history(self,
+                          start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None,
+                          limit: int = 100,
+                          offset: int = 0,
+                          source: Optional[str] = None) -> List[PriceData]:
+        """The newest `limit` ticks in the range (skipping `offset`), oldest first"""
+        wanted = limit + offset
+
+        async def query(pending: List[PriceData]) -> List[PriceData]:
+            if len(pending) >= wanted:
+                return []
+            async with AsyncSessionLocal() as session:
+                stmt = history_statement(start_date, end_date, source, limit=wanted - len(pending))
+                result = await session.execute(stmt)
+                return [PriceData.model_validate(row) for row in reversed(result.scalars().all())]
+
+        stored, pending = await self._read_consistent(query, start_date, end_date, source)
+        merged = stored + pending
+        end = len(merged) - offset
+        return merged[max(0, end - limit):max(0, end)]
+
+    async def get_prices_since(self, start_date: datetime) -> List[PriceData]:
+        """Every tick from `start_date` on, oldest first"""
+        async def query(pending: List[PriceData]) -> List[PriceData]:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(since_statement(start_date))
+                return [PriceData.model_validate(row) for row in result.scalars().all()]
+
+        stored, pending = await self._read_consistent(query, start_date)
+        return stored + pending
+
+    async def _read_consistent(self, query, start_date=None, end_date=None, source=None):
+        """Run a stored-tick query with a buffer snapshot no flush committed in between"""
+        while True:
+            generation = self._flush_generation
+            if generation % 2:
+                await asyncio.sleep(0.001)  # A flush is committing
+                continue
+            pending = self._pending(start_date, end_date, source)
+            stored = await query(pending)
+            if self._flush_generation == generation:
+                return stored, pending
+
+    async def oldest_timestamp(self) -> Optional[datetime]:
+        """Timestamp of the oldest stored or buffered tick"""
+        async with AsyncSessionLocal() as session:
+            oldest = (await session.execute(select(func.min(PriceRecord.timestamp)))).scalar()
+        pending = self._flushing + self._buffer
+        if pending:
+            oldest = min(filter(None, [oldest, pending[0].timestamp]))
+        return oldest
+
+    async def count(self) -> int:
+        """Number of stored ticks, including buffered ones"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(func.count(PriceRecord.id)))
+            return result.scalar() + len(self._buffer)  # Flushing ticks are not committed yet
+
+_price_store: Optional[PriceStore] = None
+
+def get_price_store() -> PriceStore:
+    """Shared price store used by the tracker, the price monitor and the API"""
+    global _price_store
+    if _price_store is None:
+        _price_store = PriceStore()
+    return _price_store
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, List, Callable, Sequence
+
+from app.models.price import PriceData
+from app.services.price_archive import PriceArchive, get_price_archive
+from app.services.price_store import PriceStore, get_price_store
+from app.services.tick_series import bisect_timestamp
+
+logger = logging.getLogger(__name__)
+
+class TieredPriceHistory:
+    """
+    One history query API over the three price tiers
+
+    - hot: the tracker's in-memory ring of recent ticks
+    - warm: the SQL price store (RAW_PRICE_RETENTION_DAYS of ticks)
+    - cold: the Parquet archive of everything the retention job expired
+
+    A range the ring fully answers never touches the database. Otherwise the
+    warm tier serves the newest ticks and the archive fills in the part of
+    the range older than the oldest stored tick.
+    """
+
+    def __init__(self,
+                 hot: Callable[[], Sequence],
+                 price_store: Optional[PriceStore] = None,
+                 archive: Optional[PriceArchive] = None):
+        """
+        Args:
+            hot: Returns the in-memory ticks (oldest first, each with price/timestamp/source)
+            price_store: Warm tier
+            archive: Cold tier
+        """
+        self.hot = hot
+        self.price_store = price_store or get_price_store()
+        self.archive = archive or get_price_archive()
+        self.tier_reads = {"hot": 0, "warm": 0, "cold": 0}
+
+    def _from_hot(self,
+                  start_date: Optional[datetime],
+                  end_date: Optional[datetime],
+                  limit: int) -> Optional[List[PriceData]]:
+        """Answer from the ring, or None if the range reaches past it"""
+        ring = self.hot()
+        if not ring:
+            return None
+
+        lo = bisect_timestamp(ring, start_date) if start_date else 0
+        hi = bisect_timestamp(ring, end_date, right=True) if end_date else len(ring)
+        covers_start = start_date is not None and start_date >= ring[0].timestamp
+        if not covers_start and hi - lo < limit:
+            return None
+
+        return [
+            PriceData(price=p.price, timestamp=p.timestamp, source=p.source)
+            for p in ring[max(lo, hi - limit):hi]
+        ]
+
+    async def get_history(self,
+                          start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None,
+                          limit: int = 100) -> List[PriceData]:
+        """The newest `limit` ticks in the range across all tiers, oldest first"""
+        hot = self._from_hot(start_date, end_date, limit)
+        if hot is not None:
+            self.tier_reads["hot"] += 1
+            return hot
+
+        warm = await self.price_store.get_history(start_date, end_date, limit=limit)
+        self.tier_reads["warm"] += 1
+        if len(warm) >= limit or not self.archive.enabled:
+            return warm
+
+        oldest_stored = warm[0].timestamp if warm else await self.price_store.oldest_timestamp()
+        if start_date and oldest_stored and start_date >= oldest_stored:
+            return warm  # The warm tier holds the whole range
+
+        cold = await asyncio.to_thread(
+            self.archive.read_range, start_date, end_date, limit - len(warm), oldest_stored
+        )
+        if cold:
+            self.tier_reads["cold"] += 1
+        return cold + warm
+
+    async def get_prices_since(self, start_date: datetime) -> List[PriceData]:
+        """Every tick from `start_date` on (statistics windows), from the ring when it reaches back far enough"""
+        ring = self.hot()
+        if ring and start_date >= ring[0].timestamp:
+            self.tier_reads["hot"] += 1
+            lo = bisect_timestamp(ring, start_date)
+            return [PriceData(price=p.price, timestamp=p.timestamp, source=p.source) for p in ring[lo:]]
+
+        self.tier_reads["warm"] += 1
+        return await self.price_store.get_prices_since(start_date)
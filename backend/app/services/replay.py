@@ -0,0 +1,225 @@
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, List
+
+logger = logging.getLogger(__name__)
+
+
+class SystemClock:
+    """Wall clock used by the live price pipeline"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def utcnow(self) -> datetime:
+        return datetime.utcnow()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class ReplayClock:
+    """Virtual clock driven by recorded tick timestamps
+
+    Time only moves when the replay advances it, and sleeps are
+    compressed by the configured speed-up factor.
+    """
+
+    def __init__(self, start: Optional[datetime] = None, speedup: float = 1.0):
+        if speedup <= 0:
+            raise ValueError("Replay speed-up must be positive")
+        self.speedup = speedup
+        self._current = start or datetime.utcnow()
+
+    def now(self) -> datetime:
+        return self._current
+
+    def utcnow(self) -> datetime:
+        return self._current
+
+    def advance_to(self, timestamp: datetime) -> None:
+        """Move virtual time forward (never backwards)"""
+        if timestamp > self._current:
+            self._current = timestamp
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(max(seconds, 0) / self.speedup)
+
+
+@dataclass
+class RecordedTick:
+    """A single tick read from a recording"""
+    price: float
+    timestamp: datetime
+    source: str
+    volume: Optional[float] = None
+
+
+def load_recorded_ticks(path: str) -> List[RecordedTick]:
+    """
+    Load recorded ticks from a file
+
+    Supports the tracker's ``price_history.json`` format, newline-delimited
+    JSON (``.ndjson``/``.jsonl``) and CSV files with ``timestamp`` and
+    ``price`` columns (``source`` and ``volume`` are optional).
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Replay file {path} not found")
+
+    extension = os.path.splitext(path)[1].lower()
+    rows = []
+
+    with open(path, 'r', newline='') as f:
+        if extension == '.json':
+            rows = json.load(f)
+        elif extension in ('.ndjson', '.jsonl'):
+            rows = [json.loads(line) for line in f if line.strip()]
+        elif extension == '.csv':
+            rows = list(csv.DictReader(f))
+        else:
+            raise ValueError(f"Unsupported replay file format: {extension}")
+
+    ticks = []
+    for row in rows:
+        volume = row.get('volume')
+        ticks.append(RecordedTick(
+            price=float(row['price']),
+            timestamp=datetime.fromisoformat(str(row['timestamp'])),
+            source=row.get('source') or 'replay',
+            volume=float(volume) if volume not in (None, '') else None
+        ))
+
+    ticks.sort(key=lambda tick: tick.timestamp)
+    return ticks
+
+
+class ReplaySource:
+    """Feeds recorded ticks into the price pipeline in place of live sources"""
+
+    def __init__(self,
+                 ticks: List[RecordedTick],
+                 speedup: float = 1.0,
+                 loop: bool = False):
+        """
+        Initialize the replay source
+
+        Args:
+            ticks: Recorded ticks in chronological order
+            speedup: Replay speed relative to the recording (1x - 1000x)
+            loop: Restart from the first tick once the recording is exhausted
+        """
+        if not ticks:
+            raise ValueError("Replay recording contains no ticks")
+
+        self.ticks = ticks
+        self.loop = loop
+        self.clock = ReplayClock(start=ticks[0].timestamp, speedup=speedup)
+        self.position = 0
+        self.ticks_replayed = 0
+        self.started_at: Optional[float] = None
+        self._time_offset = timedelta(0)
+
+    @classmethod
+    def from_file(cls, path: str, speedup: float = 1.0, loop: bool = False) -> "ReplaySource":
+        """Create a replay source from a recorded tick file"""
+        ticks = load_recorded_ticks(path)
+        logger.info(f"Loaded {len(ticks)} recorded ticks from {path} (speed-up {speedup}x)")
+        return cls(ticks, speedup=speedup, loop=loop)
+
+    @property
+    def speedup(self) -> float:
+        return self.clock.speedup
+
+    @property
+    def exhausted(self) -> bool:
+        return not self.loop and self.position >= len(self.ticks)
+
+    def next_tick(self) -> Optional[RecordedTick]:
+        """Return the next recorded tick and move the clock to its timestamp"""
+        if self.position >= len(self.ticks):
+            if not self.loop:
+                return None
+            # Shift the next pass so timestamps keep increasing
+            self._time_offset += self.ticks[-1].timestamp - self.ticks[0].timestamp + self._first_gap()
+            self.position = 0
+
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+
+        recorded = self.ticks[self.position]
+        self.position += 1
+        self.ticks_replayed += 1
+
+        tick = RecordedTick(
+            price=recorded.price,
+            timestamp=recorded.timestamp + self._time_offset,
+            source=recorded.source,
+            volume=recorded.volume
+        )
+        self.clock.advance_to(tick.timestamp)
+        return tick
+
+    def _first_gap(self) -> timedelta:
+        if len(self.ticks) > 1:
+            return self.ticks[1].timestamp - self.ticks[0].timestamp
+        return timedelta(seconds=1)
+
+    def seconds_until_next(self, default: float) -> float:
+        """Recorded gap between the last replayed tick and the next one"""
+        if 0 < self.position < len(self.ticks):
+            gap = self.ticks[self.position].timestamp - self.ticks[self.position - 1].timestamp
+            return max(gap.total_seconds(), 0.0)
+        if self.loop and self.position == len(self.ticks):
+            return self._first_gap().total_seconds()
+        return default
+
+    def get_stats(self) -> dict:
+        """Replay progress and achieved throughput"""
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return {
+            "total_ticks": len(self.ticks),
+            "ticks_replayed": self.ticks_replayed,
+            "speedup": self.speedup,
+            "loop": self.loop,
+            "exhausted": self.exhausted,
+            "elapsed_seconds": round(elapsed, 3),
+            "ticks_per_second": round(self.ticks_replayed / elapsed, 2) if elapsed > 0 else 0.0
+        }
+
+
+async def run_replay(path: str, speedup: float = 1000.0) -> dict:
+    """Drive a tracker service from a recording until it is exhausted"""
+    from app.services.tracker_service import TrackerService
+
+    service = TrackerService(replay_file=path, replay_speedup=speedup)
+    await service.start_background_monitoring()
+    try:
+        while service.is_running and not service.replay_source.exhausted:
+            await asyncio.sleep(0.1)
+    finally:
+        await service.stop_background_monitoring()
+
+    return service.replay_source.get_stats()
+
+
+def main():
+    """Replay a recorded tick file through the price pipeline and report throughput"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay recorded KALE price ticks")
+    parser.add_argument("file", help="Recorded tick file (.json, .ndjson or .csv)")
+    parser.add_argument("--speedup", type=float, default=1000.0, help="Replay speed-up (1-1000)")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run_replay(args.file, args.speedup))
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+
+from sqlalchemy import select, delete, func
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import PriceRecord, PriceCandle, TechnicalIndicator
+from app.services.price_archive import PriceArchive, get_price_archive
+
+logger = logging.getLogger(__name__)
+
+class RetentionService:
+    """
+    Time-window retention for stored prices
+
+    Raw ticks older than RAW_PRICE_RETENTION_DAYS are rolled up into candles,
+    copied to the Parquet archive (when enabled) and deleted one candle
+    interval at a time, each interval in its own short transaction on the
+    timestamp index. Candles are kept for CANDLE_RETENTION_DAYS. Runs on its
+    own schedule, off the ingest path.
+    """
+
+    def __init__(self,
+                 raw_retention: Optional[timedelta] = None,
+                 candle_retention: Optional[timedelta] = None,
+                 candle_interval: Optional[int] = None,
+                 archive: Optional[PriceArchive] = None):
+        self.raw_retention = raw_retention or timedelta(days=settings.RAW_PRICE_RETENTION_DAYS)
+        self.candle_retention = candle_retention or timedelta(days=settings.CANDLE_RETENTION_DAYS)
+        self.candle_interval = candle_interval or settings.CANDLE_INTERVAL_SECONDS
+        self.archive = archive or get_price_archive()
+        self.background_task: Optional[asyncio.Task] = None
+        self.is_running = False
+        self.last_run: Optional[datetime] = None
+        self.stats = {"runs": 0, "ticks_deleted": 0, "candles_written": 0,
+                      "candles_deleted": 0, "indicators_deleted": 0}
+
+    async def start(self):
+        """Start the periodic retention loop"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self.background_task = asyncio.create_task(self._retention_loop())
+        logger.info("Retention service started")
+
+    async def stop(self):
+        """Stop the retention loop"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        if self.background_task:
+            self.background_task.cancel()
+            try:
+                await self.background_task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Retention service stopped")
+
+    async def _retention_loop(self):
+        while self.is_running:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Error in retention run: {e}")
+            await asyncio.sleep(settings.RETENTION_INTERVAL)
+
+    def _bucket_start(self, timestamp: datetime) -> datetime:
+        """Start of the candle interval containing `timestamp`"""
+        day = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        seconds = int((timestamp - day).total_seconds())
+        return day + timedelta(seconds=seconds - seconds % self.candle_interval)
+
+    async def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Apply the retention windows once, returning what was removed"""
+        now = now or datetime.utcnow()
+        raw_cutoff = self._bucket_start(now - self.raw_retention)
+        result = {"ticks_deleted": 0, "candles_written": 0, "candles_deleted": 0, "indicators_deleted": 0}
+
+        # Roll up and delete expired ticks one whole candle interval at a time
+        for _ in range(settings.RETENTION_MAX_CHUNKS_PER_RUN):
+            async with AsyncSessionLocal() as session:
+                oldest = (await session.execute(select(func.min(PriceRecord.timestamp)))).scalar()
+            if oldest is None or oldest >= raw_cutoff:
+                break
+            bucket_start = self._bucket_start(oldest)
+            result["ticks_deleted"] += await self._expire_bucket(bucket_start)
+            result["candles_written"] += 1
+            await asyncio.sleep(0)  # Let ingest and reads run between chunks
+
+        async with AsyncSessionLocal() as session:
+            deleted = await session.execute(
+                delete(TechnicalIndicator).where(TechnicalIndicator.timestamp < raw_cutoff)
+            )
+            result["indicators_deleted"] = deleted.rowcount
+            deleted = await session.execute(
+                delete(PriceCandle).where(PriceCandle.bucket_start < now - self.candle_retention)
+            )
+            result["candles_deleted"] = deleted.rowcount
+            await session.commit()
+
+        for key, value in result.items():
+            self.stats[key] += value
+        self.stats["runs"] += 1
+        self.last_run = now
+        if any(result.values()):
+            logger.info(f"Retention run: {result}")
+        return result
+
+    async def _expire_bucket(self, bucket_start: datetime) -> int:
+        """Fold one interval of ticks into its candle, archive them and delete them in one transaction"""
+        bucket_end = bucket_start + timedelta(seconds=self.candle_interval)
+        in_bucket = (PriceRecord.timestamp >= bucket_start) & (PriceRecord.timestamp < bucket_end)
+
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(
+                select(PriceRecord.timestamp, PriceRecord.price, PriceRecord.source, PriceRecord.volume)
+                .where(in_bucket)
+                .order_by(PriceRecord.timestamp)
+            )).all()
+            if not rows:
+                return 0
+            
+            if self.archive.enabled:
+                # Written before the delete commits; a failure leaves the ticks in place
+                await asyncio.to_thread(self.archive.write_bucket, bucket_start, rows)
+
+            prices = [row.price for row in rows]
+            volumes = [row.volume for row in rows if row.volume is not None]
+            candle = await session.get(PriceCandle, (self.candle_interval, bucket_start))
+            if candle is None:
+                session.add(PriceCandle(
+                    interval_seconds=self.candle_interval,
+                    bucket_start=bucket_start,
+                    open=prices[0],
+                    high=max(prices),
+                    low=min(prices),
+                    close=prices[-1],
+                    volume=sum(volumes) if volumes else None,
+                    tick_count=len(prices)
+                ))
+            else:
+                # Late ticks for an interval that was already rolled up
+                candle.high = max(candle.high, *prices)
+                candle.low = min(candle.low, *prices)
+                candle.close = prices[-1]
+                if volumes:
+                    candle.volume = (candle.volume or 0.0) + sum(volumes)
+                candle.tick_count += len(prices)
+
+            await session.execute(delete(PriceRecord).where(in_bucket))
+            await session.commit()
+            return len(prices)
+
+    async def get_candles(self,
+                          start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None,
+                          limit: int = 500):
+        """Stored candles in the range, oldest first"""
+        async with AsyncSessionLocal() as session:
+            stmt = select(PriceCandle).where(PriceCandle.interval_seconds == self.candle_interval)
+            if start_date:
+                stmt = stmt.where(PriceCandle.bucket_start >= start_date)
+            if end_date:
+                stmt = stmt.where(PriceCandle.bucket_start <= end_date)
+            stmt = stmt.order_by(PriceCandle.bucket_start.desc()).limit(limit)
+            return list(reversed((await session.execute(stmt)).scalars().all()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retention windows and totals removed so far"""
+        return {
+            **self.stats,
+            "running": self.is_running,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "raw_retention_days": self.raw_retention.days,
+            "candle_retention_days": self.candle_retention.days,
+            "candle_interval_seconds": self.candle_interval
+        }
+
+_retention_service: Optional[RetentionService] = None
+
+def get_retention_service() -> RetentionService:
+    """Shared retention service used by the API endpoints and the app lifespan"""
+    global _retention_service
+    if _retention_service is None:
+        _retention_service = RetentionService()
+    return _retention_service
@@ -0,0 +1,334 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+import httpx
+from stellar_sdk import StrKey
+
+from app.core.config import settings
+from app.services.contract_integration import SorobanContractClient, SorobanRPCError
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PendingSession:
+    """A farming session waiting to be recorded on-chain"""
+    session_id: str
+    farmer_address: str
+    stake_amount: float
+    success: bool
+    reward: float
+    queued_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    attempts: int = 0
+
+class ChannelAccount:
+    """
+    A source account used to submit session transactions
+
+    Each channel hands out its own consecutive sequence numbers, so several
+    channels can have transactions in the same ledger.
+    """
+
+    def __init__(self, account_id: str):
+        self.account_id = account_id
+        self.sequence: Optional[int] = None
+        self.lock = asyncio.Lock()
+
+    async def sync(self, http_client: httpx.AsyncClient, live: bool):
+        """Load the current sequence number from Horizon (0 for simulated accounts)"""
+        if not live or not StrKey.is_valid_ed25519_public_key(self.account_id):
+            self.sequence = self.sequence or 0
+            return
+        response = await http_client.get(f"{settings.STELLAR_HORIZON_URL}/accounts/{self.account_id}")
+        response.raise_for_status()
+        self.sequence = int(response.json()["sequence"])
+
+    def next_sequence(self) -> int:
+        self.sequence += 1
+        return self.sequence
+
+    def release_sequence(self):
+        """Give back the last sequence number after a rejected submission"""
+        if self.sequence is not None:
+            self.sequence -= 1
+
+class SessionSpool:
+    """
+    Append-only NDJSON log of queued and recorded sessions
+
+    A session is pending until its "ack" line is written, so sessions queued
+    before a crash or restart are submitted again on startup.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0  # Lines written since the last compaction
+
+    def recover(self) -> List[PendingSession]:
+        """Sessions that were queued but never acknowledged, in queue order"""
+        if not os.path.exists(self.path):
+            return []
+
+        pending: Dict[str, PendingSession] = {}
+        with open(self.path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt line in session spool {self.path}")
+                    continue
+                if record.get("op") == "add":
+                    session = PendingSession(**record["session"])
+                    # Retries are counted per start; a session given up on gets a fresh budget
+                    session.attempts = 0
+                    pending[session.session_id] = session
+                elif record.get("op") == "ack":
+                    pending.pop(record["session_id"], None)
+                self.records += 1
+        return list(pending.values())
+
+    def append(self, records: List[Dict[str, Any]]):
+        with open(self.path, 'a') as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            if settings.SESSION_SPOOL_FSYNC:
+                os.fsync(f.fileno())
+        self.records += len(records)
+
+    def rewrite(self, sessions: List[PendingSession]):
+        """Compact the spool down to the given pending sessions"""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            for session in sessions:
+                f.write(json.dumps({"op": "add", "session": asdict(session)}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self.records = len(sessions)
+
+class SessionWriteBehindQueue:
+    """Groups farming session records into batched on-chain submissions"""
+
+    def __init__(self,
+                 contract_client: Optional[SorobanContractClient] = None,
+                 spool_file: Optional[str] = None,
+                 batch_size: Optional[int] = None,
+                 linger: Optional[float] = None,
+                 max_retries: Optional[int] = None,
+                 channel_accounts: Optional[List[str]] = None):
+        """
+        Initialize the write-behind queue
+
+        Args:
+            contract_client: Client used to submit sessions
+            spool_file: NDJSON file sessions are spooled to before submission
+            batch_size: Maximum sessions per batch
+            linger: Seconds to wait for a batch to fill after its first session
+            max_retries: Submission attempts per session before it is left for the next start
+            channel_accounts: Source accounts sessions are spread across
+        """
+        self.contract_client = contract_client or SorobanContractClient()
+        self.spool = SessionSpool(spool_file or settings.SESSION_SPOOL_FILE)
+        self.batch_size = batch_size or settings.SESSION_BATCH_SIZE
+        self.linger = settings.SESSION_BATCH_LINGER if linger is None else linger
+        self.max_retries = max_retries or settings.SESSION_MAX_RETRIES
+
+        accounts = channel_accounts or [a.strip() for a in settings.SESSION_CHANNEL_ACCOUNTS.split(",") if a.strip()]
+        self.channels = [ChannelAccount(account) for account in accounts or ["operator"]]
+
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.in_flight = 0
+        self.background_task: Optional[asyncio.Task] = None
+        self.is_running = False
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._spool_lock = asyncio.Lock()
+        self._failed: List[PendingSession] = []
+        self.stats = {"queued": 0, "recorded": 0, "failed": 0, "batches": 0, "retries": 0}
+
+    async def start(self):
+        """Recover spooled sessions and start the submission loop"""
+        if self.is_running:
+            logger.warning("Session write-behind queue is already running")
+            return
+
+        recovered = await asyncio.to_thread(self.spool.recover)
+        await asyncio.to_thread(self.spool.rewrite, recovered)
+        for session in recovered:
+            self.queue.put_nowait(session)
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} spooled farming sessions")
+
+        self._http_client = httpx.AsyncClient(timeout=settings.SOROBAN_RPC_TIMEOUT)
+        self.is_running = True
+        self.background_task = asyncio.create_task(self._writer_loop())
+        logger.info(f"Session write-behind queue started with {len(self.channels)} channel account(s)")
+
+    async def stop(self, drain: bool = True):
+        """Stop the submission loop, first flushing queued sessions if `drain`"""
+        if not self.is_running:
+            return
+
+        if drain:
+            await self.flush()
+        self.is_running = False
+        if self.background_task:
+            self.background_task.cancel()
+            try:
+                await self.background_task
+            except asyncio.CancelledError:
+                pass
+        if self._http_client:
+            await self._http_client.aclose()
+            self._http_client = None
+        logger.info("Session write-behind queue stopped")
+
+    async def enqueue(self,
+                      farmer_address: str,
+                      stake_amount: float,
+                      success: bool,
+                      reward: float) -> str:
+        """Spool a session and queue it for submission, returning its id"""
+        session = PendingSession(
+            session_id=uuid.uuid4().hex,
+            farmer_address=farmer_address,
+            stake_amount=stake_amount,
+            success=success,
+            reward=reward
+        )
+        async with self._spool_lock:
+            await asyncio.to_thread(self.spool.append, [{"op": "add", "session": asdict(session)}])
+            self.queue.put_nowait(session)
+        self.stats["queued"] += 1
+        return session.session_id
+
+    async def flush(self, timeout: float = 30.0):
+        """Wait until every queued session has been submitted (or given up on)"""
+        deadline = asyncio.get_running_loop().time() + timeout
+        while (self.queue.qsize() or self.in_flight) and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.05)
+
+    async def _writer_loop(self):
+        """Collect sessions into batches and submit them"""
+        while self.is_running:
+            try:
+                batch = await self._next_batch()
+                self.in_flight = len(batch)
+                try:
+                    await self._submit_batch(batch)
+                finally:
+                    self.in_flight = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in session write-behind loop: {e}")
+                await asyncio.sleep(1)
+
+    async def _next_batch(self) -> List[PendingSession]:
+        """Wait for a session, then take up to batch_size within the linger window"""
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _submit_batch(self, batch: List[PendingSession]):
+        """Spread a batch over the channel accounts and submit each lane in sequence order"""
+        lanes: List[List[PendingSession]] = [[] for _ in self.channels]
+        for i, session in enumerate(batch):
+            lanes[i % len(self.channels)].append(session)
+
+        results = await asyncio.gather(*(
+            self._submit_lane(channel, sessions)
+            for channel, sessions in zip(self.channels, lanes) if sessions
+        ))
+        recorded = [session_id for lane_recorded in results for session_id in lane_recorded]
+
+        async with self._spool_lock:
+            if recorded:
+                await asyncio.to_thread(self.spool.append, [{"op": "ack", "session_id": sid} for sid in recorded])
+            if self.queue.empty() and self.spool.records >= settings.SESSION_SPOOL_COMPACT_RECORDS:
+                # Only given-up sessions are pending: compact the spool down to them
+                await asyncio.to_thread(self.spool.rewrite, list(self._failed))
+        self.stats["batches"] += 1
+        self.stats["recorded"] += len(recorded)
+
+    async def _submit_lane(self, channel: ChannelAccount, sessions: List[PendingSession]) -> List[str]:
+        """Submit sessions from one channel account, returning the recorded session ids"""
+        recorded = []
+        async with channel.lock:
+            for session in sessions:
+                if await self._submit_session(channel, session):
+                    recorded.append(session.session_id)
+        return recorded
+
+    async def _submit_session(self, channel: ChannelAccount, session: PendingSession) -> bool:
+        """Submit one session with retries and exponential backoff"""
+        while session.attempts < self.max_retries:
+            session.attempts += 1
+            try:
+                if channel.sequence is None:
+                    await channel.sync(self._http_client, self.contract_client.is_live)
+
+                await self.contract_client.record_farming_session(
+                    session.farmer_address,
+                    session.stake_amount,
+                    session.success,
+                    session.reward,
+                    source_account=channel.account_id,
+                    sequence=channel.next_sequence()
+                )
+                return True
+            except SorobanRPCError as e:
+                logger.warning(f"Session {session.session_id} attempt {session.attempts} failed: {e}")
+                if "txBadSeq" in str(e):
+                    # Another submitter used this account: reload the sequence before retrying
+                    channel.sequence = None
+                else:
+                    channel.release_sequence()
+            except Exception as e:
+                logger.warning(f"Session {session.session_id} attempt {session.attempts} failed: {e}")
+                channel.release_sequence()
+
+            if session.attempts < self.max_retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(settings.SESSION_RETRY_BACKOFF * 2 ** (session.attempts - 1))
+
+        logger.error(f"Giving up on session {session.session_id} after {session.attempts} attempts; "
+                     f"it stays spooled for the next start")
+        self.stats["failed"] += 1
+        self._failed.append(session)
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and submission counters"""
+        return {
+            **self.stats,
+            "pending": self.queue.qsize() + self.in_flight,
+            "spooled_failures": len(self._failed),
+            "channels": len(self.channels),
+            "batch_size": self.batch_size,
+            "linger_seconds": self.linger
+        }
+
+_session_queue: Optional[SessionWriteBehindQueue] = None
+
+def get_session_queue() -> SessionWriteBehindQueue:
+    """Shared write-behind queue used by the API endpoints and the app lifespan"""
+    global _session_queue
+    if _session_queue is None:
+        _session_queue = SessionWriteBehindQueue()
+    return _session_queue
@@ -0,0 +1,394 @@
+import bisect
+import struct
+from collections import OrderedDict
+from datetime import datetime, timedelta, tzinfo
+from typing import Optional, List, Dict, Iterable, Iterator, Tuple, Union, Any
+
+from app.core.config import settings
+from app.services.kale_tracker import PriceData
+
+EPOCH = datetime(1970, 1, 1)
+_DOUBLE = struct.Struct(">d")
+_UINT64 = struct.Struct(">Q")
+
+# Delta-of-delta buckets: (control bits, control length, value bits)
+_DOD_BUCKETS = [(0b10, 2, 7), (0b110, 3, 12), (0b1110, 4, 20), (0b11110, 5, 32), (0b11111, 5, 64)]
+
+def _dod_table() -> List[Tuple[int, int]]:
+    """(control length, value bits) for every 5-bit peek at a delta-of-delta"""
+    table = []
+    for peek in range(32):
+        if not peek & 0b10000:
+            table.append((1, 0))
+            continue
+        for control, length, bits in _DOD_BUCKETS:
+            if peek >> (5 - length) == control:
+                table.append((length, bits))
+                break
+    return table
+
+_DOD_TABLE = _dod_table()
+
+def _to_bits(value: float) -> int:
+    return _UINT64.unpack(_DOUBLE.pack(value))[0]
+
+def _from_bits(bits: int) -> float:
+    return _DOUBLE.unpack(_UINT64.pack(bits))[0]
+
+class _BitWriter:
+    """Appends bit fields to a bytearray"""
+
+    __slots__ = ("data", "acc", "nbits")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.acc = 0
+        self.nbits = 0
+
+    def write(self, value: int, nbits: int):
+        self.acc = (self.acc << nbits) | (value & ((1 << nbits) - 1))
+        self.nbits += nbits
+        while self.nbits >= 8:
+            self.nbits -= 8
+            self.data.append((self.acc >> self.nbits) & 0xFF)
+        self.acc &= (1 << self.nbits) - 1
+
+    def getvalue(self) -> bytes:
+        if self.nbits:
+            self.data.append((self.acc << (8 - self.nbits)) & 0xFF)
+            self.acc = self.nbits = 0
+        # Padding so the reader can always peek a full control field
+        return bytes(self.data) + bytes(9)
+
+class _SealedBlock:
+    """A full, immutable block of encoded ticks"""
+
+    __slots__ = ("data", "count", "first_micros", "last_micros", "block_id")
+
+    def __init__(self, data: bytes, count: int, first_micros: int, last_micros: int, block_id: int):
+        self.data = data
+        self.count = count
+        self.first_micros = first_micros
+        self.last_micros = last_micros
+        self.block_id = block_id
+
+def encode_block(micros: List[int], prices: List[float], codes: List[int]) -> bytes:
+    """
+    Encode ticks Gorilla-style
+
+    Timestamps are delta-of-delta coded in variable-width buckets, prices are
+    XORed with the previous price keeping only the meaningful bits, and
+    source codes are one bit when unchanged.
+    """
+    writer = _BitWriter()
+    writer.write(micros[0], 64)
+    writer.write(_to_bits(prices[0]), 64)
+    writer.write(codes[0], 16)
+
+    prev_time, prev_delta = micros[0], 0
+    prev_bits, prev_lead, prev_trail = _to_bits(prices[0]), 65, 0
+    prev_code = codes[0]
+    for i in range(1, len(micros)):
+        delta = micros[i] - prev_time
+        dod = delta - prev_delta
+        if dod == 0:
+            writer.write(0, 1)
+        else:
+            for control, length, bits in _DOD_BUCKETS:
+                if bits == 64 or -(1 << (bits - 1)) <= dod < (1 << (bits - 1)):
+                    writer.write(control, length)
+                    writer.write(dod, bits)
+                    break
+        prev_time, prev_delta = micros[i], delta
+
+        bits = _to_bits(prices[i])
+        xor = bits ^ prev_bits
+        if xor == 0:
+            writer.write(0, 1)
+        else:
+            lead = min(64 - xor.bit_length(), 31)
+            trail = (xor & -xor).bit_length() - 1
+            if lead >= prev_lead and trail >= prev_trail:
+                # Fits the previous window of meaningful bits
+                writer.write(0b10, 2)
+                writer.write(xor >> prev_trail, 64 - prev_lead - prev_trail)
+            else:
+                length = 64 - lead - trail
+                writer.write(0b11, 2)
+                writer.write(lead, 5)
+                writer.write(length - 1, 6)
+                writer.write(xor >> trail, length)
+                prev_lead, prev_trail = lead, trail
+        prev_bits = bits
+
+        if codes[i] == prev_code:
+            writer.write(0, 1)
+        else:
+            writer.write(1, 1)
+            writer.write(codes[i], 16)
+            prev_code = codes[i]
+
+    return writer.getvalue()
+
+def decode_block(data: bytes, count: int) -> Tuple[List[int], List[float], List[int]]:
+    """Decode `count` ticks into (timestamp micros, prices, source codes)"""
+    # Bit reads are inlined: int.from_bytes over the bytes spanning the field
+    from_bytes = int.from_bytes
+    from_bits = _from_bits
+    dod_table = _DOD_TABLE
+
+    first = from_bytes(data[0:8], "big")
+    if first >= 1 << 63:
+        first -= 1 << 64  # Before the epoch
+    bits = from_bytes(data[8:16], "big")
+    code = from_bytes(data[16:18], "big")
+    micros, prices, codes = [first], [from_bits(bits)], [code]
+    pos = 144
+
+    timestamp, delta = first, 0
+    lead = trail = 0
+    for _ in range(count - 1):
+        # Next 32 bits hold every control field of this tick
+        start = pos >> 3
+        window = from_bytes(data[start:start + 5], "big") << (pos & 7) & 0xFFFFFFFFFF
+        length, value_bits = dod_table[window >> 35]
+        pos += length
+        if value_bits:
+            start = pos >> 3
+            end = (pos + value_bits + 7) >> 3
+            dod = (from_bytes(data[start:end], "big") >> ((end << 3) - pos - value_bits)) & ((1 << value_bits) - 1)
+            pos += value_bits
+            if dod >= 1 << (value_bits - 1):
+                dod -= 1 << value_bits
+            delta += dod
+        timestamp += delta
+        micros.append(timestamp)
+
+        start = pos >> 3
+        control = (data[start] >> (7 - (pos & 7))) & 1
+        pos += 1
+        if control:
+            start = pos >> 3
+            control = (data[start] >> (7 - (pos & 7))) & 1
+            pos += 1
+            if control:
+                start = pos >> 3
+                header = (from_bytes(data[start:start + 3], "big") >> (13 - (pos & 7))) & 0x7FF
+                pos += 11
+                lead = header >> 6
+                trail = 64 - lead - ((header & 0x3F) + 1)
+            meaningful = 64 - lead - trail
+            start = pos >> 3
+            end = (pos + meaningful + 7) >> 3
+            bits ^= ((from_bytes(data[start:end], "big") >> ((end << 3) - pos - meaningful))
+                     & ((1 << meaningful) - 1)) << trail
+            pos += meaningful
+        prices.append(from_bits(bits))
+
+        start = pos >> 3
+        changed = (data[start] >> (7 - (pos & 7))) & 1
+        pos += 1
+        if changed:
+            start = pos >> 3
+            code = (from_bytes(data[start:start + 3], "big") >> (8 - (pos & 7))) & 0xFFFF
+            pos += 16
+        codes.append(code)
+
+    return micros, prices, codes
+
+class CompressedTickSeries:
+    """
+    Append-only price ticks in compressed blocks
+
+    A drop-in for the tracker's ``price_history`` list: supports len,
+    indexing, slicing, iteration, append/extend and deleting a prefix. Ticks
+    are appended to an uncompressed head block; every TICK_BLOCK_SIZE ticks
+    the head is sealed into a Gorilla-encoded block (~10 bytes per tick
+    instead of a ~200 byte dataclass). Recently decoded blocks are cached for
+    window scans, and timestamp bisection only decodes one block.
+    """
+
+    def __init__(self, ticks: Iterable[PriceData] = (), block_size: Optional[int] = None,
+                 cache_blocks: Optional[int] = None):
+        self.block_size = block_size or settings.TICK_BLOCK_SIZE
+        self.cache_blocks = cache_blocks or settings.TICK_BLOCK_CACHE
+        self._blocks: List[_SealedBlock] = []
+        self._offset = 0  # Ticks of the first block dropped by prefix deletion
+        self._head_micros: List[int] = []
+        self._head_prices: List[float] = []
+        self._head_codes: List[int] = []
+        self._sources: List[str] = []
+        self._source_codes: Dict[str, int] = {}
+        self._tzinfo: Optional[tzinfo] = None
+        self._next_block_id = 0
+        self._cache: "OrderedDict[int, Tuple[List[int], List[float], List[int]]]" = OrderedDict()
+        self.extend(ticks)
+
+    # -- writing -----------------------------------------------------------
+
+    def append(self, tick: PriceData):
+        timestamp = tick.timestamp
+        if not self._blocks and not self._head_micros:
+            self._tzinfo = timestamp.tzinfo
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.replace(tzinfo=None)
+
+        code = self._source_codes.get(tick.source)
+        if code is None:
+            code = self._source_codes[tick.source] = len(self._sources)
+            self._sources.append(tick.source)
+
+        delta = timestamp - EPOCH
+        self._head_micros.append((delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds)
+        self._head_prices.append(float(tick.price))
+        self._head_codes.append(code)
+        if len(self._head_micros) >= self.block_size:
+            self._seal()
+
+    def extend(self, ticks: Iterable[PriceData]):
+        for tick in ticks:
+            self.append(tick)
+
+    def _seal(self):
+        micros, prices, codes = self._head_micros, self._head_prices, self._head_codes
+        block = _SealedBlock(encode_block(micros, prices, codes), len(micros),
+                             micros[0], micros[-1], self._next_block_id)
+        self._next_block_id += 1
+        self._blocks.append(block)
+        self._head_micros, self._head_prices, self._head_codes = [], [], []
+
+    def __delitem__(self, index: Union[int, slice]):
+        """Only prefix deletion (``del series[:n]``) is supported"""
+        if not isinstance(index, slice) or index.start not in (None, 0) or index.step not in (None, 1):
+            raise TypeError("CompressedTickSeries only supports deleting a prefix")
+        remaining = min(len(self), max(0, index.indices(len(self))[1]))
+
+        while remaining and self._blocks:
+            available = self._blocks[0].count - self._offset
+            if remaining < available:
+                self._offset += remaining
+                return
+            remaining -= available
+            self._cache.pop(self._blocks.pop(0).block_id, None)
+            self._offset = 0
+
+        del self._head_micros[:remaining]
+        del self._head_prices[:remaining]
+        del self._head_codes[:remaining]
+
+    # -- reading -----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._blocks) * self.block_size - self._offset + len(self._head_micros)
+
+    def _decoded(self, block: _SealedBlock) -> Tuple[List[int], List[float], List[int]]:
+        decoded = self._cache.get(block.block_id)
+        if decoded is None:
+            decoded = decode_block(block.data, block.count)
+            self._cache[block.block_id] = decoded
+            if len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(block.block_id)
+        return decoded
+
+    def _tick(self, micros: int, price: float, code: int) -> PriceData:
+        timestamp = EPOCH + timedelta(microseconds=micros)
+        if self._tzinfo is not None:
+            timestamp = timestamp.replace(tzinfo=self._tzinfo)
+        return PriceData(price=price, timestamp=timestamp, source=self._sources[code])
+
+    def _locate(self, index: int) -> Tuple[Optional[_SealedBlock], int]:
+        """(block or None for the head, position inside it) of a logical index"""
+        absolute = index + self._offset
+        sealed = len(self._blocks) * self.block_size
+        if absolute < sealed:
+            return self._blocks[absolute // self.block_size], absolute % self.block_size
+        return None, absolute - sealed
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[PriceData, List[PriceData]]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+            return self._range(start, stop)
+
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("tick index out of range")
+        block, position = self._locate(index)
+        if block is None:
+            return self._tick(self._head_micros[position], self._head_prices[position], self._head_codes[position])
+        micros, prices, codes = self._decoded(block)
+        return self._tick(micros[position], prices[position], codes[position])
+
+    def _range(self, start: int, stop: int) -> List[PriceData]:
+        ticks: List[PriceData] = []
+        index = start
+        while index < stop:
+            block, position = self._locate(index)
+            if block is None:
+                micros, prices, codes = self._head_micros, self._head_prices, self._head_codes
+            else:
+                micros, prices, codes = self._decoded(block)
+            end = min(len(micros), position + stop - index)
+            ticks.extend(self._tick(micros[i], prices[i], codes[i]) for i in range(position, end))
+            index += end - position
+        return ticks
+
+    def __iter__(self) -> Iterator[PriceData]:
+        # Snapshot so appends (and seals) during iteration are not seen
+        blocks, offset = list(self._blocks), self._offset
+        head = list(zip(self._head_micros, self._head_prices, self._head_codes))
+        for n, block in enumerate(blocks):
+            micros, prices, codes = self._decoded(block)
+            for i in range(offset if n == 0 else 0, block.count):
+                yield self._tick(micros[i], prices[i], codes[i])
+        for micros, price, code in head:
+            yield self._tick(micros, price, code)
+
+    def bisect(self, timestamp: datetime, right: bool = False) -> int:
+        """Index where `timestamp` would be inserted, decoding at most one block"""
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.replace(tzinfo=None)
+        delta = timestamp - EPOCH
+        target = (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+        search = bisect.bisect_right if right else bisect.bisect_left
+
+        # First block whose last tick is not before the target
+        key = (lambda b: b.last_micros > target) if right else (lambda b: b.last_micros >= target)
+        lo, hi = 0, len(self._blocks)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key(self._blocks[mid]):
+                hi = mid
+            else:
+                lo = mid + 1
+
+        if lo < len(self._blocks):
+            micros, _, _ = self._decoded(self._blocks[lo])
+            position = search(micros, target)
+            return max(0, lo * self.block_size + position - self._offset)
+        return len(self._blocks) * self.block_size - self._offset + search(self._head_micros, target)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tick count and encoded size"""
+        sealed_bytes = sum(len(block.data) for block in self._blocks)
+        sealed_ticks = sum(block.count for block in self._blocks)
+        return {
+            "ticks": len(self),
+            "sealed_blocks": len(self._blocks),
+            "head_ticks": len(self._head_micros),
+            "sealed_bytes": sealed_bytes,
+            "bytes_per_sealed_tick": round(sealed_bytes / sealed_ticks, 2) if sealed_ticks else None,
+            "sources": len(self._sources)
+        }
+
+def bisect_timestamp(ticks, timestamp: datetime, right: bool = False) -> int:
+    """Bisect a time-ordered tick sequence (list or CompressedTickSeries) by timestamp"""
+    if isinstance(ticks, CompressedTickSeries):
+        return ticks.bisect(timestamp, right=right)
+    search = bisect.bisect_right if right else bisect.bisect_left
+    return search(ticks, timestamp, key=lambda p: p.timestamp)
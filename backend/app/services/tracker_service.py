@@ -1,9 +1,17 @@
 import asyncio
 import logging
-from typing import Optional, List
+import time
+from typing import Optional, List, Callable, Awaitable
 from datetime import datetime, timedelta
 
+from app.core.config import settings
+from app.core.metrics import MONITOR_TICK_SECONDS, MONITOR_TICK_DRIFT_SECONDS, MONITOR_TICKS
+from app.core.tracing import tracer
 from app.services.kale_tracker import KalePriceTracker, PriceData as TrackerPriceData
+from app.services.replay import ReplaySource
+from app.services.price_store import PriceStore, get_price_store
+from app.services.price_tiers import TieredPriceHistory
+from app.services.tick_series import CompressedTickSeries, bisect_timestamp
 from app.models.price import PriceData, PriceStatistics
 
 logger = logging.getLogger(__name__)
@@ -11,15 +19,61 @@ logger = logging.getLogger(__name__)
 class TrackerService:
     """Service that wraps the original KalePriceTracker for FastAPI use"""
     
-    def __init__(self):
+    def __init__(self,
+                 replay_file: Optional[str] = None,
+                 replay_speedup: Optional[float] = None):
+        replay_file = replay_file or settings.REPLAY_FILE
+        self.replay_source: Optional[ReplaySource] = None
+        if replay_file:
+            self.replay_source = ReplaySource.from_file(
+                replay_file,
+                speedup=replay_speedup or settings.REPLAY_SPEEDUP,
+                loop=settings.REPLAY_LOOP
+            )
+        
         self.tracker = KalePriceTracker(
             log_file='logs/kale_price_log.txt',
-            csv_file='test_prices.csv',
+            csv_file=settings.PRICE_FILE,
             update_interval=10,
-            plot_threshold=5
+            plot_threshold=5,
+            history_file='replay_price_history.json' if self.replay_source else 'price_history.json',
+            replay_source=self.replay_source
         )
+        # Keep the in-memory history in compressed blocks instead of one dataclass per tick
+        self.tracker.price_history = CompressedTickSeries(self.tracker.price_history)
+        self.clock = self.tracker.clock
+        # Live ticks go to the shared price store; replays stay in their own JSON file
+        self.price_store: Optional[PriceStore] = None if self.replay_source else get_price_store()
+        # The in-memory history is the hot tier in front of the store and the Parquet archive
+        self.history: Optional[TieredPriceHistory] = None
+        if self.price_store is not None:
+            self.history = TieredPriceHistory(lambda: self.tracker.price_history, price_store=self.price_store)
         self.background_task: Optional[asyncio.Task] = None
         self.is_running = False
+        # Serialises monitor ticks and on-demand fetches so history stays in timestamp order
+        self._fetch_lock = asyncio.Lock()
+        self.price_listeners: List[Callable[[PriceData], Awaitable[None]]] = []
+    
+    def add_price_listener(self, listener: Callable[[PriceData], Awaitable[None]]):
+        """Register a coroutine called with every new price from the monitoring loop"""
+        self.price_listeners.append(listener)
+    
+    async def _notify_price_listeners(self, price_data: TrackerPriceData):
+        """Pass a new price on to the registered listeners"""
+        if not self.price_listeners:
+            return
+        
+        api_price = PriceData(
+            price=price_data.price,
+            timestamp=price_data.timestamp,
+            source=price_data.source
+        )
+        for listener in self.price_listeners:
+            with tracer.start_as_current_span(f"listener {getattr(listener, '__qualname__', listener)}"):
+                try:
+                    await listener(api_price)
+                except Exception as e:
+                    logger.error(f"Error notifying price listener: {e}")
     
     async def start_background_monitoring(self):
         """Start the background price monitoring"""
@@ -27,16 +81,41 @@ class TrackerService:
             logger.warning("Background monitoring is already running")
             return
         
+        if self.price_store is not None:
+            await self._sync_price_store()
+        
         self.is_running = True
         self.background_task = asyncio.create_task(self._monitoring_loop())
+        if settings.PRICE_FILE_FOLLOW and self.replay_source is None:
+            self.tracker.csv_source.start_following()
         logger.info("Background price monitoring started")
     
+    async def _sync_price_store(self):
+        """Move JSON history into an empty store, otherwise seed history from the store"""
+        try:
+            if await self.price_store.count() == 0:
+                if self.tracker.price_history:
+                    await self.price_store.add_many([
+                        PriceData(price=p.price, timestamp=p.timestamp, source=p.source)
+                        for p in self.tracker.price_history
+                    ])
+                    logger.info(f"Migrated {len(self.tracker.price_history)} JSON history points to the price store")
+                return
+            
+            stored = await self.price_store.get_history(limit=settings.MAX_PRICE_HISTORY)
+            self.tracker.price_history = CompressedTickSeries(
+                TrackerPriceData(p.price, p.timestamp, p.source) for p in stored
+            )
+        except Exception as e:
+            logger.error(f"Error syncing price history with the price store: {e}")
+    
     async def stop_background_monitoring(self):
         """Stop the background price monitoring"""
         if not self.is_running:
             return
         
         self.is_running = False
+        await self.tracker.csv_source.stop_following()
         if self.background_task:
             self.background_task.cancel()
             try:
@@ -45,42 +124,110 @@ class TrackerService:
                 pass
         
         # Save final data
-        self.tracker._save_price_history()
+        if self.price_store is not None:
+            await self.price_store.flush()
+        else:
+            self.tracker._save_price_history()
         logger.info("Background price monitoring stopped")
     
     async def _monitoring_loop(self):
         """Background monitoring loop"""
+        scheduled_start = None
         while self.is_running:
             try:
-                # Fetch current price using the original tracker
-                price_data = await asyncio.to_thread(self.tracker.fetch_current_price)
+                tick_started = time.monotonic()
+                if scheduled_start is not None:
+                    MONITOR_TICK_DRIFT_SECONDS.observe(max(tick_started - scheduled_start, 0.0))
+                
+                with tracer.start_as_current_span("price_tick") as span:
+                    price_data = await self._run_tick()
+                    if price_data:
+                        span.set_attribute("price.source", price_data.source)
+                        span.set_attribute("price.value", price_data.price)
                 
                 if price_data:
-                    # Add to tracker history
-                    self.tracker.price_history.append(price_data)
-                    
-                    logger.info(f"Price updated: ${price_data.price:.6f} from {price_data.source}")
-                    
-                    # Save history periodically
-                    if len(self.tracker.price_history) % 10 == 0:
-                        await asyncio.to_thread(self.tracker._save_price_history)
+                    MONITOR_TICKS.labels("success").inc()
+                elif self.replay_source is not None:
+                    logger.info("Replay finished: recorded ticks exhausted")
+                    break
                 else:
                     logger.error("Failed to fetch price data from all sources")
+                    MONITOR_TICKS.labels("failure").inc()
+                MONITOR_TICK_SECONDS.observe(time.monotonic() - tick_started)
                 
-                # Wait for next update
-                await asyncio.sleep(self.tracker.update_interval)
+                # Wait for next update; drift is measured against the cadence the interval implies
+                interval = self._next_interval()
+                scheduled_start = None if self.replay_source is not None else tick_started + interval
+                await self.clock.sleep(interval)
                 
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
-                await asyncio.sleep(5)  # Wait before retrying
+                MONITOR_TICKS.labels("error").inc()
+                scheduled_start = None
+                await self.clock.sleep(5)  # Wait before retrying (compressed when replaying)
+    
+    async def _run_tick(self) -> Optional[TrackerPriceData]:
+        """Fetch one price and pass it through history, persistence and listeners, one span per stage"""
+        price_data = await self._fetch_and_record()
+        if not price_data:
+            return None
+        
+        logger.info(f"Price updated: ${price_data.price:.6f} from {price_data.source}")
+        
+        with tracer.start_as_current_span("listeners"):
+            await self._notify_price_listeners(price_data)
+        return price_data
+    
+    async def _fetch_and_record(self) -> Optional[TrackerPriceData]:
+        """
+        Fetch a price and add it to the hot history and the store
+        
+        A tick is stamped when its fetch finishes, so fetches that overlapped
+        could be appended out of order; history reads bisect on timestamp,
+        so the monitor loop and on-demand fetches take turns.
+        """
+        async with self._fetch_lock:
+            # Fetch current price using the original tracker (the context carries the span into the thread)
+            with tracer.start_as_current_span("fetch"):
+                price_data = await asyncio.to_thread(self.tracker.fetch_current_price)
+            if not price_data:
+                return None
+            
+            # Add to tracker history
+            with tracer.start_as_current_span("history.append"):
+                self.tracker.price_history.append(price_data)
+                self._trim_hot_history()
+            
+            with tracer.start_as_current_span("persist"):
+                await self._persist(price_data)
+        return price_data
+    
+    async def _persist(self, price_data: TrackerPriceData):
+        """Persist a tick (batched by the store); replay history is saved once, when monitoring stops"""
+        if self.price_store is not None:
+            await self.price_store.add(PriceData(
+                price=price_data.price,
+                timestamp=price_data.timestamp,
+                source=price_data.source
+            ))
+    
+    def _trim_hot_history(self):
+        """Keep the in-memory ring bounded once older ticks live in the store"""
+        history = self.tracker.price_history
+        if self.price_store is not None and len(history) > settings.MAX_PRICE_HISTORY * 1.1:
+            del history[:len(history) - settings.MAX_PRICE_HISTORY]
+    
+    def _next_interval(self) -> float:
+        """Seconds until the next tick (the recorded gap when replaying)"""
+        if self.replay_source is not None:
+            return self.replay_source.seconds_until_next(self.tracker.update_interval)
+        return self.tracker.update_interval
     
     async def get_current_price(self) -> Optional[PriceData]:
         """Get the most recent price"""
         if not self.tracker.price_history:
             # Try to fetch a new price if history is empty
-            tracker_price = await asyncio.to_thread(self.tracker.fetch_current_price)
-            if tracker_price:
-                self.tracker.price_history.append(tracker_price)
+            await self._fetch_and_record()
         
         if not self.tracker.price_history:
             return None
@@ -97,22 +244,15 @@ class TrackerService:
                               end_date: Optional[datetime] = None,
                               limit: int = 100) -> List[PriceData]:
         """Get price history with optional filtering"""
+        if self.history is not None:
+            return await self.history.get_history(start_date, end_date, limit)
+        
         history = self.tracker.price_history
         
-        # Apply date filters
-        if start_date or end_date:
-            filtered_history = []
-            for price_data in history:
-                if start_date and price_data.timestamp < start_date:
-                    continue
-                if end_date and price_data.timestamp > end_date:
-                    continue
-                filtered_history.append(price_data)
-            history = filtered_history
-        
-        # Apply limit (get most recent)
-        if len(history) > limit:
-            history = history[-limit:]
+        # Apply date filters by bisecting the time-ordered history, then keep the most recent `limit`
+        lo = bisect_timestamp(history, start_date) if start_date else 0
+        hi = bisect_timestamp(history, end_date, right=True) if end_date else len(history)
+        history = history[max(lo, hi - limit):hi]
         
         # Convert to Pydantic models
         return [
@@ -130,11 +270,12 @@ class TrackerService:
             return None
         
         # Filter by time period
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        filtered_prices = [
-            p for p in self.tracker.price_history 
-            if p.timestamp >= cutoff_time
-        ]
+        cutoff_time = self.clock.utcnow() - timedelta(hours=hours)
+        if self.history is not None:
+            filtered_prices = await self.history.get_prices_since(cutoff_time)
+        else:
+            history = self.tracker.price_history
+            filtered_prices = history[bisect_timestamp(history, cutoff_time):]
         
         if not filtered_prices:
             return None
@@ -150,15 +291,14 @@ class TrackerService:
             price_24h_change_percent=((current_price - prices[0]) / prices[0] * 100) if len(prices) > 1 and prices[0] > 0 else 0,
             average_price=sum(prices) / len(prices),
             total_data_points=len(prices),
-            last_updated=datetime.utcnow()
+            last_updated=self.clock.utcnow()
         )
     
     async def force_price_update(self) -> Optional[PriceData]:
         """Force a price update and return the new price"""
-        tracker_price = await asyncio.to_thread(self.tracker.fetch_current_price)
+        tracker_price = await self._fetch_and_record()
         
         if tracker_price:
-            self.tracker.price_history.append(tracker_price)
             return PriceData(
                 price=tracker_price.price,
                 timestamp=tracker_price.timestamp,
@@ -169,12 +309,31 @@ class TrackerService:
     
     def get_tracker_stats(self) -> dict:
         """Get tracker internal statistics"""
-        return {
+        stats = {
             "total_history_points": len(self.tracker.price_history),
             "update_interval": self.tracker.update_interval,
             "plot_threshold": self.tracker.plot_threshold,
             "last_hardcoded_index": self.tracker.test_index,
             "is_monitoring": self.is_running,
             "log_file": self.tracker.log_file,
-            "csv_file": self.tracker.csv_file
-        }
\ No newline at end of file
+            "csv_file": self.tracker.csv_file,
+            "price_file": self.tracker.csv_source.get_stats()
+        }
+        if self.replay_source is not None:
+            stats["replay"] = self.replay_source.get_stats()
+        if isinstance(self.tracker.price_history, CompressedTickSeries):
+            stats["hot_storage"] = self.tracker.price_history.get_stats()
+        if self.history is not None:
+            stats["tier_reads"] = dict(self.history.tier_reads)
+            stats["archive"] = self.history.archive.get_stats()
+        return stats
+
+
+_tracker_service: Optional[TrackerService] = None
+
+def get_tracker_service() -> TrackerService:
+    """Shared tracker service used by the API endpoints and the background monitor"""
+    global _tracker_service
+    if _tracker_service is None:
+        _tracker_service = TrackerService()
+    return _tracker_service
\ No newline at end of file
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import logging
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Set
+from urllib.parse import urlsplit
+
+import httpx
+from sqlalchemy import select, update, delete, insert, func
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import WebhookDelivery
+
+logger = logging.getLogger(__name__)
+
+class WebhookOutbox:
+    """
+    Durable, batched webhook delivery for fired price alerts
+
+    Fired alerts are grouped by webhook URL and written to the webhook_outbox
+    table in one insert, so the tick that fired them only pays for that
+    write. A dispatcher task delivers due rows with a pooled AsyncClient,
+    at most WEBHOOK_PER_HOST_CONCURRENCY requests per receiving host, and
+    retries failures with exponential backoff and jitter. Rows are deleted
+    once delivered and marked failed after WEBHOOK_MAX_ATTEMPTS, so pending
+    deliveries survive restarts (at-least-once; receivers can dedupe on the
+    X-Kale-Delivery header).
+    """
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self.dispatcher_task: Optional[asyncio.Task] = None
+        self.is_running = False
+        self._wakeup = asyncio.Event()
+        self._in_flight: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {"enqueued": 0, "delivered": 0, "retried": 0, "failed": 0}
+
+    @property
+    def in_flight_count(self) -> int:
+        """Deliveries claimed by the dispatcher and not yet finished"""
+        return len(self._in_flight)
+
+    async def start(self):
+        """Open the HTTP client and start delivering pending rows"""
+        if self.is_running:
+            return
+        self.client = httpx.AsyncClient(
+            timeout=settings.WEBHOOK_TIMEOUT,
+            limits=httpx.Limits(max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+                                max_keepalive_connections=settings.WEBHOOK_MAX_CONNECTIONS),
+            headers={"User-Agent": f"{settings.PROJECT_NAME}/{settings.VERSION}"}
+        )
+        self.is_running = True
+        self.dispatcher_task = asyncio.create_task(self._dispatch_loop())
+        logger.info("Webhook outbox started")
+
+    async def stop(self):
+        """Stop dispatching; undelivered rows stay in the outbox for the next start"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        tasks = [self.dispatcher_task, *self._tasks] if self.dispatcher_task else list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+        logger.info("Webhook outbox stopped")
+
+    async def enqueue_alerts(self, fired_alerts: List[Dict[str, Any]]):
+        """Alert listener: write one outbox row per webhook URL for this tick's alerts"""
+        by_url: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for alert in fired_alerts:
+            if alert.get("webhook_url"):
+                by_url[alert["webhook_url"]].append(alert)
+        if not by_url:
+            return
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "url": url,
+                "payload": json.dumps({"type": "price_alerts", "alerts": alerts}),
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now
+            }
+            for url, alerts in by_url.items()
+        ]
+        async with AsyncSessionLocal() as session:
+            await session.execute(insert(WebhookDelivery), rows)
+            await session.commit()
+        self.stats["enqueued"] += len(rows)
+        self._wakeup.set()
+
+    async def _dispatch_loop(self):
+        """Hand due outbox rows to delivery tasks"""
+        while self.is_running:
+            try:
+                free = settings.WEBHOOK_BATCH_SIZE - len(self._in_flight)
+                due = await self._due_rows(free) if free > 0 else []
+                for row in due:
+                    self._in_flight.add(row.id)
+                    task = asyncio.create_task(self._deliver(row))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                if len(due) == free and free > 0:
+                    continue  # More may be due right away
+            except Exception as e:
+                logger.error(f"Error dispatching webhooks: {e}")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.WEBHOOK_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _due_rows(self, limit: int) -> List[WebhookDelivery]:
+        async with AsyncSessionLocal() as session:
+            stmt = (
+                select(WebhookDelivery)
+                .where(WebhookDelivery.status == "pending", WebhookDelivery.next_attempt_at <= datetime.utcnow())
+                .order_by(WebhookDelivery.next_attempt_at)
+                .limit(limit + len(self._in_flight))
+            )
+            rows = (await session.execute(stmt)).scalars().all()
+        return [row for row in rows if row.id not in self._in_flight][:limit]
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(settings.WEBHOOK_PER_HOST_CONCURRENCY)
+        return limit
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff with full jitter between half and the whole delay"""
+        delay = min(settings.WEBHOOK_MAX_BACKOFF, settings.WEBHOOK_RETRY_BACKOFF * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _deliver(self, row: WebhookDelivery):
+        """POST one outbox row and record the outcome"""
+        error = None
+        try:
+            async with self._host_limit(row.url):
+                response = await self.client.post(
+                    row.url,
+                    content=row.payload,
+                    headers={"Content-Type": "application/json", "X-Kale-Delivery": str(row.id)}
+                )
+            if response.status_code >= 300:
+                error = f"HTTP {response.status_code}"
+        except asyncio.CancelledError:
+            self._in_flight.discard(row.id)
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+        try:
+            async with AsyncSessionLocal() as session:
+                if error is None:
+                    await session.execute(delete(WebhookDelivery).where(WebhookDelivery.id == row.id))
+                    self.stats["delivered"] += 1
+                else:
+                    attempts = row.attempts + 1
+                    values = {"attempts": attempts, "last_error": error[:500]}
+                    if attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+                        values["status"] = "failed"
+                        self.stats["failed"] += 1
+                        logger.warning(f"Giving up on webhook {row.id} to {row.url} after {attempts} attempts: {error}")
+                    else:
+                        values["next_attempt_at"] = datetime.utcnow() + timedelta(seconds=self._backoff(attempts))
+                        self.stats["retried"] += 1
+                    await session.execute(update(WebhookDelivery).where(WebhookDelivery.id == row.id).values(**values))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error recording webhook {row.id} outcome: {e}")
+        finally:
+            self._in_flight.discard(row.id)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Outbox depth and delivery counters"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(WebhookDelivery.status, func.count()).group_by(WebhookDelivery.status)
+            )
+            by_status = dict(result.all())
+        return {
+            **self.stats,
+            "pending": by_status.get("pending", 0),
+            "failed_rows": by_status.get("failed", 0),
+            "in_flight": self.in_flight_count,
+            "running": self.is_running
+        }
+
+_webhook_outbox: Optional[WebhookOutbox] = None
+
+def get_webhook_outbox() -> WebhookOutbox:
+    """Shared webhook outbox used by the alert engine and the app lifespan"""
+    global _webhook_outbox
+    if _webhook_outbox is None:
+        _webhook_outbox = WebhookOutbox()
+    return _webhook_outbox
@@ -0,0 +1,66 @@
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize_latencies(values_ms: List[float]) -> Dict[str, Any]:
+    """p50/p95/p99/mean/max summary of latencies in milliseconds"""
+    if not values_ms:
+        return {"count": 0}
+    return {
+        "count": len(values_ms),
+        "mean_ms": round(sum(values_ms) / len(values_ms), 3),
+        "p50_ms": round(percentile(values_ms, 50), 3),
+        "p95_ms": round(percentile(values_ms, 95), 3),
+        "p99_ms": round(percentile(values_ms, 99), 3),
+        "max_ms": round(max(values_ms), 3),
+    }
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit (or 'unknown')"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def run_metadata() -> Dict[str, Any]:
+    """Environment details stored alongside every result file"""
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(results: Dict[str, Any], output: Optional[str], prefix: str) -> str:
+    """Write results as JSON, defaulting to results/<prefix>-<commit>.json"""
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{prefix}-{results['meta']['commit']}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    return output
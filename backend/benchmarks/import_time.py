@@ -0,0 +1,126 @@
+"""
+Import-time budget for API startup
+
+Imports app.main in fresh interpreters (what every gunicorn worker pays on a
+cold start) and checks that the median import time stays under a fixed
+budget and that none of the heavy optional modules (pandas, matplotlib,
+numpy, pyarrow) are loaded by the API. Reports peak RSS after the import and
+the slowest modules from -X importtime. Exits non-zero if the budget is
+exceeded or a heavy module is imported.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget 1.5 --repeats 7
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import List, Dict, Any
+
+from benchmarks.common import BACKEND_DIR, run_metadata, write_results
+
+DEFAULT_BUDGET = 2.0  # seconds to import app.main
+HEAVY_MODULES = ["pandas", "matplotlib", "numpy", "pyarrow"]
+
+# Runs in the child interpreter; argv[1] is the module, argv[2] the result file
+CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - started
+with open(sys.argv[2], "w") as f:
+    json.dump({
+        "seconds": elapsed,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "modules": sorted(sys.modules),
+    }, f)
+"""
+
+
+def import_once(module: str, workdir: str, importtime: bool = False) -> Dict[str, Any]:
+    """Import `module` in a new interpreter and return its timing (and -X importtime output)"""
+    result_file = os.path.join(workdir, "result.json")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get("PYTHONPATH")])))
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD, module, result_file]
+    # Run from a scratch directory so the logs/ and database files app.main creates stay out of the tree
+    completed = subprocess.run(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+    with open(result_file) as f:
+        result = json.load(f)
+    result["importtime"] = completed.stderr if importtime else ""
+    return result
+
+
+def slowest_imports(importtime_output: str, top: int, exclude: str) -> List[Dict[str, Any]]:
+    """Top-level packages (other than `exclude`) with the largest cumulative import time"""
+    totals = {}
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        # Only the outermost import of each top-level package counts
+        root = name.split(".")[0]
+        if root == exclude:
+            continue
+        totals[root] = max(totals.get(root, 0), int(cumulative))
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in ranked]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the API against a budget")
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="Median seconds allowed")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest packages to report")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/import-<commit>.json)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="kale-import-")
+    import_once(args.module, workdir)  # Warm the bytecode and filesystem caches
+    runs = [import_once(args.module, workdir) for _ in range(args.repeats)]
+    profile = import_once(args.module, workdir, importtime=True)
+
+    seconds = [run["seconds"] for run in runs]
+    median = statistics.median(seconds)
+    heavy = [name for name in HEAVY_MODULES if name in runs[-1]["modules"]]
+    results = {
+        "meta": run_metadata(),
+        "module": args.module,
+        "budget_s": args.budget,
+        "median_s": round(median, 4),
+        "min_s": round(min(seconds), 4),
+        "max_s": round(max(seconds), 4),
+        "max_rss_mb": round(max(run["max_rss_kb"] for run in runs) / 1024, 1),
+        "modules_loaded": len(runs[-1]["modules"]),
+        "heavy_modules": heavy,
+        "slowest": slowest_imports(profile["importtime"], args.top, args.module.split(".")[0]),
+    }
+
+    print(f"import {args.module}: median {median:.3f}s (min {min(seconds):.3f}s, max {max(seconds):.3f}s), "
+          f"budget {args.budget:.3f}s, peak RSS {results['max_rss_mb']} MB")
+    for entry in results["slowest"]:
+        print(f"  {entry['module']:<30} {entry['cumulative_ms']:>9.1f} ms")
+    output = write_results(results, args.output, "import")
+    print(f"Results written to {output}")
+
+    failed = False
+    if heavy:
+        print(f"Heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if median > args.budget:
+        print(f"Import time {median:.3f}s is over the {args.budget:.3f}s budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+End-to-end load benchmark for the REST and WebSocket API
+
+Starts the local Stellar stub, launches the API (in replay mode so price ticks
+arrive at a controlled rate) against it in a separate process, then drives a
+weighted mix of REST requests alongside a pool of /ws/price-stream clients.
+Reports p50/p95/p99 latency and throughput per route plus WebSocket broadcast
+fan-out delay, and writes everything to a JSON file that can be diffed between
+commits. Exits non-zero if any route's error rate is above --max-error-rate, since
+its latencies would then describe only the requests that happened to succeed.
+
+Usage:
+    python -m benchmarks.load_api --duration 30 --concurrency 64 --ws-clients 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Tuple
+
+import httpx
+import websockets
+
+from benchmarks.common import BACKEND_DIR, summarize_latencies, run_metadata, write_results
+from stubs.stellar_stub import StubServer, StubConfig, stub_farmer_address
+
+# farming/opportunity and farming/network-health are left out: they currently fail
+# on every request (NetworkHealth enum mismatch) and would measure nothing
+DEFAULT_MIX = (
+    "prices/current=30,prices/history=15,prices/statistics=10,prices/summary=5,"
+    "farming/stats=10,farming/farmer=15,farming/leaderboard=5"
+)
+DEFAULT_MAX_ERROR_RATE = 0.01  # a route failing more often than this fails the run
+
+API_PREFIX = "/api/v1"
+
+
+def parse_mix(mix: str) -> List[Tuple[str, int]]:
+    """Parse 'route=weight,...' into a list of (route, weight)"""
+    routes = []
+    for item in mix.split(","):
+        route, _, weight = item.strip().partition("=")
+        routes.append((route.strip(), int(weight or 1)))
+    return routes
+
+
+def build_path(route: str, rng: random.Random, farmers: int) -> str:
+    """Concrete request path for a route in the mix"""
+    if route == "farming/farmer":
+        return f"{API_PREFIX}/farming/farmer/{stub_farmer_address(rng.randrange(max(farmers, 1)))}"
+    if route == "prices/history":
+        return f"{API_PREFIX}/prices/history?limit={rng.choice([10, 100, 500])}"
+    if route == "farming/leaderboard":
+        return f"{API_PREFIX}/farming/leaderboard?limit={rng.choice([10, 50, 200])}"
+    return f"{API_PREFIX}/{route}"
+
+
+def write_recording(path: str, ticks: int) -> None:
+    """Synthetic one-tick-per-second recording for replay mode"""
+    start = datetime.utcnow() - timedelta(seconds=ticks)
+    rng = random.Random(7)
+    price = 0.095
+    with open(path, "w") as f:
+        for i in range(ticks):
+            price = max(0.0001, price * (1 + rng.gauss(0, 0.002)))
+            f.write(json.dumps({
+                "price": round(price, 7),
+                "timestamp": (start + timedelta(seconds=i)).isoformat(),
+                "source": "stellar",
+            }) + "\n")
+
+
+class ApiProcess:
+    """The API running under uvicorn in its own process and working directory"""
+
+    def __init__(self, port: int, env: Dict[str, str]):
+        self.port = port
+        self.env = env
+        self.workdir = tempfile.mkdtemp(prefix="kale-bench-")
+        self.process = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 60.0) -> None:
+        os.makedirs(os.path.join(self.workdir, "logs"), exist_ok=True)
+        env = dict(os.environ)
+        env.update(self.env)
+        env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+        env.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{self.workdir}/bench.db")
+        env.setdefault("LOG_LEVEL", "WARNING")
+
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app",
+             "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning"],
+            cwd=self.workdir, env=env,
+            stdout=subprocess.DEVNULL, stderr=open(os.path.join(self.workdir, "api.stderr"), "w")
+        )
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"API exited during startup, see {self.workdir}/api.stderr")
+            try:
+                if httpx.get(f"{self.base_url}/health", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("API did not become healthy in time")
+
+    def stop(self) -> None:
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+async def run_http_load(base_url: str,
+                        mix: List[Tuple[str, int]],
+                        concurrency: int,
+                        duration: float,
+                        farmers: int) -> Dict[str, Any]:
+    """Closed-loop HTTP load: `concurrency` workers issuing requests back to back"""
+    routes = [route for route, _ in mix]
+    weights = [weight for _, weight in mix]
+    latencies: Dict[str, List[float]] = {route: [] for route in routes}
+    errors: Dict[str, int] = {route: 0 for route in routes}
+    deadline = time.perf_counter() + duration
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker(seed: int):
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                route = rng.choices(routes, weights)[0]
+                path = build_path(route, rng, farmers)
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    ok = response.status_code < 500
+                except httpx.HTTPError:
+                    ok = False
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if ok:
+                    latencies[route].append(elapsed_ms)
+                else:
+                    errors[route] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    per_route = {}
+    all_latencies = []
+    for route in routes:
+        summary = summarize_latencies(latencies[route])
+        summary["errors"] = errors[route]
+        attempts = len(latencies[route]) + errors[route]
+        summary["error_rate"] = round(errors[route] / attempts, 4) if attempts else 0.0
+        summary["throughput_rps"] = round(len(latencies[route]) / elapsed, 2)
+        per_route[route] = summary
+        all_latencies.extend(latencies[route])
+
+    overall = summarize_latencies(all_latencies)
+    overall["errors"] = sum(errors.values())
+    overall["throughput_rps"] = round(len(all_latencies) / elapsed, 2)
+    overall["duration_s"] = round(elapsed, 3)
+    return {"overall": overall, "routes": per_route, "concurrency": concurrency}
+
+
+async def run_ws_clients(base_url: str, clients: int, duration: float, connect_batch: int = 200) -> Dict[str, Any]:
+    """Hold `clients` price-stream connections open and measure broadcast fan-out delay"""
+    ws_url = base_url.replace("http://", "ws://") + f"{API_PREFIX}/ws/price-stream"
+    fanout_ms: List[float] = []
+    connect_ms: List[float] = []
+    messages = 0
+    failures = 0
+    stop_at = time.time() + duration
+
+    async def client():
+        nonlocal messages, failures
+        started = time.perf_counter()
+        try:
+            async with websockets.connect(ws_url, open_timeout=30, max_queue=64) as ws:
+                connect_ms.append((time.perf_counter() - started) * 1000)
+                while True:
+                    remaining = stop_at - time.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    received = datetime.utcnow()
+                    message = json.loads(raw)
+                    if message.get("type") != "price_update":
+                        continue
+                    messages += 1
+                    sent = datetime.fromisoformat(message["timestamp"])
+                    fanout_ms.append((received - sent).total_seconds() * 1000)
+        except Exception:
+            failures += 1
+
+    tasks = []
+    for i in range(clients):
+        tasks.append(asyncio.create_task(client()))
+        if (i + 1) % connect_batch == 0:
+            await asyncio.sleep(0.05)
+    await asyncio.gather(*tasks)
+
+    return {
+        "clients": clients,
+        "failed_connections": failures,
+        "messages_received": messages,
+        "connect": summarize_latencies(connect_ms),
+        "fanout_delay": summarize_latencies(fanout_ms),
+    }
+
+
+async def run_benchmark(args, base_url: str) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    http_task = run_http_load(base_url, mix, args.concurrency, args.duration, args.farmers)
+    ws_task = run_ws_clients(base_url, args.ws_clients, args.duration) if args.ws_clients else None
+
+    if ws_task:
+        http_results, ws_results = await asyncio.gather(http_task, ws_task)
+    else:
+        http_results, ws_results = await http_task, None
+
+    return {"http": http_results, "websocket": ws_results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end REST/WebSocket load benchmark")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent HTTP workers")
+    parser.add_argument("--ws-clients", type=int, default=500, help="Concurrent price-stream clients")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted route mix 'route=weight,...'")
+    parser.add_argument("--tick-rate", type=float, default=10.0, help="Replayed price ticks per second")
+    parser.add_argument("--farmers", type=int, default=1000, help="Farmers in the stub contract")
+    parser.add_argument("--stub-latency-ms", type=float, default=5.0)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--stub-port", type=int, default=8100)
+    parser.add_argument("--api-port", type=int, default=8001)
+    parser.add_argument("--max-error-rate", type=float, default=DEFAULT_MAX_ERROR_RATE,
+                        help="Highest error rate allowed per route")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args()
+
+    stub_config = StubConfig(
+        latency_ms=args.stub_latency_ms,
+        error_rate=args.stub_error_rate,
+        farmers=args.farmers,
+    )
+    recording = tempfile.NamedTemporaryFile(suffix=".ndjson", delete=False).name
+    # Enough recorded ticks to outlast the run (plus startup) at the requested rate
+    write_recording(recording, int(args.tick_rate * (args.duration + 60)) + 10)
+
+    with StubServer(stub_config, port=args.stub_port) as stub:
+        env = stub.env()
+        env.update({
+            "REPLAY_FILE": recording,
+            "REPLAY_SPEEDUP": str(args.tick_rate),
+            "REPLAY_LOOP": "true",
+        })
+        api = ApiProcess(args.api_port, env)
+        api.start()
+        try:
+            results = asyncio.run(run_benchmark(args, api.base_url))
+        finally:
+            api.stop()
+            os.unlink(recording)
+
+    results["meta"] = run_metadata()
+    results["config"] = {key: value for key, value in vars(args).items() if key != "output"}
+    output = write_results(results, args.output, "load")
+
+    overall = results["http"]["overall"]
+    print(f"HTTP: {overall.get('throughput_rps')} req/s, p50 {overall.get('p50_ms')} ms, "
+          f"p95 {overall.get('p95_ms')} ms, p99 {overall.get('p99_ms')} ms, errors {overall['errors']}")
+    if results["websocket"]:
+        fanout = results["websocket"]["fanout_delay"]
+        print(f"WebSocket: {results['websocket']['messages_received']} messages, fan-out p50 "
+              f"{fanout.get('p50_ms')} ms, p99 {fanout.get('p99_ms')} ms")
+    print(f"Results written to {output}")
+
+    failing = {route: summary["error_rate"] for route, summary in results["http"]["routes"].items()
+               if summary["error_rate"] > args.max_error_rate}
+    if failing:
+        for route, error_rate in failing.items():
+            print(f"{route}: {error_rate:.1%} of requests failed (limit {args.max_error_rate:.1%})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
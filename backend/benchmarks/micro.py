@@ -0,0 +1,291 @@
+"""
+Micro-benchmarks for hot functions
+
+Times the technical indicators, TrackerService history/statistics reads at
+10k/100k/1M ticks, compressed tick block encode/decode, JSON history
+persistence, PriceData construction and JSON encoding, price alert
+evaluation, and the farming leaderboard. Each result is compared against the
+stored baseline in benchmarks/baselines/micro.json; a benchmark slower than its
+baseline by more than its threshold counts as a regression and the run exits
+non-zero.
+
+Baselines are machine specific: refresh them with --save-baseline on the
+machine that runs the comparison whenever a hot path changes on purpose.
+
+Usage:
+    python -m benchmarks.micro                   # compare against baselines
+    python -m benchmarks.micro --quick           # skip the 1M tick sizes
+    python -m benchmarks.micro --save-baseline   # record new baselines
+    python -m benchmarks.micro --filter tracker  # only matching benchmarks
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Dict, Any, Optional
+
+from benchmarks.common import BENCHMARKS_DIR, run_metadata, write_results
+
+BASELINE_FILE = os.path.join(BENCHMARKS_DIR, "baselines", "micro.json")
+DEFAULT_THRESHOLD = 0.25  # 25% slower than baseline is a regression
+
+
+class Benchmark:
+    """A named callable timed per operation"""
+
+    def __init__(self, name: str, func: Callable[[], Any], setup: Optional[Callable[[], None]] = None,
+                 threshold: float = DEFAULT_THRESHOLD):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.threshold = threshold
+
+
+def time_benchmark(benchmark: Benchmark, min_time: float, repeats: int) -> float:
+    """Best-of-`repeats` seconds per call, calibrating loops to run at least `min_time`"""
+    if benchmark.setup:
+        benchmark.setup()
+
+    # Calibrate the number of loops per repeat
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            benchmark.func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+
+    best = elapsed / loops
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            benchmark.func()
+        best = min(best, (time.perf_counter() - started) / loops)
+    return best
+
+
+def synthetic_prices(count: int, seed: int = 1) -> List[float]:
+    rng = random.Random(seed)
+    price = 0.095
+    prices = []
+    for _ in range(count):
+        price = max(0.0001, price * (1 + rng.gauss(0, 0.002)))
+        prices.append(price)
+    return prices
+
+
+def build_benchmarks(sizes: List[int], workdir: str) -> List[Benchmark]:
+    from app.models.price import PriceData, PriceAlert as PriceAlertModel
+    from app.services.alert_engine import PriceAlertEngine
+    from app.services.kale_farming import KaleFarmingService
+    from app.services.kale_tracker import PriceData as TrackerPriceData
+    from app.services.price_fetcher import TechnicalAnalyzer
+    from app.services.tick_series import CompressedTickSeries, encode_block, decode_block
+    from app.services.tracker_service import TrackerService
+
+    loop = asyncio.new_event_loop()
+    run = loop.run_until_complete
+    benchmarks: List[Benchmark] = []
+
+    # Technical indicators over the monitor's 50-price window and a long series
+    analyzer = TechnicalAnalyzer()
+    for count in (50, 10_000):
+        prices = synthetic_prices(count)
+        benchmarks += [
+            Benchmark(f"technical.sma.{count}", lambda p=prices: analyzer.calculate_sma(p, 20)),
+            Benchmark(f"technical.ema.{count}", lambda p=prices: analyzer.calculate_ema(p, 10)),
+            Benchmark(f"technical.rsi.{count}", lambda p=prices: analyzer.calculate_rsi(p, 14)),
+            Benchmark(f"technical.volatility.{count}", lambda p=prices: analyzer.calculate_volatility(p)),
+        ]
+
+    # Tracker reads at increasing history sizes
+    service = TrackerService()
+    service.history = None  # Time the in-memory reads, not the SQL/Parquet tiers behind them
+    start = datetime.now() - timedelta(seconds=10 * max(sizes))
+
+    def fill_history(count: int):
+        def setup():
+            # The same compressed series TrackerService keeps in production
+            prices = synthetic_prices(count)
+            service.tracker.price_history = CompressedTickSeries(
+                TrackerPriceData(price, start + timedelta(seconds=10 * i), 'stellar')
+                for i, price in enumerate(prices)
+            )
+        return setup
+
+    for count in sizes:
+        window_start = start + timedelta(seconds=10 * count // 2)
+        benchmarks += [
+            Benchmark(f"tracker.get_price_history.{count}",
+                      lambda: run(service.get_price_history(limit=100)),
+                      setup=fill_history(count)),
+            Benchmark(f"tracker.get_price_history.filtered.{count}",
+                      lambda ws=window_start: run(service.get_price_history(start_date=ws, limit=1000)),
+                      setup=fill_history(count)),
+            Benchmark(f"tracker.get_price_statistics.{count}",
+                      lambda: run(service.get_price_statistics(hours=24 * 365)),
+                      setup=fill_history(count)),
+        ]
+
+    # Compressed in-memory tick blocks
+    tick_prices = synthetic_prices(100_000)
+    tick_data = [TrackerPriceData(price, start + timedelta(seconds=10 * i), 'stellar')
+                 for i, price in enumerate(tick_prices)]
+    series = CompressedTickSeries(tick_data)
+    block = series._blocks[0]
+    window_start = tick_data[50_000].timestamp
+    benchmarks += [
+        Benchmark("tick_series.encode_block", lambda: encode_block(
+            [int((t.timestamp - start).total_seconds() * 1e6) for t in tick_data[:1024]],
+            tick_prices[:1024], [0] * 1024)),
+        Benchmark("tick_series.decode_block", lambda: decode_block(block.data, block.count)),
+        Benchmark("tick_series.window_1000",
+                  lambda: series[series.bisect(window_start):series.bisect(window_start) + 1000]),
+    ]
+
+    # JSON history persistence (the 1M size is dominated by json and is skipped)
+    for count in [size for size in sizes if size <= 100_000]:
+        history_file = os.path.join(workdir, f"history-{count}.json")
+
+        def save_setup(c=count, path=history_file):
+            fill_history(c)()
+            service.tracker.history_file = path
+
+        def load(path=history_file):
+            service.tracker.history_file = path
+            service.tracker.price_history = []
+            service.tracker._load_price_history()
+
+        benchmarks += [
+            Benchmark(f"tracker.save_price_history.{count}", service.tracker._save_price_history, setup=save_setup),
+            Benchmark(f"tracker.load_price_history.{count}", load,
+                      setup=lambda c=count, path=history_file: (save_setup(c, path), service.tracker._save_price_history())),
+        ]
+
+    # Pydantic model construction and encoding
+    now = datetime.utcnow()
+    price_data = PriceData(price=0.095, timestamp=now, source="stellar")
+    history_models = [PriceData(price=p, timestamp=now, source="stellar") for p in synthetic_prices(100)]
+    benchmarks += [
+        Benchmark("pydantic.price_data.construct",
+                  lambda: PriceData(price=0.095, timestamp=now, source="stellar")),
+        Benchmark("pydantic.price_data.json", price_data.model_dump_json),
+        Benchmark("pydantic.price_data.dict", price_data.model_dump),
+        Benchmark("pydantic.price_history_100.json",
+                  lambda: json.dumps([p.model_dump(mode="json") for p in history_models])),
+    ]
+
+    # Price alert evaluation against 100k active alerts: ticks alternate inside a
+    # band with no thresholds, so this times the two binary searches per tick
+    alert_engine = PriceAlertEngine()
+    alert_rng = random.Random(2)
+    for alert_id in range(1, 100_001):
+        threshold = alert_rng.uniform(0.05, 0.15)
+        if abs(threshold - 0.095) < 0.0001:
+            threshold += 0.001
+        alert_engine._index(PriceAlertModel(id=alert_id, alert_type="above" if alert_id % 2 else "below",
+                                            threshold=threshold))
+    alert_prices = [0.09495, 0.09505]
+    benchmarks.append(Benchmark("alerts.evaluate.100k",
+                                lambda: alert_engine.evaluate(alert_prices[alert_engine.stats["ticks"] % 2])))
+
+    # Farming leaderboard
+    farming_service = KaleFarmingService()
+    for limit in (50, 200):
+        benchmarks.append(Benchmark(f"farming.leaderboard.{limit}",
+                                    lambda l=limit: run(farming_service.get_farming_leaderboard(limit=l))))
+
+    return benchmarks
+
+
+def load_baselines() -> Dict[str, Any]:
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as f:
+        return json.load(f).get("benchmarks", {})
+
+
+def save_baselines(results: Dict[str, Dict[str, Any]], previous: Dict[str, Any]) -> None:
+    baselines = dict(previous)
+    for name, result in results.items():
+        threshold = previous.get(name, {}).get("threshold", result["threshold"])
+        baselines[name] = {"seconds_per_op": result["seconds_per_op"], "threshold": threshold}
+
+    os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+    with open(BASELINE_FILE, "w") as f:
+        json.dump({"meta": run_metadata(), "benchmarks": baselines}, f, indent=2, sort_keys=True)
+
+
+def format_duration(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.3f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for hot functions")
+    parser.add_argument("--quick", action="store_true", help="Skip the 1M tick sizes")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per repeat")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--save-baseline", action="store_true", help="Record results as the new baselines")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/micro-<commit>.json)")
+    args = parser.parse_args()
+
+    # Keep per-call log lines out of the timings
+    logging.disable(logging.CRITICAL)
+
+    sizes = [10_000, 100_000] if args.quick else [10_000, 100_000, 1_000_000]
+    workdir = tempfile.mkdtemp(prefix="kale-micro-")
+    original_cwd = os.getcwd()
+    os.chdir(workdir)  # The tracker reads and writes files relative to the cwd
+    os.makedirs("logs", exist_ok=True)
+    try:
+        benchmarks = [b for b in build_benchmarks(sizes, workdir) if args.filter in b.name]
+        baselines = load_baselines()
+        results: Dict[str, Dict[str, Any]] = {}
+        regressions = []
+
+        for benchmark in benchmarks:
+            seconds = time_benchmark(benchmark, args.min_time, args.repeats)
+            baseline = baselines.get(benchmark.name)
+            result = {"seconds_per_op": seconds, "threshold": benchmark.threshold}
+            line = f"{benchmark.name:<48} {format_duration(seconds):>14}"
+
+            if baseline:
+                threshold = baseline.get("threshold", benchmark.threshold)
+                ratio = seconds / baseline["seconds_per_op"]
+                result.update({"baseline_seconds_per_op": baseline["seconds_per_op"], "ratio": round(ratio, 3)})
+                line += f"  {ratio:6.2f}x baseline"
+                if ratio > 1 + threshold:
+                    regressions.append(benchmark.name)
+                    line += f"  REGRESSION (> {threshold:.0%})"
+            print(line, flush=True)
+            results[benchmark.name] = result
+    finally:
+        os.chdir(original_cwd)
+
+    output = write_results({"meta": run_metadata(), "benchmarks": results, "regressions": regressions},
+                           args.output, "micro")
+    print(f"Results written to {output}")
+
+    if args.save_baseline:
+        save_baselines(results, baselines)
+        print(f"Baselines saved to {BASELINE_FILE}")
+    elif regressions:
+        print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
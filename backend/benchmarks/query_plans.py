@@ -0,0 +1,108 @@
+"""
+Query-plan check for the hot price queries
+
+Builds a SQLite database with the pre-migration price_records schema, runs the
+index migration from init_db against it, fills it with synthetic ticks and
+asserts with EXPLAIN QUERY PLAN that every hot query searches the expected
+index without a full table scan or a temporary sort. Exits non-zero on any
+mismatch, so it can run alongside the micro-benchmarks.
+
+Usage:
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --rows 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import create_engine, func, inspect, select, delete, insert, text
+
+# Pre-migration schema: one single-column index per column
+LEGACY_SCHEMA = [
+    "CREATE TABLE price_records (id INTEGER PRIMARY KEY, price FLOAT NOT NULL, "
+    "timestamp DATETIME, source VARCHAR(20) NOT NULL, volume FLOAT)",
+    "CREATE INDEX ix_price_records_id ON price_records (id)",
+    "CREATE INDEX ix_price_records_price ON price_records (price)",
+    "CREATE INDEX ix_price_records_timestamp ON price_records (timestamp)",
+    "CREATE INDEX ix_price_records_source ON price_records (source)",
+]
+
+
+def hot_queries(now: datetime) -> List[Tuple[str, object, str]]:
+    """(name, statement, index it must use) for the PriceService read paths"""
+    from app.db.models import PriceRecord
+    from app.services.price_store import history_statement, since_statement
+
+    day_ago = now - timedelta(days=1)
+    return [
+        ("latest", history_statement(limit=1), "ix_price_records_timestamp_id"),
+        ("history", history_statement(limit=100), "ix_price_records_timestamp_id"),
+        ("history.range", history_statement(day_ago, now, limit=1000), "ix_price_records_timestamp_id"),
+        ("history.source", history_statement(day_ago, now, "stellar", limit=100), "ix_price_records_source_timestamp"),
+        ("statistics.since", since_statement(day_ago), "ix_price_records_timestamp_id"),
+        ("retention.oldest", select(func.min(PriceRecord.timestamp)), "ix_price_records_timestamp_id"),
+        ("retention.delete",
+         delete(PriceRecord).where((PriceRecord.timestamp >= day_ago - timedelta(hours=1)) & (PriceRecord.timestamp < day_ago)),
+         "ix_price_records_timestamp_id"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the query plans of the hot price queries")
+    parser.add_argument("--rows", type=int, default=20_000, help="Synthetic ticks to load before planning")
+    args = parser.parse_args()
+
+    from app.db.database import Base, _migrate_indexes, _DROPPED_INDEXES
+    from app.db.models import PriceRecord
+
+    path = os.path.join(tempfile.mkdtemp(prefix="kale-plans-"), "plans.db")
+    engine = create_engine(f"sqlite:///{path}")
+    failures = []
+
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.execute(text(statement))
+        Base.metadata.create_all(connection)
+        _migrate_indexes(connection)
+
+        remaining = {index["name"] for index in inspect(connection).get_indexes("price_records")}
+        for index_name in _DROPPED_INDEXES["price_records"]:
+            if index_name in remaining:
+                failures.append(f"migration: {index_name} was not dropped")
+        print(f"price_records indexes: {', '.join(sorted(remaining))}")
+
+        now = datetime.utcnow()
+        sources = ["stellar", "csv", "hardcoded"]
+        connection.execute(insert(PriceRecord), [
+            {"price": 0.095, "timestamp": now - timedelta(seconds=10 * i), "source": sources[i % 3], "volume": None}
+            for i in range(args.rows)
+        ])
+        connection.execute(text("ANALYZE"))
+
+        for name, statement, expected_index in hot_queries(now):
+            sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+            problems = []
+            if not any(expected_index in step for step in plan):
+                problems.append(f"does not use {expected_index}")
+            if any("TEMP B-TREE" in step for step in plan):
+                problems.append("sorts in a temporary b-tree")
+            if any(step.startswith("SCAN price_records") and "INDEX" not in step for step in plan):
+                problems.append("scans the table")
+
+            print(f"{name:<20} {'FAIL' if problems else 'ok':<5} {' | '.join(plan)}")
+            failures += [f"{name}: {problem}" for problem in problems]
+
+    if failures:
+        print(f"{len(failures)} query plan problem(s):")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("All hot queries use their indexes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,576 @@
+"""
+Local stand-in for Stellar Horizon and Soroban RPC
+
+Serves the Horizon trades/order book endpoints used by the price fetchers and
+the Soroban JSON-RPC methods used by SorobanContractClient, backed by a
+deterministic synthetic market and farming contract. Latency, error rate and
+trade volume are configurable so benchmarks and CI can exercise the real
+network code offline under controlled load.
+
+Usage:
+    python -m stubs.stellar_stub --port 8100 --latency-ms 20 --error-rate 0.01
+
+Then point the API at it:
+    STELLAR_HORIZON_URL=http://127.0.0.1:8100
+    SOROBAN_RPC_URL=http://127.0.0.1:8100/soroban/rpc
+    KALE_ANALYTICS_CONTRACT_ID=<contract id printed at startup>
+"""
+import asyncio
+import hashlib
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Deque
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from stellar_sdk import Address, Keypair, StrKey, scval, xdr
+
+logger = logging.getLogger(__name__)
+
+STROOPS = 10_000_000
+NETWORK_PASSPHRASE = "Test SDF Network ; September 2015"
+
+
+@dataclass
+class StubConfig:
+    """Behaviour of the stub server"""
+    latency_ms: float = 0.0              # Added to every response
+    latency_jitter_ms: float = 0.0       # Uniform random extra latency
+    error_rate: float = 0.0              # Fraction of requests answered with an error
+    ledger_close_seconds: float = 5.0    # How often a new ledger closes
+    trades_per_ledger: int = 5           # Synthetic DEX trade volume
+    trade_amount_range: tuple = (10.0, 5000.0)
+    base_price: float = 0.095
+    farmers: int = 500                   # Farmers present in contract storage
+    sessions_per_ledger: int = 3         # Farming session events per ledger
+    max_retained_ledgers: int = 17280    # ~24h of ledgers kept for trades/events
+    seed: int = 42
+    contract_id: str = field(
+        default_factory=lambda: StrKey.encode_contract(hashlib.sha256(b"kale-farming-analytics").digest())
+    )
+
+
+def stub_farmer_address(index: int) -> str:
+    """Deterministic Stellar account address for a synthetic farmer"""
+    seed = hashlib.sha256(f"kale-stub-farmer-{index}".encode()).digest()
+    return Keypair.from_raw_ed25519_seed(seed).public_key
+
+
+class SyntheticLedger:
+    """Deterministic ledger, DEX and farming contract state"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.started_at = time.time()
+        self.genesis_sequence = 1_000_000
+        self.sequence = self.genesis_sequence
+        self.price = config.base_price
+
+        self.kale_issuer = "GCHPTWXMT3HYF4RLZHWBNRF4MPXLTJ76ISHMSYIWCCDXWUYOQG5MR2AB"
+        self.farmer_addresses = [stub_farmer_address(i) for i in range(config.farmers)]
+        self.farmers: Dict[str, Dict[str, int]] = {}
+        self.network = {
+            "total_farmers": 0,
+            "total_staked": 0,
+            "total_rewards_distributed": 0,
+            "current_emission_rate": 50000,
+            "farming_difficulty": 5000,
+            "last_updated": int(self.started_at),
+        }
+
+        retained = config.max_retained_ledgers
+        self.trades: Deque[Dict[str, Any]] = deque(maxlen=max(retained * config.trades_per_ledger, 1))
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max(retained * config.sessions_per_ledger, 1))
+        self.transactions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        # Seed storage so farmer reads work before any ledger closes
+        for address in self.farmer_addresses:
+            self._apply_session(address, self._random_stake(), self.rng.random() < 0.8, int(self.started_at))
+        self._close_ledger()
+
+    def ledger_close_time(self, sequence: int) -> int:
+        offset = (sequence - self.genesis_sequence) * self.config.ledger_close_seconds
+        return int(self.started_at + offset)
+
+    def catch_up(self) -> int:
+        """Close every ledger due since the last request and return the latest sequence"""
+        elapsed = time.time() - self.started_at
+        target = self.genesis_sequence + int(elapsed / self.config.ledger_close_seconds)
+        with self._lock:
+            # Never generate more history than is retained
+            self.sequence = max(self.sequence, target - self.config.max_retained_ledgers)
+            while self.sequence < target:
+                self._close_ledger()
+        return self.sequence
+
+    def _random_stake(self) -> int:
+        return int(self.rng.uniform(50, 550) * STROOPS)
+
+    def _close_ledger(self) -> None:
+        self.sequence += 1
+        close_time = self.ledger_close_time(self.sequence)
+
+        for i in range(self.config.trades_per_ledger):
+            self.price = max(0.0001, self.price * (1 + self.rng.gauss(0, 0.002)))
+            self.trades.append(self._make_trade(close_time, i))
+
+        for i in range(self.config.sessions_per_ledger):
+            if not self.farmer_addresses:
+                break
+            farmer = self.rng.choice(self.farmer_addresses)
+            success = self.rng.random() < 0.8
+            stake = self._random_stake()
+            reward = stake // 100 if success else 0
+            self._apply_session(farmer, stake, success, close_time)
+            self.events.append({
+                "ledger": self.sequence,
+                "index": i,
+                "close_time": close_time,
+                "farmer": farmer,
+                "success": success,
+                "reward": reward,
+            })
+
+    def _apply_session(self, farmer: str, stake: int, success: bool, timestamp: int) -> None:
+        """Mirror KaleFarmingAnalytics.record_farming_session"""
+        data = self.farmers.get(farmer)
+        if data is None:
+            data = {
+                "total_staked": 0,
+                "total_rewards": 0,
+                "farms_completed": 0,
+                "last_plant_time": 0,
+                "last_harvest_time": 0,
+                "success_rate": 0,
+            }
+            self.farmers[farmer] = data
+            self.network["total_farmers"] += 1
+
+        reward = stake // 100 if success else 0
+        data["total_staked"] += stake
+        if success:
+            data["total_rewards"] += reward
+            data["last_harvest_time"] = timestamp
+        data["farms_completed"] += 1
+        data["last_plant_time"] = timestamp
+        successful = data["success_rate"] * (data["farms_completed"] - 1) // 10000 + (1 if success else 0)
+        data["success_rate"] = successful * 10000 // data["farms_completed"]
+
+        self.network["total_staked"] += stake
+        self.network["total_rewards_distributed"] += reward
+        self.network["last_updated"] = timestamp
+        self.network["farming_difficulty"] = min(9000, 3000 + self.network["total_farmers"] * 10)
+
+    def _make_trade(self, close_time: int, index: int) -> Dict[str, Any]:
+        low, high = self.config.trade_amount_range
+        base_amount = self.rng.uniform(low, high)
+        denominator = 10_000_000
+        numerator = max(1, int(round(self.price * denominator)))
+        paging_token = f"{self.sequence << 12 | index}-0"
+        return {
+            "id": paging_token,
+            "paging_token": paging_token,
+            "ledger_close_time": datetime.fromtimestamp(close_time, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "trade_type": "orderbook",
+            "base_offer_id": str(self.rng.randint(1, 10**9)),
+            "base_account": self.rng.choice(self.farmer_addresses) if self.farmer_addresses else self.kale_issuer,
+            "base_amount": f"{base_amount:.7f}",
+            "base_asset_type": "credit_alphanum4",
+            "base_asset_code": "KALE",
+            "base_asset_issuer": self.kale_issuer,
+            "counter_offer_id": str(self.rng.randint(1, 10**9)),
+            "counter_account": self.kale_issuer,
+            "counter_amount": f"{base_amount * self.price:.7f}",
+            "counter_asset_type": "native",
+            "base_is_seller": bool(index % 2),
+            "price": {"n": str(numerator), "d": str(denominator)},
+        }
+
+    def order_book(self, limit: int) -> Dict[str, Any]:
+        def level(price: float) -> Dict[str, Any]:
+            denominator = 10_000_000
+            return {
+                "price_r": {"n": max(1, int(round(price * denominator))), "d": denominator},
+                "price": f"{price:.7f}",
+                "amount": f"{self.rng.uniform(*self.config.trade_amount_range):.7f}",
+            }
+
+        bids = [level(self.price * (1 - 0.001 * (i + 1))) for i in range(limit)]
+        asks = [level(self.price * (1 + 0.001 * (i + 1))) for i in range(limit)]
+        return {
+            "bids": bids,
+            "asks": asks,
+            "base": {"asset_type": "credit_alphanum4", "asset_code": "KALE", "asset_issuer": self.kale_issuer},
+            "counter": {"asset_type": "native"},
+        }
+
+    # XDR encoding of contract storage
+
+    def contract_sc_address(self) -> xdr.SCAddress:
+        return Address(self.config.contract_id).to_xdr_sc_address()
+
+    def farmer_value(self, farmer: str) -> xdr.SCVal:
+        data = self.farmers[farmer]
+        return scval.to_struct({
+            "address": scval.to_address(farmer),
+            "total_staked": scval.to_int128(data["total_staked"]),
+            "total_rewards": scval.to_int128(data["total_rewards"]),
+            "farms_completed": scval.to_uint32(data["farms_completed"]),
+            "last_plant_time": scval.to_uint64(data["last_plant_time"]),
+            "last_harvest_time": scval.to_uint64(data["last_harvest_time"]),
+            "success_rate": scval.to_uint32(data["success_rate"]),
+        })
+
+    def network_value(self) -> xdr.SCVal:
+        stats = self.network
+        return scval.to_struct({
+            "total_farmers": scval.to_uint32(stats["total_farmers"]),
+            "total_staked": scval.to_int128(stats["total_staked"]),
+            "total_rewards_distributed": scval.to_int128(stats["total_rewards_distributed"]),
+            "current_emission_rate": scval.to_uint32(stats["current_emission_rate"]),
+            "farming_difficulty": scval.to_uint32(stats["farming_difficulty"]),
+            "last_updated": scval.to_uint64(stats["last_updated"]),
+        })
+
+    def instance_value(self) -> xdr.SCVal:
+        storage = xdr.SCMap([xdr.SCMapEntry(scval.to_symbol("NETWORK"), self.network_value())])
+        instance = xdr.SCContractInstance(
+            executable=xdr.ContractExecutable(
+                xdr.ContractExecutableType.CONTRACT_EXECUTABLE_WASM,
+                wasm_hash=xdr.Hash(hashlib.sha256(b"kale-farming-analytics-wasm").digest()),
+            ),
+            storage=storage,
+        )
+        return xdr.SCVal(xdr.SCValType.SCV_CONTRACT_INSTANCE, instance=instance)
+
+    def lookup_entry(self, key_xdr: str) -> Optional[Dict[str, Any]]:
+        """Resolve a base64 LedgerKey to a getLedgerEntries result entry"""
+        try:
+            ledger_key = xdr.LedgerKey.from_xdr(key_xdr)
+        except Exception:
+            return None
+        if ledger_key.type != xdr.LedgerEntryType.CONTRACT_DATA:
+            return None
+
+        contract_key = ledger_key.contract_data
+        if Address.from_xdr_sc_address(contract_key.contract).address != self.config.contract_id:
+            return None
+
+        key = contract_key.key
+        if key.type == xdr.SCValType.SCV_LEDGER_KEY_CONTRACT_INSTANCE:
+            value = self.instance_value()
+        elif key.type == xdr.SCValType.SCV_VEC and key.vec and len(key.vec.sc_vec) == 2:
+            prefix, address = key.vec.sc_vec
+            if prefix.type != xdr.SCValType.SCV_SYMBOL or prefix.sym.sc_symbol != b"FARMERS":
+                return None
+            if address.type != xdr.SCValType.SCV_ADDRESS:
+                return None
+            farmer = Address.from_xdr_sc_address(address.address).address
+            if farmer not in self.farmers:
+                return None
+            value = self.farmer_value(farmer)
+        else:
+            return None
+
+        entry_data = xdr.LedgerEntryData(
+            xdr.LedgerEntryType.CONTRACT_DATA,
+            contract_data=xdr.ContractDataEntry(
+                ext=xdr.ExtensionPoint(0),
+                contract=contract_key.contract,
+                key=key,
+                durability=contract_key.durability,
+                val=value,
+            ),
+        )
+        return {
+            "key": key_xdr,
+            "xdr": entry_data.to_xdr(),
+            "lastModifiedLedgerSeq": self.sequence,
+            "liveUntilLedgerSeq": self.sequence + 100_000,
+        }
+
+    def encode_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        event_id = f"{event['ledger'] << 32 | event['index']:019d}-0000000000"
+        return {
+            "type": "contract",
+            "ledger": event["ledger"],
+            "ledgerClosedAt": datetime.fromtimestamp(event["close_time"], tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "contractId": self.config.contract_id,
+            "id": event_id,
+            "pagingToken": event_id,
+            "inSuccessfulContractCall": True,
+            "txHash": hashlib.sha256(event_id.encode()).hexdigest(),
+            "topic": [scval.to_symbol("farming").to_xdr(), scval.to_symbol("session").to_xdr()],
+            "value": scval.to_vec([
+                scval.to_address(event["farmer"]),
+                scval.to_bool(event["success"]),
+                scval.to_int128(event["reward"]),
+            ]).to_xdr(),
+        }
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def create_stub_app(config: Optional[StubConfig] = None) -> FastAPI:
+    """Build the stub ASGI application"""
+    config = config or StubConfig()
+    ledger = SyntheticLedger(config)
+    error_rng = random.Random(config.seed + 1)
+
+    app = FastAPI(title="Stellar stub", docs_url=None, redoc_url=None, openapi_url=None)
+    app.state.config = config
+    app.state.ledger = ledger
+
+    async def simulate_conditions() -> bool:
+        """Apply configured latency; return True when this request should fail"""
+        delay = config.latency_ms + error_rng.uniform(0, config.latency_jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        return config.error_rate > 0 and error_rng.random() < config.error_rate
+
+    # Horizon
+
+    @app.get("/")
+    async def horizon_root():
+        sequence = ledger.catch_up()
+        return {
+            "horizon_version": "stub",
+            "core_latest_ledger": sequence,
+            "history_latest_ledger": sequence,
+            "network_passphrase": NETWORK_PASSPHRASE,
+        }
+
+    @app.get("/trades")
+    async def horizon_trades(limit: int = 10, order: str = "asc"):
+        if await simulate_conditions():
+            return JSONResponse(status_code=503, content={
+                "type": "https://stellar.org/horizon-errors/service_unavailable",
+                "title": "Service Unavailable",
+                "status": 503,
+            })
+        ledger.catch_up()
+        limit = max(1, min(limit, 200))
+        records = list(ledger.trades)
+        records = records[::-1][:limit] if order == "desc" else records[:limit]
+        return {"_links": {}, "_embedded": {"records": records}}
+
+    @app.get("/order_book")
+    async def horizon_order_book(limit: int = 20):
+        if await simulate_conditions():
+            return JSONResponse(status_code=503, content={"title": "Service Unavailable", "status": 503})
+        ledger.catch_up()
+        return ledger.order_book(max(1, min(limit, 200)))
+
+    # Soroban JSON-RPC
+
+    def rpc_get_health(params: Dict[str, Any]) -> Dict[str, Any]:
+        oldest = max(ledger.genesis_sequence, ledger.sequence - config.max_retained_ledgers)
+        return {
+            "status": "healthy",
+            "latestLedger": ledger.sequence,
+            "oldestLedger": oldest,
+            "ledgerRetentionWindow": config.max_retained_ledgers,
+        }
+
+    def rpc_get_network(params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"passphrase": NETWORK_PASSPHRASE, "protocolVersion": 22}
+
+    def rpc_get_latest_ledger(params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": hashlib.sha256(str(ledger.sequence).encode()).hexdigest(),
+            "protocolVersion": 22,
+            "sequence": ledger.sequence,
+        }
+
+    def rpc_get_ledger_entries(params: Dict[str, Any]) -> Dict[str, Any]:
+        keys = params.get("keys") or []
+        if len(keys) > 200:
+            raise RpcError(-32602, "too many keys (max 200)")
+        entries = [entry for entry in (ledger.lookup_entry(key) for key in keys) if entry]
+        return {"entries": entries, "latestLedger": ledger.sequence}
+
+    def rpc_get_events(params: Dict[str, Any]) -> Dict[str, Any]:
+        pagination = params.get("pagination") or {}
+        limit = max(1, min(int(pagination.get("limit", 100)), 10000))
+        cursor = pagination.get("cursor")
+        start_ledger = params.get("startLedger")
+
+        events = []
+        for event in ledger.events:
+            encoded_id = f"{event['ledger'] << 32 | event['index']:019d}-0000000000"
+            if cursor:
+                if encoded_id <= cursor:
+                    continue
+            elif start_ledger and event["ledger"] < int(start_ledger):
+                continue
+            events.append(ledger.encode_event(event))
+            if len(events) >= limit:
+                break
+
+        next_cursor = events[-1]["id"] if events else (cursor or "")
+        return {"events": events, "latestLedger": ledger.sequence, "cursor": next_cursor}
+
+    def rpc_send_transaction(params: Dict[str, Any]) -> Dict[str, Any]:
+        envelope = params.get("transaction")
+        if not envelope:
+            raise RpcError(-32602, "missing transaction")
+        tx_hash = hashlib.sha256(envelope.encode()).hexdigest()
+        ledger.transactions[tx_hash] = {"ledger": ledger.sequence + 1, "submitted_at": time.time()}
+        return {
+            "status": "PENDING",
+            "hash": tx_hash,
+            "latestLedger": ledger.sequence,
+            "latestLedgerCloseTime": str(ledger.ledger_close_time(ledger.sequence)),
+        }
+
+    def rpc_get_transaction(params: Dict[str, Any]) -> Dict[str, Any]:
+        tx = ledger.transactions.get(params.get("hash", ""))
+        result = {
+            "latestLedger": ledger.sequence,
+            "latestLedgerCloseTime": str(ledger.ledger_close_time(ledger.sequence)),
+        }
+        if tx is None:
+            result["status"] = "NOT_FOUND"
+        elif tx["ledger"] > ledger.sequence:
+            result["status"] = "NOT_FOUND"
+        else:
+            result.update({"status": "SUCCESS", "ledger": tx["ledger"]})
+        return result
+
+    rpc_methods = {
+        "getHealth": rpc_get_health,
+        "getNetwork": rpc_get_network,
+        "getLatestLedger": rpc_get_latest_ledger,
+        "getLedgerEntries": rpc_get_ledger_entries,
+        "getEvents": rpc_get_events,
+        "sendTransaction": rpc_send_transaction,
+        "getTransaction": rpc_get_transaction,
+    }
+
+    @app.post("/soroban/rpc")
+    async def soroban_rpc(request: Request):
+        payload = await request.json()
+        fail = await simulate_conditions()
+        ledger.catch_up()
+
+        async def handle(call: Dict[str, Any]) -> Dict[str, Any]:
+            response = {"jsonrpc": "2.0", "id": call.get("id")}
+            method = rpc_methods.get(call.get("method"))
+            try:
+                if fail:
+                    raise RpcError(-32603, "stub: injected failure")
+                if method is None:
+                    raise RpcError(-32601, f"method not found: {call.get('method')}")
+                response["result"] = method(call.get("params") or {})
+            except RpcError as e:
+                response["error"] = {"code": e.code, "message": e.message}
+            return response
+
+        if isinstance(payload, list):
+            return [await handle(call) for call in payload]
+        return await handle(payload)
+
+    return app
+
+
+class StubServer:
+    """Runs the stub app with uvicorn on a background thread"""
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 8100):
+        self.config = config or StubConfig()
+        self.host = host
+        self.port = port
+        self.app = create_stub_app(self.config)
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def horizon_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def soroban_rpc_url(self) -> str:
+        return f"http://{self.host}:{self.port}/soroban/rpc"
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables pointing the API at this stub"""
+        return {
+            "STELLAR_HORIZON_URL": self.horizon_url,
+            "SOROBAN_RPC_URL": self.soroban_rpc_url,
+            "KALE_ANALYTICS_CONTRACT_ID": self.config.contract_id,
+        }
+
+    def start(self, timeout: float = 10.0) -> None:
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="stellar-stub", daemon=True)
+        self._thread.start()
+
+        deadline = time.time() + timeout
+        while not self._server.started:
+            if time.time() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f"Stellar stub failed to start on {self.host}:{self.port}")
+            time.sleep(0.05)
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.should_exit = True
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def __enter__(self) -> "StubServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    """Run the stub server from the command line"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local Horizon and Soroban RPC stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--ledger-close-seconds", type=float, default=5.0)
+    parser.add_argument("--trades-per-ledger", type=int, default=5)
+    parser.add_argument("--farmers", type=int, default=500)
+    parser.add_argument("--sessions-per-ledger", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        ledger_close_seconds=args.ledger_close_seconds,
+        trades_per_ledger=args.trades_per_ledger,
+        farmers=args.farmers,
+        sessions_per_ledger=args.sessions_per_ledger,
+        seed=args.seed,
+    )
+    server = StubServer(config, host=args.host, port=args.port)
+    for name, value in server.env().items():
+        print(f"{name}={value}")
+    uvicorn.run(server.app, host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import farming
+from app.services.event_indexer import FarmerTotals
+from app.services.kale_farming import FarmerData as ServiceFarmerData
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(farming.router, prefix="/api/v1/farming")
+    return TestClient(app)
+
+
+def service_farmer(index: int) -> ServiceFarmerData:
+    return ServiceFarmerData(
+        address=f"G{'A' * 55}{index:02d}",
+        stake_amount=100.0 + index,
+        last_plant_time=datetime.utcnow() - timedelta(hours=1),
+        last_harvest_time=None,
+        total_rewards=10.0 * index,
+        farms_completed=index,
+        success_rate=0.5,
+        is_active=True
+    )
+
+
+def test_leaderboard_from_farming_service(client, monkeypatch):
+    async def leaderboard(limit: int = 50):
+        return [service_farmer(i) for i in range(limit, 0, -1)]
+
+    monkeypatch.setattr(farming.event_indexer, "leaderboard", farming.event_indexer.leaderboard.__class__())
+    monkeypatch.setattr(farming.farming_service, "get_farming_leaderboard", leaderboard)
+
+    response = client.get("/api/v1/farming/leaderboard", params={"limit": 5})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total_count"] == 5
+    assert [farmer["total_rewards"] for farmer in body["farmers"]] == [50.0, 40.0, 30.0, 20.0, 10.0]
+
+
+def test_leaderboard_from_event_index(client, monkeypatch):
+    indexer = farming.event_indexer
+    leaderboard = indexer.leaderboard.__class__()
+    farmers = {}
+    for i in range(1, 4):
+        address = f"G{'B' * 55}{i:02d}"
+        farmers[address] = FarmerTotals(address=address, total_rewards=i * 10_000_000, farms_completed=i,
+                                        successful_farms=i, last_plant_time=datetime.utcnow())
+        leaderboard.update(address, farmers[address].total_rewards)
+    monkeypatch.setattr(indexer, "farmers", farmers)
+    monkeypatch.setattr(indexer, "leaderboard", leaderboard)
+
+    response = client.get("/api/v1/farming/leaderboard", params={"limit": 2})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total_count"] == 3
+    assert [farmer["total_rewards"] for farmer in body["farmers"]] == [3.0, 2.0]
@@ -0,0 +1,123 @@
+import bisect
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.kale_tracker import PriceData
+from app.services.tick_series import CompressedTickSeries, bisect_timestamp, decode_block, encode_block
+
+BLOCK_SIZE = 8
+START = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def make_ticks(offsets_ms, prices=None):
+    prices = prices or [0.1 + 0.001 * (i % 7) for i in range(len(offsets_ms))]
+    sources = ["stellar", "csv", "hardcoded"]
+    return [
+        PriceData(price=price, timestamp=START + timedelta(milliseconds=offset), source=sources[i % 3])
+        for i, (offset, price) in enumerate(zip(offsets_ms, prices))
+    ]
+
+
+def series_of(ticks):
+    return CompressedTickSeries(ticks, block_size=BLOCK_SIZE, cache_blocks=1)
+
+
+def test_round_trip_sealed_blocks_and_head():
+    # Regular, equal, backwards and very large steps, across two sealed blocks and a partial head
+    offsets = [0, 10_000, 20_000, 20_000, 20_000, 15_000, 25_000, 25_001,
+               -5_000, 10**10, 10**10, 10**10 + 1, 3, 40_000, 50_000, 60_000,
+               70_000, 69_999, 80_000, 80_000, 90_000]
+    prices = [0.5, 0.5, 0.5001, 1e-9, 123456.789, 0.0, 0.25, 0.25,
+              0.1, 0.1, 0.3, 2.0, 0.2, 0.2, 0.2, 0.19,
+              0.21, 7.5, 0.5, 0.5, 0.4999]
+    ticks = make_ticks(offsets, prices)
+    series = series_of(ticks)
+
+    assert series.get_stats()["sealed_blocks"] == 2
+    assert series.get_stats()["head_ticks"] == 5
+    assert len(series) == len(ticks)
+    assert list(series) == ticks
+    assert [series[i] for i in range(-len(ticks), len(ticks))] == ticks + ticks
+    assert series[5:19] == ticks[5:19]
+    assert series[::3] == ticks[::3]
+
+
+def test_encode_decode_block():
+    micros = [0, 1, 1, 1_000_000, 999_999, 2**40, 2**40 + 7, 5]
+    prices = [1.0, 1.0, -1.0, 3.141592653589793, 1e300, 5e-324, 0.0, 0.1]
+    codes = [0, 1, 1, 0, 2, 2, 0, 1]
+
+    assert decode_block(encode_block(micros, prices, codes), len(micros)) == (micros, prices, codes)
+
+    # A block starting before the epoch
+    micros = [-86_400_000_000, -1, 0, 1]
+    assert decode_block(encode_block(micros, prices[:4], codes[:4]), 4) == (micros, prices[:4], codes[:4])
+
+
+def test_encode_decode_every_dod_bucket():
+    # Delta-of-deltas on both sides of each bucket edge (7, 12, 20, 32 and 64 bits)
+    dods = [0]
+    for bits in (7, 12, 20, 32):
+        dods += [-(1 << (bits - 1)), (1 << (bits - 1)) - 1, 1 << (bits - 1), -(1 << (bits - 1)) - 1]
+    micros, delta = [10**16], 0
+    for dod in dods:
+        delta += dod
+        micros.append(micros[-1] + delta)
+    prices = [0.5] * len(micros)
+    codes = [0] * len(micros)
+
+    assert decode_block(encode_block(micros, prices, codes), len(micros)) == (micros, prices, codes)
+
+
+def test_prefix_delete():
+    ticks = make_ticks([i * 1_000 for i in range(30)])
+    series = series_of(ticks)
+
+    del series[:3]  # Inside the first block
+    assert list(series) == ticks[3:]
+    del series[:7]  # Past the first block boundary
+    assert list(series) == ticks[10:]
+    assert series[0] == ticks[10]
+    del series[:14]  # Every sealed block, into the head
+    assert list(series) == ticks[24:]
+
+    more = make_ticks([i * 1_000 for i in range(30, 45)])
+    series.extend(more)
+    assert list(series) == ticks[24:] + more
+    assert series[-1] == more[-1]
+
+    with pytest.raises(TypeError):
+        del series[2:4]
+
+
+def test_bisect_across_block_boundary():
+    # Equal timestamps straddle the first seal (indexes 6-9) and sit at the end of the head
+    offsets = [0, 1, 2, 3, 4, 5, 9, 9, 9, 9, 10, 11, 12, 13, 14, 15, 20, 21, 21, 21]
+    ticks = make_ticks([offset * 1_000 for offset in offsets])
+    series = series_of(ticks)
+    timestamps = [tick.timestamp for tick in ticks]
+
+    for offset in range(-1, 24):
+        target = START + timedelta(milliseconds=offset * 1_000 + 500 * (offset % 2))
+        for right, search in ((False, bisect.bisect_left), (True, bisect.bisect_right)):
+            assert series.bisect(target, right=right) == search(timestamps, target)
+            assert bisect_timestamp(series, target, right=right) == search(timestamps, target)
+
+    # Positions stay relative to what is left after a prefix delete
+    del series[:7]
+    for offset in offsets:
+        target = START + timedelta(milliseconds=offset * 1_000)
+        assert series.bisect(target) == max(0, bisect.bisect_left(timestamps, target) - 7)
+        assert series.bisect(target, right=True) == max(0, bisect.bisect_right(timestamps, target) - 7)
+
+
+def test_timezone_aware_round_trip():
+    ticks = [
+        PriceData(price=0.3, timestamp=datetime(2024, 5, 1, tzinfo=timezone.utc) + timedelta(seconds=i), source="stellar")
+        for i in range(BLOCK_SIZE + 3)
+    ]
+    series = series_of(ticks)
+
+    assert list(series) == ticks
+    assert series.bisect(ticks[BLOCK_SIZE].timestamp) == BLOCK_SIZE